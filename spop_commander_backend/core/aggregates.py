@@ -0,0 +1,54 @@
+from django.db.models import Aggregate
+
+
+class Percentile(Aggregate):
+    """
+    Continuous percentile (0 <= fraction <= 1) of an expression,
+    interpolated the same way as PostgreSQL's PERCENTILE_CONT
+    """
+    function = 'PERCENTILE_CONT'
+    name = 'Percentile'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+    def __init__(self, expression, fraction, **extra):
+        fraction = float(fraction)
+        if not 0 <= fraction <= 1:
+            raise ValueError('Percentile fraction must be between 0 and 1')
+        super().__init__(expression, fraction=fraction, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Backed by the aggregate registered in core.apps
+        return self.as_sql(
+            compiler,
+            connection,
+            function='SPOP_PERCENTILE',
+            template='%(function)s(%(expressions)s, %(fraction)s)',
+            **extra_context
+        )
+
+
+class SQLitePercentile:
+    """SQLite aggregate implementation of Percentile"""
+
+    def __init__(self):
+        self.values = []
+        self.fraction = None
+
+    def step(self, value, fraction):
+        self.fraction = fraction
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self):
+        if not self.values:
+            return None
+        values = sorted(self.values)
+        position = (len(values) - 1) * self.fraction
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+        return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def register_sqlite_functions(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        connection.connection.create_aggregate('SPOP_PERCENTILE', 2, SQLitePercentile)
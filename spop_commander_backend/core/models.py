@@ -11,4 +11,48 @@ class BaseModel(models.Model):
     is_active = models.BooleanField(default=True)
 
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+class ChangeTrackingMixin:
+    """
+    Remembers the field values (by attname) an instance was loaded with,
+    so changes can be detected on save without re-reading the row.
+    ``changed_fields()`` reports on ``tracked_fields`` unless asked about
+    other fields. Instances that were not loaded from the database have no
+    snapshot (``loaded_values`` is None).
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def changed_fields(self, fields=None):
+        """
+        Fields (default ``tracked_fields``) modified since load or the last
+        save, as {field: (old, new)}
+        """
+        loaded_values = getattr(self, 'loaded_values', None) or {}
+        changes = {}
+        for name in fields or self.tracked_fields:
+            if name not in loaded_values:
+                continue
+            old_value, new_value = loaded_values[name], getattr(self, name)
+            if new_value != old_value:
+                changes[name] = (old_value, new_value)
+        return changes
+
+    def take_snapshot(self):
+        """Treat the current values as the loaded ones (done after every save)"""
+        self.loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save receivers have seen the old snapshot; start a new one
+        self.take_snapshot()
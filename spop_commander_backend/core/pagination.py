@@ -1,6 +1,119 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+
+def encode_cursor(payload):
+    """Opaque, URL-safe token for a JSON-serializable cursor payload"""
+    return urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Payload of a token from encode_cursor; raises ValueError if malformed"""
+    try:
+        return json.loads(urlsafe_b64decode(cursor.encode()))
+    except (TypeError, AttributeError) as e:
+        raise ValueError(str(e))
+
+
+def key_values(instance, ordering):
+    """JSON-safe values of an ordering key, e.g. ('-timestamp', '-id'), for a row"""
+    return [str(getattr(instance, name.lstrip('-'))) for name in ordering]
+
+
+def keyset_filter(model, ordering, values):
+    """
+    Q matching rows strictly after `values` in `ordering` order. A None
+    value ends the key early, so [timestamp, None] means "after timestamp".
+    Raises ValueError if the values do not fit the key.
+    """
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise ValueError('Cursor does not match the ordering')
+
+    # (a, b) after (x, y)  <=>  a after x  OR  (a = x AND b after y)
+    condition = Q()
+    equal = Q()
+    for name, value in zip(ordering, values):
+        if value is None:
+            break
+        field = name.lstrip('-')
+        try:
+            value = model._meta.get_field(field).to_python(value)
+        except ValidationError as e:
+            raise ValueError(str(e))
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{field}__{lookup}': value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a (field, id) key, e.g. ('-timestamp', '-id').
+
+    Each page continues from the last row of the previous one with a
+    WHERE on the key instead of an OFFSET, so with an index on the key
+    every page costs the same no matter how deep it is. The cursor is an
+    opaque token holding the last row's key values.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                queryset = queryset.filter(
+                    keyset_filter(queryset.model, self.ordering, decode_cursor(cursor))
+                )
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        cursor = encode_cursor(key_values(self.page[-1], self.ordering))
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_schema_fields(self, view):
+        return []
@@ -0,0 +1,90 @@
+import types
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+DEFAULT_CHUNK_SIZE = 500
+# Bytes collected before a piece of the body is handed to the server
+BUFFER_SIZE = 16 * 1024
+
+
+def wants_stream(request):
+    """True if the client opted in with ?stream=true and accepts JSON"""
+    flag = request.query_params.get('stream', '').lower()
+    renderer = getattr(request, 'accepted_renderer', None)
+    return flag in ('1', 'true', 'yes') and (renderer is None or renderer.format == 'json')
+
+
+def iter_chunks(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Lists of at most `chunk_size` instances, read with a server-side cursor
+    where the database supports it. prefetch_related runs once per chunk.
+    """
+    chunk = []
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(instance)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def serialize_iter(queryset, serializer_class, context=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Serialized rows of `queryset`, `chunk_size` instances in memory at a time"""
+    for chunk in iter_chunks(queryset, chunk_size):
+        yield from serializer_class(chunk, many=True, context=context).data
+
+
+def iter_json(value, encoder=None):
+    """
+    JSON text for `value` in pieces. Generators are written as arrays item
+    by item and callables are called when their turn comes, so they can
+    depend on generators written before them; both may appear at any depth
+    of dicts. Anything else, including generator items, is encoded whole.
+    """
+    encoder = encoder or JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    if callable(value):
+        yield from iter_json(value(), encoder)
+    elif isinstance(value, dict):
+        yield '{'
+        for position, (key, item) in enumerate(value.items()):
+            if position:
+                yield ','
+            yield encoder.encode(str(key))
+            yield ':'
+            yield from iter_json(item, encoder)
+        yield '}'
+    elif isinstance(value, types.GeneratorType):
+        yield '['
+        for position, item in enumerate(value):
+            if position:
+                yield ','
+            yield encoder.encode(item)
+        yield ']'
+    else:
+        yield encoder.encode(value)
+
+
+def _buffered(pieces):
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= BUFFER_SIZE:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    JSON response written while it is produced (see iter_json). Errors
+    after the first byte cannot change the status code and end the body
+    early, so validate before returning one.
+    """
+
+    def __init__(self, data, status=200, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(_buffered(iter_json(data)), status=status, **kwargs)
@@ -1,3 +1,37 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from core.streaming import StreamingJSONResponse, iter_json
+
+
+class StreamingJSONTests(SimpleTestCase):
+    def test_generators_and_callables_are_written_in_order(self):
+        seen = []
+
+        def rows():
+            for i in range(3):
+                seen.append(i)
+                yield {'id': i, 'name': f'Row {i}'}
+
+        payload = {
+            'rows': rows(),
+            'empty': (row for row in []),
+            # Evaluated after the rows above have been written
+            'count': lambda: len(seen),
+            'nested': {'flag': True, 'values': [1, None, 'ü']},
+        }
+        self.assertEqual(json.loads(''.join(iter_json(payload))), {
+            'rows': [{'id': i, 'name': f'Row {i}'} for i in range(3)],
+            'empty': [],
+            'count': 3,
+            'nested': {'flag': True, 'values': [1, None, 'ü']},
+        })
+
+    def test_response_streams_bytes(self):
+        response = StreamingJSONResponse(({'id': i} for i in range(5000)))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads(b''.join(chunks)), [{'id': i} for i in range(5000)])
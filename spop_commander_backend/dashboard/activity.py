@@ -0,0 +1,105 @@
+# dashboard/activity.py
+
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import Activity
+
+logger = logging.getLogger(__name__)
+
+
+class ActivitySink:
+    """
+    Collects Activity rows and writes them with a single bulk_create.
+
+    Records are only collected once the surrounding transaction commits,
+    so rolled back changes leave no activity behind. Inside ``batch()``
+    (opened for every request by ActivityBatchMiddleware, and usable
+    around bulk operations) committed records are buffered and written
+    together when the batch closes; outside a batch each record is written
+    on commit. With DASHBOARD_ACTIVITY_ASYNC enabled the writes happen on
+    a background thread so activity logging never adds request latency.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._queue = None
+
+    def record(self, **fields):
+        activity = Activity(**fields)
+        transaction.on_commit(lambda: self._collect(activity))
+
+    @contextmanager
+    def batch(self):
+        if getattr(self._local, 'buffer', None) is not None:
+            # Nested batches join the outermost one
+            yield
+            return
+
+        self._local.buffer = []
+        try:
+            yield
+        finally:
+            activities, self._local.buffer = self._local.buffer, None
+            # Everything buffered has already committed
+            if activities:
+                self._write(activities)
+
+    def _collect(self, activity):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            buffer.append(activity)
+        else:
+            self._write([activity])
+
+    def _write(self, activities):
+        if settings.DASHBOARD_ACTIVITY_ASYNC:
+            self._writer_queue().put(activities)
+        else:
+            Activity.objects.bulk_create(activities, batch_size=500)
+
+    def _writer_queue(self):
+        with self._lock:
+            if self._queue is None:
+                self._queue = queue.Queue()
+                threading.Thread(
+                    target=self._run_writer,
+                    name='activity-writer',
+                    daemon=True
+                ).start()
+        return self._queue
+
+    def _run_writer(self):
+        while True:
+            activities = self._queue.get()
+            # Coalesce whatever else is already waiting into the same insert
+            pending = 1
+            while True:
+                try:
+                    activities = activities + self._queue.get_nowait()
+                    pending += 1
+                except queue.Empty:
+                    break
+
+            try:
+                Activity.objects.bulk_create(activities, batch_size=500)
+            except Exception:
+                logger.exception('Failed to write %d activities', len(activities))
+            finally:
+                close_old_connections()
+                for _ in range(pending):
+                    self._queue.task_done()
+
+    def flush(self):
+        """Block until the background writer has written everything queued"""
+        if self._queue is not None:
+            self._queue.join()
+
+
+activity_sink = ActivitySink()
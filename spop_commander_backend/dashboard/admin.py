@@ -3,6 +3,7 @@
 from django.contrib import admin
 from .models import (
     DashboardMetric,
+    MetricRollup,
     PerformanceSnapshot,
     Activity,
     DashboardCache,
@@ -15,6 +16,11 @@ class DashboardMetricAdmin(admin.ModelAdmin):
     list_filter = ('metric_type', 'category', 'timestamp')
     search_fields = ('metric_type', 'metric_label')
 
+@admin.register(MetricRollup)
+class MetricRollupAdmin(admin.ModelAdmin):
+    list_display = ('metric_type', 'category', 'resolution', 'bucket', 'count')
+    list_filter = ('resolution', 'metric_type', 'category')
+
 @admin.register(PerformanceSnapshot)
 class PerformanceSnapshotAdmin(admin.ModelAdmin):
     list_display = ('date', 'completion_rate', 'total_tasks', 'total_officers')
@@ -27,6 +33,8 @@ class ActivityAdmin(admin.ModelAdmin):
     list_filter = ('activity_type', 'timestamp')
     search_fields = ('title', 'description')
     raw_id_fields = ('actor', 'related_officer')
+    # Skip the unfiltered COUNT(*) on every changelist page
+    show_full_result_count = False
 
 @admin.register(DashboardCache)
 class DashboardCacheAdmin(admin.ModelAdmin):
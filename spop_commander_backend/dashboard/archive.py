@@ -0,0 +1,145 @@
+# dashboard/archive.py
+
+import gzip
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Activity
+
+ARCHIVE_FIELDS = (
+    'id', 'activity_type', 'title', 'description', 'actor_id',
+    'related_officer_id', 'status', 'timestamp', 'metadata',
+)
+MANIFEST_NAME = 'index.json'
+DEFAULT_BATCH_SIZE = 5000
+
+
+def archive_dir():
+    return settings.DASHBOARD_ACTIVITY_ARCHIVE_DIR
+
+
+def load_manifest():
+    """Archived files with their id and timestamp bounds, oldest first"""
+    path = os.path.join(archive_dir(), MANIFEST_NAME)
+    if not os.path.exists(path):
+        return []
+    with open(path) as manifest:
+        return json.load(manifest)
+
+
+def _save_manifest(entries):
+    path = os.path.join(archive_dir(), MANIFEST_NAME)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as manifest:
+        json.dump(sorted(entries, key=lambda entry: entry['first_id']), manifest, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _write_file(name, rows):
+    path = os.path.join(archive_dir(), name)
+    tmp_path = f'{path}.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as archive:
+        for row in rows:
+            archive.write(json.dumps(row, cls=DjangoJSONEncoder))
+            archive.write('\n')
+    os.replace(tmp_path, path)
+
+
+def _read_file(name):
+    with gzip.open(os.path.join(archive_dir(), name), 'rt', encoding='utf-8') as archive:
+        for line in archive:
+            yield json.loads(line)
+
+
+def _archived_ids(manifest, first_id, last_id):
+    """Ids in the archived files whose id range overlaps first_id..last_id"""
+    ids = set()
+    for entry in manifest.values():
+        if entry['first_id'] <= last_id and entry['last_id'] >= first_id:
+            ids.update(row['id'] for row in _read_file(entry['file']))
+    return ids
+
+
+def archive_activities(days=None, batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """
+    Move Activity rows older than `days` (DASHBOARD_ACTIVITY_RETENTION_DAYS
+    by default) into gzipped JSON Lines files, one per batch of consecutive
+    ids. Each file is written and listed in the manifest before its rows
+    are deleted. Rows that a previous, interrupted run already archived
+    are deleted without being written again, so a run can simply be
+    repeated. Returns the number of rows moved out of the table.
+    """
+    if days is None:
+        days = settings.DASHBOARD_ACTIVITY_RETENTION_DAYS
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    expired = Activity.objects.filter(timestamp__lt=cutoff).order_by('id')
+
+    os.makedirs(archive_dir(), exist_ok=True)
+    manifest = {entry['file']: entry for entry in load_manifest()}
+    archived = 0
+
+    while True:
+        rows = list(expired.values(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            break
+
+        already_archived = _archived_ids(manifest, rows[0]['id'], rows[-1]['id'])
+        ids = [row['id'] for row in rows]
+        rows = [row for row in rows if row['id'] not in already_archived]
+
+        if rows:
+            first_id, last_id = rows[0]['id'], rows[-1]['id']
+            name = f'activities-{first_id:012d}-{last_id:012d}.jsonl.gz'
+            _write_file(name, rows)
+
+            timestamps = [row['timestamp'] for row in rows]
+            manifest[name] = {
+                'file': name,
+                'first_id': first_id,
+                'last_id': last_id,
+                'start': min(timestamps).isoformat(),
+                'end': max(timestamps).isoformat(),
+                'count': len(rows),
+            }
+            _save_manifest(manifest.values())
+
+        with transaction.atomic():
+            Activity.objects.filter(id__in=ids).delete()
+        archived += len(ids)
+
+    return archived
+
+
+def read_archive(start=None, end=None, activity_type=None, related_officer=None, after_id=None):
+    """
+    Lazily yield archived activities (as dicts, in id order) matching the
+    filters. Files whose time or id range cannot match are never opened.
+    """
+    for entry in load_manifest():
+        if after_id is not None and entry['last_id'] <= after_id:
+            continue
+        if start and parse_datetime(entry['end']) < start:
+            continue
+        if end and parse_datetime(entry['start']) >= end:
+            continue
+
+        for row in _read_file(entry['file']):
+            timestamp = parse_datetime(row['timestamp'])
+            if after_id is not None and row['id'] <= after_id:
+                continue
+            if start and timestamp < start:
+                continue
+            if end and timestamp >= end:
+                continue
+            if activity_type and row['activity_type'] != activity_type:
+                continue
+            if related_officer is not None and row['related_officer_id'] != related_officer:
+                continue
+            yield row
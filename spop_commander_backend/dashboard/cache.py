@@ -0,0 +1,88 @@
+# dashboard/cache.py
+
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import DashboardCache
+
+
+class SummaryCache:
+    """
+    Read-through cache for the sections of the dashboard summary.
+
+    Lookups go to the configured Django cache backend first, then to the
+    DashboardCache table, and the section is only recomputed when both
+    miss. Each section is stored with the time it was computed, so
+    callers can report how fresh the data is. Expired DashboardCache rows
+    are evicted whenever a section is recomputed.
+    """
+    SECTIONS = ('officers', 'tasks', 'orders', 'activities', 'performance')
+    key_prefix = 'dashboard:summary:'
+
+    @property
+    def cache(self):
+        return caches[settings.DASHBOARD_CACHE_ALIAS]
+
+    @property
+    def ttl(self):
+        return settings.DASHBOARD_CACHE_TTL
+
+    def key(self, section):
+        if section not in self.SECTIONS:
+            raise ValueError(f'Unknown dashboard section: {section}')
+        return f'{self.key_prefix}{section}'
+
+    def get_or_compute(self, section, compute):
+        data, _ = self.get_with_timestamp(section, compute)
+        return data
+
+    def get_with_timestamp(self, section, compute):
+        """(data, when it was computed) for `section`"""
+        key = self.key(section)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        now = timezone.now()
+        row = DashboardCache.objects.filter(
+            cache_key=key,
+            expires_at__gt=now
+        ).values_list('cache_data', 'updated_at', 'expires_at').first()
+        if row is not None:
+            data, computed_at, expires_at = row
+            self.cache.set(key, (data, computed_at), timeout=(expires_at - now).total_seconds())
+            return data, computed_at
+
+        # Store exactly what the API renders so hits and misses look the same
+        data = json.loads(json.dumps(compute(), cls=JSONEncoder))
+        row, _ = DashboardCache.objects.update_or_create(
+            cache_key=key,
+            defaults={
+                'cache_data': data,
+                'expires_at': now + timedelta(seconds=self.ttl),
+            }
+        )
+        self.evict_expired(now)
+        self.cache.set(key, (data, row.updated_at), timeout=self.ttl)
+        return data, row.updated_at
+
+    def invalidate(self, *sections):
+        """Drop the given sections (all sections when none are given)"""
+        keys = [self.key(section) for section in sections or self.SECTIONS]
+        self.cache.delete_many(keys)
+        DashboardCache.objects.filter(cache_key__in=keys).delete()
+
+    def evict_expired(self, now=None):
+        """Delete expired DashboardCache rows, returning how many were removed"""
+        deleted, _ = DashboardCache.objects.filter(
+            expires_at__lte=now or timezone.now()
+        ).delete()
+        return deleted
+
+
+summary_cache = SummaryCache()
@@ -6,9 +6,7 @@ from rest_framework.request.Request import user
 from rest_framework.response import Response
 
 from authentication.serializers import UserDetailSerializer
-from officers.models import Officer
-from order.models import Order
-from tasks.models import Task
+from .stats import get_dashboard_stats
 
 
 class DashboardConsumer(AsyncWebsocketConsumer):
@@ -120,11 +118,12 @@ class DashboardConsumer(AsyncWebsocketConsumer):
         """
         Get current dashboard statistics
         """
+        stats = get_dashboard_stats()
         return {
-            'total_officers': Officer.objects.count(),
-            'active_officers': Officer.objects.filter(status='active').count(),
-            'pending_tasks': Task.objects.filter(status='pending').count(),
-            'urgent_orders': Order.objects.filter(priority='urgent').count(),
+            'total_officers': stats['officers']['total_officers'],
+            'active_officers': stats['officers']['by_status'].get('active', 0),
+            'pending_tasks': stats['tasks']['pending_tasks'],
+            'urgent_orders': stats['orders']['urgent_orders'],
         }
 
     async def handle_stats_request(self, data):
@@ -0,0 +1,150 @@
+# dashboard/counters.py
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+from django.utils.module_loading import import_string
+
+from officers.models import Officer
+from tasks.models import Task
+from order.models import Order
+
+
+def status_histogram(queryset):
+    """Count rows per status with a single GROUP BY query"""
+    return dict(
+        queryset.order_by().values_list('status').annotate(count=Count('id'))
+    )
+
+
+# Backends shared by every process, with an atomic incr
+SHARED_ATOMIC_BACKENDS = (
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django_redis.cache.RedisCache',
+)
+
+
+def counters_enabled():
+    """
+    True if the dashboard cache can hold the counters: a backend in
+    SHARED_ATOMIC_BACKENDS, or any backend when
+    DASHBOARD_COUNTERS_ALLOW_LOCAL_CACHE is set (single process setups)
+    """
+    if settings.DASHBOARD_COUNTERS_ALLOW_LOCAL_CACHE:
+        return True
+    backend = type(caches[settings.DASHBOARD_CACHE_ALIAS])
+    return any(
+        issubclass(backend, shared)
+        for shared in _importable(SHARED_ATOMIC_BACKENDS)
+    )
+
+
+def _importable(paths):
+    for path in paths:
+        try:
+            yield import_string(path)
+        except ImportError:
+            # Client library not installed
+            continue
+
+
+class StatusCounters:
+    """
+    Per-status row counts for a model, kept in the dashboard cache and
+    adjusted incrementally by the save/delete signals in dashboard.signals.
+
+    Counters are seeded from one GROUP BY query the first time they are
+    read (or after a counter goes missing), and reconcile() repairs any
+    drift against the table. The counts must be shared by every worker
+    and the reconcile command, so with a process-local or non-atomic
+    cache backend (see counters_enabled) the counters are not kept and
+    every read is a GROUP BY query.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.statuses = [choice[0] for choice in model.STATUS_CHOICES]
+        self.key_prefix = f'dashboard:counter:{model._meta.label_lower}:'
+        self.seeded_key = f'{self.key_prefix}__seeded__'
+
+    @property
+    def cache(self):
+        return caches[settings.DASHBOARD_CACHE_ALIAS]
+
+    def key(self, status):
+        return f'{self.key_prefix}{status}'
+
+    def histogram(self):
+        """Current count per status, seeding the counters if needed"""
+        if not counters_enabled():
+            histogram = status_histogram(self.model.objects.all())
+            return {status: histogram.get(status, 0) for status in self.statuses}
+        counts = self.peek()
+        if counts is None:
+            counts = self.rebuild()
+        return counts
+
+    def peek(self):
+        """Cached counts, or None if the counters are not seeded"""
+        if not counters_enabled():
+            return None
+        keys = [self.key(status) for status in self.statuses]
+        values = self.cache.get_many([self.seeded_key] + keys)
+        if self.seeded_key not in values:
+            return None
+        return {
+            status: values.get(self.key(status), 0)
+            for status in self.statuses
+        }
+
+    def rebuild(self):
+        """Seed every counter from the table"""
+        histogram = status_histogram(self.model.objects.all())
+        counts = {status: histogram.get(status, 0) for status in self.statuses}
+        values = {self.key(status): count for status, count in counts.items()}
+        values[self.seeded_key] = True
+        self.cache.set_many(values, timeout=None)
+        return counts
+
+    def reset(self):
+        """Forget the counters; the next read seeds them again"""
+        if not counters_enabled():
+            return
+        self.cache.delete(self.seeded_key)
+
+    def apply(self, old_status, new_status):
+        """Move one row from old_status to new_status (None for create/delete)"""
+        if old_status == new_status or not counters_enabled():
+            return
+        for status, delta in ((old_status, -1), (new_status, 1)):
+            if status is None:
+                continue
+            try:
+                self.cache.incr(self.key(status), delta)
+            except ValueError:
+                # Counter missing (never seeded or evicted)
+                self.reset()
+                return
+
+    def reconcile(self):
+        """Compare counters with the table, fix them and return the drift per status"""
+        if not counters_enabled():
+            return {}
+        cached = self.peek()
+        actual = self.rebuild()
+        if cached is None:
+            return {}
+        return {
+            status: actual[status] - cached[status]
+            for status in self.statuses
+            if actual[status] != cached[status]
+        }
+
+
+status_counters = {
+    Officer: StatusCounters(Officer),
+    Task: StatusCounters(Task),
+    Order: StatusCounters(Order),
+}
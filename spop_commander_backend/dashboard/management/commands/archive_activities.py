@@ -0,0 +1,25 @@
+# dashboard/management/commands/archive_activities.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dashboard.archive import DEFAULT_BATCH_SIZE, archive_activities, archive_dir
+
+
+class Command(BaseCommand):
+    help = (
+        'Move Activity rows past DASHBOARD_ACTIVITY_RETENTION_DAYS into '
+        'gzipped JSON Lines archive files. Run daily to keep the table bounded.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.DASHBOARD_ACTIVITY_RETENTION_DAYS,
+                            help='Archive activities older than this many days')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows per archive file')
+
+    def handle(self, *args, **options):
+        archived = archive_activities(days=options['days'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} activit{"y" if archived == 1 else "ies"} to {archive_dir()}'
+        ))
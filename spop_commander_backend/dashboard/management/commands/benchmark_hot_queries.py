@@ -0,0 +1,163 @@
+# dashboard/management/commands/benchmark_hot_queries.py
+
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from officers.models import Officer
+from order.models import OPEN_STATUSES as OPEN_ORDER_STATUSES, Order
+from tasks.models import OPEN_STATUSES as OPEN_TASK_STATUSES, Task
+
+TASK_STATUSES = ['pending', 'in_progress', 'completed', 'cancelled']
+STATUS_WEIGHTS = [15, 15, 60, 10]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Show the query plan and timing of the Task and Order hot queries '
+        'without and with the models\' Meta.indexes, on generated rows. '
+        'Everything runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000,
+                            help='Tasks and orders to generate (each)')
+        parser.add_argument('--officers', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Runs per query; the fastest is reported')
+
+    def handle(self, *args, **options):
+        if not connection.features.can_rollback_ddl:
+            raise CommandError('The indexes are dropped and restored in a transaction, '
+                               'which this database backend cannot roll back')
+
+        try:
+            with transaction.atomic():
+                officer = self._populate(options['rows'], options['officers'])
+                queries = self._hot_queries(officer)
+                # Used outside a `with` block: SQLite refuses to enter one
+                # inside a transaction, and index DDL needs no table rebuild
+                editor = connection.schema_editor()
+
+                for model in (Task, Order):
+                    for index in model._meta.indexes:
+                        editor.remove_index(model, index)
+                before = self._measure(queries, options['repeat'])
+
+                for model in (Task, Order):
+                    for index in model._meta.indexes:
+                        editor.add_index(model, index)
+                after = self._measure(queries, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        for name in queries:
+            (before_ms, before_plan), (after_ms, after_plan) = before[name], after[name]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{name}: {before_ms:.2f} ms -> {after_ms:.2f} ms'
+            ))
+            self.stdout.write('  before:')
+            self.stdout.write(self._indent(before_plan))
+            self.stdout.write('  after:')
+            self.stdout.write(self._indent(after_plan))
+
+    def _populate(self, rows, officers):
+        rng = random.Random(0)
+        now = timezone.now()
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(username=f'hot-query-benchmark-{i}')
+            for i in range(officers + 1)
+        )
+        commander, officer_users = users[0], users[1:]
+        officers = Officer.objects.bulk_create(
+            Officer(user=user, name=f'Officer {i}', rank='Lieutenant', phone_number='0000000000')
+            for i, user in enumerate(officer_users)
+        )
+
+        tasks, orders = [], []
+        for i in range(rows):
+            status = rng.choices(TASK_STATUSES, STATUS_WEIGHTS)[0]
+            due_date = now + timedelta(hours=rng.randint(-24 * 30, 24 * 30))
+            tasks.append(Task(
+                title=f'Task {i}',
+                description='',
+                assigned_to=rng.choice(officers),
+                created_by=commander,
+                priority=rng.choice(['low', 'medium', 'high', 'urgent']),
+                status=status,
+                start_date=due_date - timedelta(days=1),
+                due_date=due_date,
+                completion_date=due_date if status == 'completed' else None,
+            ))
+            orders.append(Order(
+                title=f'Order {i}',
+                description='',
+                created_by=commander,
+                assigned_to=rng.choice(officers),
+                priority=rng.choices(['normal', 'high', 'urgent'], [80, 15, 5])[0],
+                status=rng.choices(TASK_STATUSES, STATUS_WEIGHTS)[0],
+                due_date=due_date,
+                is_urgent=rng.random() < 0.05,
+            ))
+        Task.objects.bulk_create(tasks, batch_size=1000)
+        Order.objects.bulk_create(orders, batch_size=1000)
+        return officers[0]
+
+    def _hot_queries(self, officer):
+        now = timezone.now()
+        month_ago = now - timedelta(days=30)
+        return {
+            'tasks: open tasks of an officer': Task.objects.filter(
+                assigned_to=officer, status__in=OPEN_TASK_STATUSES
+            ),
+            'tasks: overdue': Task.objects.filter(
+                status__in=OPEN_TASK_STATUSES, due_date__lt=now
+            ),
+            'tasks: completed in the last 30 days': Task.objects.filter(
+                completion_date__gte=month_ago
+            ),
+            'tasks: available, first page': Task.objects.filter(
+                status='pending'
+            ).order_by('-created_at', '-id')[:20],
+            'tasks: sync pull page': Task.objects.filter(
+                updated_at__gt=month_ago
+            ).order_by('updated_at', 'id')[:200],
+            'orders: urgent, first page': Order.objects.filter(is_urgent=True)[:20],
+            'orders: by priority': Order.objects.filter(priority='urgent')[:20],
+            'orders: open orders of an officer': Order.objects.filter(
+                assigned_to=officer, status__in=OPEN_ORDER_STATUSES
+            ),
+            'orders: open by due date': Order.objects.filter(
+                status__in=OPEN_ORDER_STATUSES, due_date__lt=now
+            ).order_by('due_date')[:20],
+        }
+
+    def _measure(self, queries, repeat):
+        """{name: (fastest run in ms, plan)} with the current indexes"""
+        with connection.cursor() as cursor:
+            # Fresh planner statistics for the current set of indexes
+            cursor.execute('ANALYZE')
+
+        results = {}
+        for name, queryset in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = (min(timings), queryset.explain())
+        return results
+
+    @staticmethod
+    def _indent(plan):
+        return '\n'.join(f'    {line}' for line in plan.splitlines())
@@ -0,0 +1,41 @@
+# dashboard/management/commands/build_performance_snapshots.py
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from dashboard.snapshots import DEFAULT_BACKFILL_DAYS, build_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        'Build daily PerformanceSnapshot rows, computing only missing or '
+        'changed days. Meant to be scheduled (e.g. hourly cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=DEFAULT_BACKFILL_DAYS,
+                            help='Number of days to cover, ending today')
+        parser.add_argument('--start', help='First day to cover (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last day to cover (YYYY-MM-DD)')
+        parser.add_argument('--full', action='store_true',
+                            help='Rebuild every day in the range')
+
+    def handle(self, *args, **options):
+        try:
+            end = date.fromisoformat(options['end']) if options['end'] else timezone.localdate()
+            start = (
+                date.fromisoformat(options['start']) if options['start']
+                else end - timedelta(days=options['days'] - 1)
+            )
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+
+        if start > end:
+            raise CommandError('--start must not be after --end')
+
+        days = build_snapshots(start, end, full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Built {len(days)} snapshot(s) between {start} and {end}'
+        ))
@@ -9,6 +9,7 @@ from faker import Faker
 from officers.models import Officer
 from tasks.models import Task
 from order.models import Order
+from dashboard.activity import activity_sink
 from dashboard.models import (
     DashboardMetric,
     PerformanceSnapshot,
@@ -36,9 +37,10 @@ class Command(BaseCommand):
         # Create officers
         officers = self.create_officers()
 
-        # Create tasks and orders
-        self.create_tasks(officers)
-        self.create_orders(officers)
+        # Create tasks and orders, batching their Activity rows
+        with activity_sink.batch():
+            self.create_tasks(officers)
+            self.create_orders(officers)
 
         # Generate dashboard data
         self.generate_dashboard_data()
@@ -0,0 +1,33 @@
+# dashboard/management/commands/reconcile_dashboard_counters.py
+
+from django.core.management.base import BaseCommand
+
+from dashboard.counters import counters_enabled, status_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount officer, task and order statuses and repair drift in the '
+        'incremental dashboard counters. Meant to be scheduled (e.g. cron).'
+    )
+
+    def handle(self, *args, **kwargs):
+        if not counters_enabled():
+            self.stdout.write(
+                'The dashboard cache is not shared between processes, so no '
+                'counters are kept; statuses are counted on every read'
+            )
+            return
+
+        drifted = False
+        for model, counters in status_counters.items():
+            drift = counters.reconcile()
+            label = model._meta.label
+            if drift:
+                drifted = True
+                self.stdout.write(self.style.WARNING(f'{label}: fixed drift {drift}'))
+            else:
+                self.stdout.write(f'{label}: counters in sync')
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('No counter drift detected'))
@@ -0,0 +1,28 @@
+# dashboard/management/commands/rollup_dashboard_metrics.py
+
+from django.core.management.base import BaseCommand
+
+from dashboard.metrics import TIERS, prune, rollup
+
+
+class Command(BaseCommand):
+    help = (
+        'Roll DashboardMetric up into minute, hour and day tiers and apply '
+        'per-tier retention. Run every minute; buffered points are written '
+        'by the processes that recorded them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-prune', action='store_true',
+                            help='Skip deleting data past its retention')
+
+    def handle(self, *args, **options):
+        for resolution, _, _ in TIERS:
+            written = rollup(resolution)
+            self.stdout.write(f'{resolution}: {written} bucket(s) written')
+
+        if not options['no_prune']:
+            for tier, deleted in prune().items():
+                self.stdout.write(f'{tier}: {deleted} row(s) past retention deleted')
+
+        self.stdout.write(self.style.SUCCESS('Metric rollup complete'))
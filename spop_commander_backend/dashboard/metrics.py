@@ -0,0 +1,254 @@
+# dashboard/metrics.py
+
+import atexit
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute
+from django.utils import timezone
+
+from .models import DashboardMetric, MetricRollup
+
+# Rollup tiers from finest to coarsest: (resolution, bucket size, truncation)
+TIERS = [
+    ('minute', timedelta(minutes=1), TruncMinute),
+    ('hour', timedelta(hours=1), TruncHour),
+    ('day', timedelta(days=1), TruncDay),
+]
+DEFAULT_MAX_POINTS = 500
+# Changes are looked for this far before the tier's last rollup write, to
+# cover points that committed while that rollup was running
+ROLLUP_OVERLAP = timedelta(minutes=5)
+
+logger = logging.getLogger(__name__)
+
+
+class MetricBuffer:
+    """
+    Collects metric points in memory and writes them to DashboardMetric
+    with one bulk_create once `max_size` points are buffered or
+    `flush_interval` seconds have passed since the first unwritten point,
+    whichever comes first. The time limit is kept by a timer thread, so
+    points are written even if nothing else is recorded.
+    """
+
+    def __init__(self, max_size=500, flush_interval=5.0):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._points = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def record(self, metric_type, value, label='', category='', timestamp=None):
+        point = DashboardMetric(
+            metric_type=metric_type,
+            metric_value=value,
+            metric_label=label,
+            category=category,
+            timestamp=timestamp or timezone.now(),
+        )
+        with self._lock:
+            self._points.append(point)
+            due = len(self._points) >= self.max_size
+            if not due and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered points, returning how many were written"""
+        with self._lock:
+            points, self._points = self._points, []
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        if points:
+            DashboardMetric.objects.bulk_create(points, batch_size=self.max_size)
+        return len(points)
+
+    def _timed_flush(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Failed to flush buffered metric points')
+        finally:
+            close_old_connections()
+
+    def __len__(self):
+        return len(self._points)
+
+
+metric_buffer = MetricBuffer()
+atexit.register(metric_buffer.flush)
+
+
+def record_metric(metric_type, value, label='', category='', timestamp=None):
+    """Buffer a metric point; it is written on the next flush"""
+    metric_buffer.record(metric_type, value, label, category, timestamp)
+
+
+def retention(tier):
+    """How long a tier ('raw', 'minute', 'hour', 'day') is kept, or None for forever"""
+    days = settings.DASHBOARD_METRIC_RETENTION_DAYS.get(tier)
+    return timedelta(days=days) if days is not None else None
+
+
+def rollup(resolution, since=None, until=None):
+    """
+    Aggregate the next finer tier (raw points for 'minute') into
+    `resolution` buckets with one GROUP BY query and upsert them.
+
+    With `since`, every bucket from `since` on is recomputed. Otherwise
+    only the buckets whose source rows were written or updated since the
+    tier's last rollup (less ROLLUP_OVERLAP) are, so late and back-dated
+    points are rolled up too. Buckets whose source has partly passed its
+    retention are left alone rather than recomputed from what is left.
+    Returns the number of buckets written.
+    """
+    index = [tier[0] for tier in TIERS].index(resolution)
+    trunc = TIERS[index][2]
+    now = timezone.now()
+    until = until or now
+
+    if index == 0:
+        source = DashboardMetric.objects.filter(timestamp__lt=until)
+        time_field, changed_field = 'timestamp', 'recorded_at'
+        source_retention = retention('raw')
+    else:
+        source = MetricRollup.objects.filter(
+            resolution=TIERS[index - 1][0],
+            bucket__lt=until
+        )
+        time_field, changed_field = 'bucket', 'updated_at'
+        source_retention = retention(TIERS[index - 1][0])
+    source = source.annotate(period=trunc(time_field))
+
+    if since is not None:
+        source = source.filter(**{f'{time_field}__gte': since})
+    else:
+        last_rollup = MetricRollup.objects.filter(
+            resolution=resolution
+        ).aggregate(latest=Max('updated_at'))['latest']
+        if last_rollup is not None:
+            touched = source.filter(
+                **{f'{changed_field}__gte': last_rollup - ROLLUP_OVERLAP}
+            ).values('period')
+            source = source.filter(period__in=touched)
+            if source_retention is not None:
+                source = source.filter(period__gte=now - source_retention)
+
+    if index == 0:
+        rows = source.values(
+            'metric_type', 'category', 'period'
+        ).annotate(
+            sum_count=Count('id'),
+            sum_total=Sum('metric_value'),
+            min_of_min=Min('metric_value'),
+            max_of_max=Max('metric_value'),
+        )
+    else:
+        rows = source.values(
+            'metric_type', 'category', 'period'
+        ).annotate(
+            sum_count=Sum('count'),
+            sum_total=Sum('total'),
+            min_of_min=Min('min_value'),
+            max_of_max=Max('max_value'),
+        )
+
+    rollups = [
+        MetricRollup(
+            resolution=resolution,
+            metric_type=row['metric_type'],
+            category=row['category'],
+            bucket=row['period'],
+            count=row['sum_count'],
+            total=row['sum_total'],
+            min_value=row['min_of_min'],
+            max_value=row['max_of_max'],
+        )
+        for row in rows.order_by()
+    ]
+    if rollups:
+        MetricRollup.objects.bulk_create(
+            rollups,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['resolution', 'metric_type', 'category', 'bucket'],
+            update_fields=['count', 'total', 'min_value', 'max_value', 'updated_at'],
+        )
+    return len(rollups)
+
+
+def prune(now=None):
+    """Delete raw points and rollups older than their tier's retention"""
+    now = now or timezone.now()
+    deleted = {}
+
+    raw_retention = retention('raw')
+    if raw_retention is not None:
+        deleted['raw'], _ = DashboardMetric.objects.filter(
+            timestamp__lt=now - raw_retention
+        ).delete()
+
+    for resolution, _, _ in TIERS:
+        tier_retention = retention(resolution)
+        if tier_retention is not None:
+            deleted[resolution], _ = MetricRollup.objects.filter(
+                resolution=resolution,
+                bucket__lt=now - tier_retention
+            ).delete()
+
+    return deleted
+
+
+def choose_resolution(start, end, max_points=DEFAULT_MAX_POINTS, now=None):
+    """
+    Finest tier that still holds data back to `start` and returns at most
+    `max_points` buckets for the range; falls back to the coarsest tier.
+    """
+    now = now or timezone.now()
+    for resolution, size, _ in TIERS:
+        tier_retention = retention(resolution)
+        covers = tier_retention is None or start >= now - tier_retention
+        if covers and (end - start) / size <= max_points:
+            return resolution
+    return TIERS[-1][0]
+
+
+def query_metric(metric_type, start, end, category=None, max_points=DEFAULT_MAX_POINTS):
+    """Time series for a metric between start and end from the best rollup tier"""
+    resolution = choose_resolution(start, end, max_points)
+    queryset = MetricRollup.objects.filter(
+        resolution=resolution,
+        metric_type=metric_type,
+        bucket__gte=start,
+        bucket__lt=end,
+    )
+    if category:
+        queryset = queryset.filter(category=category)
+
+    # Merge categories into one point per bucket
+    rows = queryset.values('bucket').annotate(
+        sum_count=Sum('count'),
+        sum_total=Sum('total'),
+        min_of_min=Min('min_value'),
+        max_of_max=Max('max_value'),
+    ).order_by('bucket')
+
+    return resolution, [
+        {
+            'bucket': row['bucket'],
+            'count': row['sum_count'],
+            'avg': row['sum_total'] / row['sum_count'] if row['sum_count'] else None,
+            'min': row['min_of_min'],
+            'max': row['max_of_max'],
+        }
+        for row in rows
+    ]
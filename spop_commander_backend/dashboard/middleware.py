@@ -0,0 +1,18 @@
+# dashboard/middleware.py
+
+from .activity import activity_sink
+from .snapshots import stale_day_log
+
+
+class ActivityBatchMiddleware:
+    """
+    Write all Activity rows (and stale snapshot days) recorded during a
+    request with one bulk insert each
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with activity_sink.batch(), stale_day_log.batch():
+            return self.get_response(request)
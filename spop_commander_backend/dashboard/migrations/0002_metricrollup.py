@@ -0,0 +1,52 @@
+# Generated by Django 5.1.1 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MetricRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("metric_type", models.CharField(max_length=50)),
+                ("category", models.CharField(max_length=50)),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[("minute", "Minute"), ("hour", "Hour"), ("day", "Day")],
+                        max_length=10,
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("count", models.IntegerField(default=0)),
+                ("total", models.FloatField(default=0.0)),
+                ("min_value", models.FloatField()),
+                ("max_value", models.FloatField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["bucket"],
+                "indexes": [
+                    models.Index(
+                        fields=["resolution", "metric_type", "bucket"],
+                        name="dashboard_m_resolut_592a8c_idx",
+                    )
+                ],
+                "unique_together": {("resolution", "metric_type", "category", "bucket")},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.1 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard", "0002_metricrollup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="activity",
+            index=models.Index(
+                fields=["timestamp", "id"], name="dashboard_a_timesta_c2d1d9_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="activity",
+            index=models.Index(
+                fields=["related_officer", "timestamp"],
+                name="dashboard_a_related_27c1da_idx",
+            ),
+        ),
+    ]
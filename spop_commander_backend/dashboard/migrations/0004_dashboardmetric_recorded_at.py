@@ -0,0 +1,22 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard", "0003_activity_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dashboardmetric",
+            name="recorded_at",
+            field=models.DateTimeField(
+                auto_now_add=True, db_index=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard", "0004_dashboardmetric_recorded_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StaleSnapshotDay",
+            fields=[
+                ("date", models.DateField(primary_key=True, serialize=False)),
+            ],
+        ),
+    ]
@@ -12,6 +12,9 @@ class DashboardMetric(models.Model):
     metric_label = models.CharField(max_length=100)
     category = models.CharField(max_length=50)
     timestamp = models.DateTimeField(default=timezone.now)
+    # When the point was written, which for ingested points can be long
+    # after `timestamp`; rollups use it to find the buckets to recompute
+    recorded_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
         indexes = [
@@ -21,6 +24,32 @@ class DashboardMetric(models.Model):
         ordering = ['-timestamp']
 
 
+class MetricRollup(models.Model):
+    """DashboardMetric points downsampled into minute, hour or day buckets"""
+    RESOLUTIONS = (
+        ('minute', 'Minute'),
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    )
+
+    metric_type = models.CharField(max_length=50)
+    category = models.CharField(max_length=50)
+    resolution = models.CharField(max_length=10, choices=RESOLUTIONS)
+    bucket = models.DateTimeField()
+    count = models.IntegerField(default=0)
+    total = models.FloatField(default=0.0)
+    min_value = models.FloatField()
+    max_value = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['resolution', 'metric_type', 'category', 'bucket']
+        indexes = [
+            models.Index(fields=['resolution', 'metric_type', 'bucket']),
+        ]
+        ordering = ['bucket']
+
+
 class PerformanceSnapshot(models.Model):
     """Daily performance metrics snapshot"""
     date = models.DateField(unique=True)
@@ -44,6 +73,14 @@ class PerformanceSnapshot(models.Model):
         ordering = ['-date']
 
 
+class StaleSnapshotDay(models.Model):
+    """
+    A day whose PerformanceSnapshot is out of date because a task counted
+    on it changed or was deleted (see dashboard.snapshots)
+    """
+    date = models.DateField(primary_key=True)
+
+
 class Activity(models.Model):
     """Track all dashboard activities"""
     ACTIVITY_TYPES = (
@@ -77,6 +114,9 @@ class Activity(models.Model):
         indexes = [
             models.Index(fields=['activity_type', 'timestamp']),
             models.Index(fields=['actor', 'timestamp']),
+            # Keyset pagination of the activity feed, see core.pagination
+            models.Index(fields=['timestamp', 'id']),
+            models.Index(fields=['related_officer', 'timestamp']),
         ]
         ordering = ['-timestamp']
 
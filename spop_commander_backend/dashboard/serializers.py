@@ -2,6 +2,8 @@
 
 from rest_framework import serializers
 
+from .models import Activity, PerformanceSnapshot
+
 class OfficerStatsSerializer(serializers.Serializer):
     total_officers = serializers.IntegerField()
     available_officers = serializers.IntegerField()
@@ -40,4 +42,52 @@ class DashboardSummarySerializer(serializers.Serializer):
     orders = OrderStatsSerializer()
     recent_activities = ActivitySerializer(many=True)
     performance_metrics = PerformanceMetricsSerializer()
-    last_updated = serializers.DateTimeField()
\ No newline at end of file
+    last_updated = serializers.DateTimeField()
+
+class PerformanceSnapshotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PerformanceSnapshot
+        exclude = ['id', 'created_at']
+
+
+class MetricPointSerializer(serializers.Serializer):
+    metric_type = serializers.CharField(max_length=50)
+    value = serializers.FloatField()
+    label = serializers.CharField(max_length=100, required=False, default='')
+    category = serializers.CharField(max_length=50, required=False, default='')
+    timestamp = serializers.DateTimeField(required=False, default=None)
+
+
+class ActivityFeedSerializer(serializers.ModelSerializer):
+    actor_name = serializers.CharField(source='actor.username', read_only=True, default=None)
+    officer_name = serializers.CharField(source='related_officer.name', read_only=True, default=None)
+
+    class Meta:
+        model = Activity
+        fields = [
+            'id', 'activity_type', 'title', 'description', 'status', 'timestamp',
+            'actor', 'actor_name', 'related_officer', 'officer_name', 'metadata',
+        ]
+
+
+class ActivityFeedQuerySerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=Activity.ACTIVITY_TYPES, required=False, default=None)
+    officer = serializers.IntegerField(required=False, default=None)
+    actor = serializers.IntegerField(required=False, default=None)
+
+
+class ArchiveQuerySerializer(serializers.Serializer):
+    start = serializers.DateTimeField(required=False, default=None)
+    end = serializers.DateTimeField(required=False, default=None)
+    type = serializers.ChoiceField(choices=Activity.ACTIVITY_TYPES, required=False, default=None)
+    officer = serializers.IntegerField(required=False, default=None)
+    after = serializers.IntegerField(required=False, default=None)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, required=False, default=100)
+
+
+class MetricQuerySerializer(serializers.Serializer):
+    metric_type = serializers.CharField(max_length=50)
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField(required=False, default=None)
+    category = serializers.CharField(max_length=50, required=False, default=None)
+    max_points = serializers.IntegerField(min_value=1, max_value=5000, required=False, default=500)
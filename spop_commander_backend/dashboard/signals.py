@@ -1,66 +1,163 @@
 # dashboard/signals.py
 
-from django.db.models.signals import post_save
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import Activity, DashboardMetric, PerformanceSnapshot
+from .activity import activity_sink
+from .counters import status_counters
+from .models import DashboardMetric, PerformanceSnapshot
+from .snapshots import SNAPSHOT_TASK_FIELDS, stale_day_log, task_days
 from officers.models import Officer
 from tasks.models import Task
 from order.models import Order
 
+
+def update_status_counters(instance, created=False, deleted=False):
+    """Apply the old -> new status delta of a saved or deleted row once it commits"""
+    counters = status_counters[type(instance)]
+    loaded_values = getattr(instance, 'loaded_values', None)
+
+    if not created and loaded_values is None:
+        # Saved without a load snapshot, so the previous status is unknown
+        transaction.on_commit(counters.reset)
+        return
+
+    old_status = None if created else loaded_values.get('status', instance.status)
+    new_status = None if deleted else instance.status
+    transaction.on_commit(lambda: counters.apply(old_status, new_status))
+
+
+def describe_changes(instance):
+    """
+    JSON-safe {field: {'old': ..., 'new': ...}} of the tracked fields
+    changed by this save, or None when the instance has no load snapshot
+    """
+    if getattr(instance, 'loaded_values', None) is None:
+        return None
+    changes = {
+        name: {'old': old, 'new': new}
+        for name, (old, new) in instance.changed_fields().items()
+    }
+    # Round-trip dates, UUIDs and decimals into plain JSON values
+    return json.loads(json.dumps(changes, cls=DjangoJSONEncoder))
+
+
+def mark_snapshot_days(task, created=False, deleted=False):
+    """Mark the daily snapshots counting `task` stale if this change affects them"""
+    if (created or deleted or getattr(task, 'loaded_values', None) is None
+            or task.changed_fields(SNAPSHOT_TASK_FIELDS)):
+        stale_day_log.mark(task_days(task))
+
+
 @receiver(post_save, sender=Task)
 def track_task_updates(sender, instance, created, **kwargs):
     """Track task updates for dashboard"""
+    update_status_counters(instance, created)
+    mark_snapshot_days(instance, created)
+
+    changes = None if created else describe_changes(instance)
+    if changes == {}:
+        # Nothing the dashboard reports on was touched
+        return
+
     if created:
-        activity_type = 'task'
         title = f'New Task Created: {instance.title}'
     else:
-        activity_type = 'task'
         title = f'Task Updated: {instance.title}'
 
-    Activity.objects.create(
-        activity_type=activity_type,
+    metadata = {
+        'task_id': str(instance.id),
+        'priority': instance.priority,
+        'due_date': instance.due_date.isoformat() if instance.due_date else None
+    }
+    if changes:
+        metadata['changes'] = changes
+
+    activity_sink.record(
+        activity_type='task',
         title=title,
         description=instance.description,
         actor=instance.created_by,
         related_officer=instance.assigned_to,
         status=instance.status,
-        metadata={
-            'task_id': instance.id,
-            'priority': instance.priority,
-            'due_date': instance.due_date.isoformat() if instance.due_date else None
-        }
+        metadata=metadata
     )
 
 @receiver(post_save, sender=Officer)
 def track_officer_updates(sender, instance, created, **kwargs):
     """Track officer status changes"""
-    if not created:
-        Activity.objects.create(
-            activity_type='officer',
-            title=f'Officer Status Update: {instance.name}',
-            description=f'Status changed to {instance.status}',
-            related_officer=instance,
-            status=instance.status
+    update_status_counters(instance, created)
+
+    if created:
+        return
+
+    changes = describe_changes(instance)
+    if changes == {}:
+        # last_active is bumped on every save; only status changes count
+        return
+
+    metadata = {'officer_id': str(instance.id)}
+    if changes:
+        metadata['changes'] = changes
+        description = (
+            f"Status changed from {changes['status']['old']} to {instance.status}"
         )
+    else:
+        description = f'Status changed to {instance.status}'
+
+    activity_sink.record(
+        activity_type='officer',
+        title=f'Officer Status Update: {instance.name}',
+        description=description,
+        related_officer=instance,
+        status=instance.status,
+        metadata=metadata
+    )
 
 @receiver(post_save, sender=Order)
 def track_order_updates(sender, instance, created, **kwargs):
     """Track order updates for dashboard"""
+    update_status_counters(instance, created)
+
+    changes = None if created else describe_changes(instance)
+    if changes == {}:
+        return
+
     if created:
         title = f'New Order Created: {instance.title}'
     else:
         title = f'Order Updated: {instance.title}'
 
-    Activity.objects.create(
+    metadata = {
+        'order_id': str(instance.id),
+        'priority': instance.priority,
+    }
+    if changes:
+        metadata['changes'] = changes
+
+    activity_sink.record(
         activity_type='order',
         title=title,
         description=instance.description,
         actor=instance.created_by,
         related_officer=instance.assigned_to,
         status=instance.status,
-        metadata={
-            'order_id': instance.id,
-            'priority': instance.priority,
-        }
-    )
\ No newline at end of file
+        metadata=metadata
+    )
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Officer)
+@receiver(post_delete, sender=Order)
+def track_deletes(sender, instance, **kwargs):
+    """Keep status counters in step with deleted rows"""
+    update_status_counters(instance, deleted=True)
+
+
+@receiver(post_delete, sender=Task)
+def track_task_deletes(sender, instance, **kwargs):
+    """Deleted tasks leave the snapshots of their days out of date"""
+    mark_snapshot_days(instance, deleted=True)
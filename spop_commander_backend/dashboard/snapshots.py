@@ -0,0 +1,219 @@
+# dashboard/snapshots.py
+
+import threading
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, Q
+from django.utils import timezone
+
+from officers.models import Officer
+from tasks.models import Task
+from .counters import status_counters
+from .models import PerformanceSnapshot, StaleSnapshotDay
+
+DEFAULT_BACKFILL_DAYS = 30
+
+TASK_FIELDS = [
+    'total_tasks', 'pending_tasks', 'in_progress_tasks', 'completed_tasks',
+    'overdue_tasks', 'completion_rate', 'avg_response_time',
+]
+OFFICER_FIELDS = [
+    'total_officers', 'available_officers', 'on_mission_officers',
+    'on_leave_officers',
+]
+
+# Task fields the daily metrics read, besides created_at
+SNAPSHOT_TASK_FIELDS = ['status', 'start_date', 'due_date', 'completion_date']
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _local_date(value):
+    return timezone.localtime(value).date() if value else None
+
+
+def compute_task_metrics(day, now=None):
+    """
+    Task metrics for one day in a single aggregate query.
+
+    total/pending/in_progress count the tasks created that day (by their
+    current status), completed_tasks counts completions on that day,
+    overdue_tasks counts tasks due that day that were not completed in
+    time, and avg_response_time is in seconds.
+    """
+    now = now or timezone.now()
+    start, end = _day_bounds(day)
+    created = Q(created_at__gte=start, created_at__lt=end)
+    completed = Q(completion_date__gte=start, completion_date__lt=end)
+    due = Q(due_date__gte=start, due_date__lt=min(end, now))
+
+    metrics = Task.objects.filter(
+        created | completed | due
+    ).with_response_time().aggregate(
+        total_tasks=Count('id', filter=created),
+        pending_tasks=Count('id', filter=created & Q(status='pending')),
+        in_progress_tasks=Count('id', filter=created & Q(status='in_progress')),
+        created_completed=Count('id', filter=created & Q(status='completed')),
+        completed_tasks=Count('id', filter=completed & Q(status='completed')),
+        overdue_tasks=Count('id', filter=due & (
+            Q(status__in=['pending', 'in_progress']) |
+            Q(completion_date__gt=F('due_date'))
+        )),
+        avg_response_time=Avg('response_time', filter=created),
+    )
+
+    created_completed = metrics.pop('created_completed')
+    total = metrics['total_tasks']
+    metrics['completion_rate'] = (created_completed / total * 100) if total > 0 else 0
+    avg_response_time = metrics['avg_response_time']
+    metrics['avg_response_time'] = avg_response_time.total_seconds() if avg_response_time else 0
+    return metrics
+
+
+def compute_officer_metrics():
+    """Officer availability right now (historical officer status is not recorded)"""
+    counts = status_counters[Officer].histogram()
+    return {
+        'total_officers': sum(counts.values()),
+        'available_officers': counts['available'],
+        'on_mission_officers': counts['on_mission'],
+        'on_leave_officers': counts['on_leave'],
+    }
+
+
+def task_days(task):
+    """
+    Days whose metrics count `task`: its created, completion and due days,
+    before and after the save being handled
+    """
+    loaded_values = getattr(task, 'loaded_values', None) or {}
+    values = [
+        task.created_at, task.completion_date, task.due_date,
+        loaded_values.get('completion_date'), loaded_values.get('due_date'),
+    ]
+    return {_local_date(value) for value in values if value}
+
+
+class StaleDayLog:
+    """
+    Marks the days a task change makes stale (StaleSnapshotDay rows) once
+    the change commits, so the builder never reads the task table to find
+    them. Inside ``batch()`` (opened with the activity batch for every
+    request and around bulk writes) committed days are collected and
+    written with one insert when the batch closes.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def mark(self, days):
+        days = set(days)
+        if days:
+            transaction.on_commit(lambda: self._collect(days))
+
+    @contextmanager
+    def batch(self):
+        if getattr(self._local, 'buffer', None) is not None:
+            # Nested batches join the outermost one
+            yield
+            return
+
+        self._local.buffer = set()
+        try:
+            yield
+        finally:
+            days, self._local.buffer = self._local.buffer, None
+            if days:
+                self._write(days)
+
+    def _collect(self, days):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            buffer.update(days)
+        else:
+            self._write(days)
+
+    def _write(self, days):
+        StaleSnapshotDay.objects.bulk_create(
+            [StaleSnapshotDay(date=day) for day in days], ignore_conflicts=True
+        )
+
+
+stale_day_log = StaleDayLog()
+
+
+def stale_days(start, end, today):
+    """
+    Days in [start, end] without a snapshot, whose snapshot was built
+    before the day was over, or marked stale by a task change. Today is
+    always stale. Two queries, however many tasks changed.
+    """
+    built = dict(
+        PerformanceSnapshot.objects.filter(
+            date__range=(start, end)
+        ).values_list('date', 'updated_at')
+    )
+    days = [
+        start + timedelta(days=offset)
+        for offset in range((end - start).days + 1)
+    ]
+    stale = {
+        day for day in days
+        if day not in built or built[day] < _day_bounds(day)[1]
+    }
+    stale.update(
+        StaleSnapshotDay.objects.filter(date__range=(start, end)).values_list('date', flat=True)
+    )
+    if start <= today <= end:
+        stale.add(today)
+    return sorted(stale)
+
+
+def build_snapshots(start=None, end=None, full=False):
+    """
+    Build or refresh PerformanceSnapshot rows for [start, end] (defaults to
+    the last DEFAULT_BACKFILL_DAYS days) and return the days written.
+
+    Only missing or stale days (see stale_days) are computed unless
+    full=True; rows are written with one bulk upsert. Safe to run repeatedly from a scheduler.
+    """
+    now = timezone.now()
+    today = timezone.localdate(now)
+    end = end or today
+    start = start or end - timedelta(days=DEFAULT_BACKFILL_DAYS - 1)
+
+    if full:
+        days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    else:
+        days = stale_days(start, end, today)
+    # Cleared before computing, so changes committed meanwhile mark the
+    # day again for the next run
+    StaleSnapshotDay.objects.filter(date__in=days).delete()
+
+    past, current = [], []
+    for day in days:
+        snapshot = PerformanceSnapshot(date=day, **compute_task_metrics(day, now))
+        if day == today:
+            for field, value in compute_officer_metrics().items():
+                setattr(snapshot, field, value)
+            current.append(snapshot)
+        else:
+            past.append(snapshot)
+
+    # Officer counts are only a point-in-time reading, so they are written
+    # for today's row and left untouched when past days are rebuilt
+    for snapshots, fields in ((past, TASK_FIELDS), (current, TASK_FIELDS + OFFICER_FIELDS)):
+        if snapshots:
+            PerformanceSnapshot.objects.bulk_create(
+                snapshots,
+                update_conflicts=True,
+                unique_fields=['date'],
+                update_fields=fields + ['updated_at'],
+            )
+
+    return days
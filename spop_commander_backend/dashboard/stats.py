@@ -0,0 +1,96 @@
+# dashboard/stats.py
+
+from datetime import timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from officers.models import Officer
+from tasks.models import OPEN_STATUSES, Task
+from tasks.overdue import published_overdue_count
+from order.models import Order
+from .counters import status_counters
+
+
+def get_officer_stats():
+    """Officer counts by status, read from the status counters"""
+    counts = status_counters[Officer].histogram()
+    return {
+        'total_officers': sum(counts.values()),
+        'available_officers': counts['available'],
+        'on_mission_officers': counts['on_mission'],
+        'on_leave_officers': counts['on_leave'],
+        'by_status': counts,
+    }
+
+
+def get_task_stats(now=None):
+    """
+    Task counts by status (counters) plus overdue count and 30 day
+    completion rate (one query). The overdue count is the one published by
+    the overdue scheduler (tasks.overdue), or counted when none runs.
+    """
+    now = now or timezone.now()
+    thirty_days_ago = now - timedelta(days=30)
+
+    counts = status_counters[Task].histogram()
+    aggregates = {
+        'created_recently': Count('id', filter=Q(created_at__gte=thirty_days_ago)),
+        'completed_recently': Count('id', filter=Q(
+            status='completed',
+            completion_date__gte=thirty_days_ago
+        )),
+    }
+    overdue = published_overdue_count()
+    if overdue is None:
+        # Served by the open-due partial index
+        aggregates['overdue'] = Count('id', filter=Q(
+            status__in=OPEN_STATUSES,
+            due_date__lt=now
+        ))
+    windowed = Task.objects.aggregate(**aggregates)
+    if overdue is not None:
+        windowed['overdue'] = overdue
+
+    recent_total = windowed['created_recently']
+    recent_completed = windowed['completed_recently']
+
+    return {
+        'total_tasks': sum(counts.values()),
+        'pending_tasks': counts['pending'],
+        'in_progress_tasks': counts['in_progress'],
+        'completed_tasks': counts['completed'],
+        'overdue_tasks': windowed['overdue'],
+        'completion_rate': (recent_completed / recent_total * 100) if recent_total > 0 else 0,
+        'by_status': counts,
+    }
+
+
+def get_order_stats(now=None):
+    """Order counts by status (counters) plus urgent and recent orders (one query)"""
+    now = now or timezone.now()
+    thirty_days_ago = now - timedelta(days=30)
+
+    counts = status_counters[Order].histogram()
+    windowed = Order.objects.aggregate(
+        urgent=Count('id', filter=Q(priority='urgent')),
+        recent=Count('id', filter=Q(created_at__gte=thirty_days_ago)),
+    )
+
+    return {
+        'total_orders': sum(counts.values()),
+        'urgent_orders': windowed['urgent'],
+        'pending_orders': counts['pending'],
+        'recent_orders': windowed['recent'],
+        'by_status': counts,
+    }
+
+
+def get_dashboard_stats(now=None):
+    """Officer, task and order statistics"""
+    now = now or timezone.now()
+    return {
+        'officers': get_officer_stats(),
+        'tasks': get_task_stats(now),
+        'orders': get_order_stats(now),
+    }
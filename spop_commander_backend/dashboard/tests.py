@@ -1,3 +1,611 @@
-from django.test import TestCase
+import os
+import tempfile
+from unittest import mock
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from authentication.models import User
+from officers.models import Officer
+from order.models import Order
+from tasks.models import Task
+from dashboard.activity import activity_sink
+from dashboard.archive import archive_activities, load_manifest, read_archive
+from dashboard.cache import summary_cache
+from dashboard.counters import status_counters
+from dashboard.metrics import MetricBuffer, choose_resolution, metric_buffer, query_metric, rollup
+from dashboard.models import Activity, DashboardCache, DashboardMetric, MetricRollup, PerformanceSnapshot
+from dashboard.snapshots import build_snapshots
+from dashboard.stats import get_dashboard_stats
+
+
+class DashboardTestMixin:
+    def setUp(self):
+        caches[settings.DASHBOARD_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user(
+            username='commander',
+            password='testpass123',
+            is_commander=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_officer(self, name='Test Officer', officer_status='available'):
+        user = User.objects.create_user(
+            username=f'officer{Officer.objects.count()}',
+            password='officer123'
+        )
+        return Officer.objects.create(
+            user=user,
+            name=name,
+            rank='Lieutenant',
+            phone_number='1234567890',
+            status=officer_status
+        )
+
+    def build_task(self, officer, task_status='pending', due_in=timedelta(days=1), **kwargs):
+        now = timezone.now()
+        return Task(
+            title=kwargs.pop('title', f'Task {task_status}'),
+            description='Test Description',
+            assigned_to=officer,
+            created_by=self.user,
+            status=task_status,
+            start_date=now,
+            due_date=now + due_in,
+            **kwargs
+        )
+
+    def build_order(self, officer, order_status='pending', priority='normal'):
+        return Order(
+            title='Test Order',
+            description='Test Description',
+            created_by=self.user,
+            assigned_to=officer,
+            status=order_status,
+            priority=priority,
+            due_date=timezone.now() + timedelta(days=1)
+        )
+
+
+class DashboardStatsTests(DashboardTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        officer = self.create_officer()
+        self.create_officer(officer_status='on_mission')
+        self.create_officer(officer_status='on_leave')
+        Task.objects.bulk_create([
+            self.build_task(officer, 'pending'),
+            self.build_task(officer, 'pending', due_in=-timedelta(days=1)),
+            self.build_task(officer, 'in_progress', due_in=-timedelta(days=1)),
+            self.build_task(officer, 'completed', due_in=-timedelta(days=1),
+                            completion_date=timezone.now()),
+        ])
+        Order.objects.bulk_create([
+            self.build_order(officer, 'pending', 'urgent'),
+            self.build_order(officer, 'completed'),
+        ])
+
+    @override_settings(DASHBOARD_COUNTERS_ALLOW_LOCAL_CACHE=True)
+    def test_stats_read_status_counts_from_counters(self):
+        get_dashboard_stats()  # seeds the counters
+        with CaptureQueriesContext(connection) as queries:
+            stats = get_dashboard_stats()
+
+        # Only the time-windowed task and order aggregates hit the database
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(stats['officers']['total_officers'], 3)
+        self.assertEqual(stats['officers']['on_mission_officers'], 1)
+        self.assertEqual(stats['tasks']['total_tasks'], 4)
+        self.assertEqual(stats['tasks']['pending_tasks'], 2)
+        self.assertEqual(stats['tasks']['overdue_tasks'], 2)
+        self.assertEqual(stats['tasks']['completion_rate'], 25)
+        self.assertEqual(stats['orders']['urgent_orders'], 1)
+        self.assertEqual(stats['orders']['pending_orders'], 1)
+
+    def test_summary_endpoint(self):
+        response = self.client.get(reverse('dashboard-summary'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['officers']['available_officers'], 1)
+        self.assertEqual(response.data['tasks']['in_progress_tasks'], 1)
+        self.assertEqual(response.data['orders']['total_orders'], 2)
+
+    def test_officer_statistics_endpoint(self):
+        response = self.client.get(reverse('officer-statistics'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'total': 3, 'available': 1, 'on_mission': 1, 'on_leave': 1
+        })
+
+
+class SummaryCacheTests(DashboardTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.officer = self.create_officer()
+        self.url = reverse('dashboard-summary')
+
+    def test_summary_is_served_from_cache(self):
+        self.client.get(self.url)
+        self.assertEqual(DashboardCache.objects.count(), len(summary_cache.SECTIONS))
+
+        self.create_officer()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.data['officers']['total_officers'], 1)
+
+    def test_last_updated_is_when_sections_were_computed(self):
+        first = self.client.get(self.url).data['last_updated']
+        caches[settings.DASHBOARD_CACHE_ALIAS].clear()
+
+        # Served from the database tier, still as of the first request
+        self.assertEqual(self.client.get(self.url).data['last_updated'], first)
+        self.assertNotEqual(
+            self.client.get(self.url, {'refresh': 'true'}).data['last_updated'], first
+        )
+
+    def test_database_tier_is_read_after_backend_miss(self):
+        self.client.get(self.url)
+        caches[settings.DASHBOARD_CACHE_ALIAS].clear()
+
+        data = summary_cache.get_or_compute('officers', lambda: self.fail('recomputed'))
+        self.assertEqual(data['total_officers'], 1)
+
+    def test_refresh_recomputes_sections(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_officer()
+
+        response = self.client.get(self.url, {'refresh': 'true'})
+        self.assertEqual(response.data['officers']['total_officers'], 2)
+
+    def test_expired_rows_are_evicted(self):
+        DashboardCache.objects.create(
+            cache_key='dashboard:summary:stale',
+            cache_data={},
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.client.get(self.url)
+        self.assertFalse(
+            DashboardCache.objects.filter(cache_key='dashboard:summary:stale').exists()
+        )
+
+
+@override_settings(DASHBOARD_COUNTERS_ALLOW_LOCAL_CACHE=True)
+class StatusCounterTests(DashboardTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.officer = self.create_officer()
+        self.counters = status_counters[Task]
+        self.counters.histogram()
+
+    def test_counters_follow_status_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = self.build_task(self.officer)
+            task.save()
+        self.assertEqual(self.counters.peek()['pending'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.get(pk=task.pk)
+            task.status = 'completed'
+            task.save()
+        counts = self.counters.peek()
+        self.assertEqual(counts['pending'], 0)
+        self.assertEqual(counts['completed'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        self.assertEqual(self.counters.peek()['completed'], 0)
+
+    def test_officer_touch_does_not_change_counters(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.officer.save()
+        self.assertEqual(status_counters[Officer].histogram()['available'], 1)
+
+    def test_reconcile_fixes_drift(self):
+        Task.objects.bulk_create([self.build_task(self.officer)])  # no signals
+
+        self.assertEqual(self.counters.reconcile(), {'pending': 1})
+        self.assertEqual(self.counters.peek()['pending'], 1)
+        self.assertEqual(self.counters.reconcile(), {})
+
+    def test_process_local_cache_falls_back_to_counting(self):
+        with override_settings(DASHBOARD_COUNTERS_ALLOW_LOCAL_CACHE=False):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.build_task(self.officer).save()
+            self.assertIsNone(self.counters.peek())
+            self.assertEqual(self.counters.histogram()['pending'], 1)
+            self.assertEqual(self.counters.reconcile(), {})
+
+        # Nothing was applied to the (local) counters meanwhile
+        self.assertEqual(self.counters.peek()['pending'], 0)
+
+
+class PerformanceSnapshotTests(DashboardTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.officer = self.create_officer()
+        self.today = timezone.localdate()
+        Task.objects.bulk_create([
+            self.build_task(self.officer, 'pending'),
+            self.build_task(self.officer, 'completed', completion_date=timezone.now()),
+        ])
+
+    def test_backfill_then_incremental_build(self):
+        start = self.today - timedelta(days=6)
+        with CaptureQueriesContext(connection) as queries:
+            days = build_snapshots(start, self.today)
+        self.assertEqual(len(days), 7)
+        # One aggregate per day plus bookkeeping, not one query per task
+        self.assertLessEqual(len(queries), 7 + 6)
+
+        snapshot = PerformanceSnapshot.objects.get(date=self.today)
+        self.assertEqual(snapshot.total_tasks, 2)
+        self.assertEqual(snapshot.completed_tasks, 1)
+        self.assertEqual(snapshot.completion_rate, 50)
+        self.assertEqual(snapshot.total_officers, 1)
+
+        # Nothing changed: only today is recomputed
+        self.assertEqual(build_snapshots(start, self.today), [self.today])
+
+    def test_task_changes_mark_their_old_and_new_days_stale(self):
+        start = self.today - timedelta(days=9)
+        days_ago = [self.today - timedelta(days=n) for n in range(10)]
+        now = timezone.now()
+        task = self.build_task(
+            self.officer, 'completed',
+            due_in=timedelta(days=-7), completion_date=now - timedelta(days=6)
+        )
+        task.save()
+        Task.objects.filter(pk=task.pk).update(created_at=now - timedelta(days=8))
+        build_snapshots(start, self.today)
+        self.assertEqual(PerformanceSnapshot.objects.get(date=days_ago[6]).completed_tasks, 1)
+
+        # Reopened: the completion day loses it
+        task = Task.objects.get(pk=task.pk)
+        task.status = 'in_progress'
+        task.completion_date = None
+        with self.captureOnCommitCallbacks(execute=True):
+            task.save()
+        self.assertIn(days_ago[6], build_snapshots(start, self.today))
+        self.assertEqual(PerformanceSnapshot.objects.get(date=days_ago[6]).completed_tasks, 0)
+
+        # Rescheduled: both due days are rebuilt
+        task = Task.objects.get(pk=task.pk)
+        task.due_date = timezone.now() - timedelta(days=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            task.save()
+        with CaptureQueriesContext(connection) as queries:
+            days = build_snapshots(start, self.today)
+        self.assertEqual(days, [days_ago[8], days_ago[7], days_ago[5], self.today])
+        # Never reads the changed tasks, one aggregate per stale day
+        self.assertLessEqual(len(queries), len(days) + 6)
+        self.assertEqual(PerformanceSnapshot.objects.get(date=days_ago[7]).overdue_tasks, 0)
+        self.assertEqual(PerformanceSnapshot.objects.get(date=days_ago[5]).overdue_tasks, 1)
+
+        # Deleted: its days are rebuilt without it
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        self.assertIn(days_ago[8], build_snapshots(start, self.today))
+        self.assertEqual(PerformanceSnapshot.objects.get(date=days_ago[8]).total_tasks, 0)
+
+        # Untouched days stay as built
+        self.assertEqual(build_snapshots(start, self.today), [self.today])
+
+    def test_trends_endpoint(self):
+        build_snapshots(self.today - timedelta(days=2), self.today)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard-trends'), {'days': 7})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([row['date'] for row in response.data][-1], self.today.isoformat())
+        self.assertEqual(len(response.data), 3)
+
+
+class MetricRollupTests(DashboardTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.base = (timezone.now() - timedelta(hours=2)).replace(minute=0, second=0, microsecond=0)
+        DashboardMetric.objects.bulk_create([
+            DashboardMetric(metric_type='response_time', metric_value=value,
+                            metric_label='', category=category,
+                            timestamp=self.base + offset)
+            for value, category, offset in [
+                (10, 'ops', timedelta(seconds=0)),
+                (20, 'ops', timedelta(seconds=30)),
+                (30, 'ops', timedelta(minutes=5)),
+                (40, 'training', timedelta(minutes=5)),
+            ]
+        ])
+
+    def test_buffer_flushes_with_one_query(self):
+        buffer = MetricBuffer(max_size=3, flush_interval=60)
+        with CaptureQueriesContext(connection) as queries:
+            buffer.record('load', 1)
+            buffer.record('load', 2)
+        self.assertEqual(len(queries), 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            buffer.record('load', 3)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(DashboardMetric.objects.filter(metric_type='load').count(), 3)
+
+    def test_buffer_flushes_on_a_timer(self):
+        buffer = MetricBuffer(max_size=100, flush_interval=60)
+        buffer.record('load', 1)
+        timer = buffer._timer
+        self.assertTrue(timer.is_alive())
+
+        # What the timer runs once the interval passes
+        with mock.patch('dashboard.metrics.close_old_connections'):
+            buffer._timed_flush()
+        self.assertTrue(timer.finished.is_set())  # cancelled
+        self.assertIsNone(buffer._timer)
+        self.assertEqual(DashboardMetric.objects.filter(metric_type='load').count(), 1)
+
+    def test_rollup_recomputes_buckets_with_late_points(self):
+        for resolution in ['minute', 'hour', 'day']:
+            rollup(resolution)
+
+        # Ingested after the rollup, for a bucket that already exists
+        DashboardMetric.objects.create(
+            metric_type='response_time', metric_value=50, metric_label='',
+            category='ops', timestamp=self.base + timedelta(seconds=45)
+        )
+        for resolution in ['minute', 'hour', 'day']:
+            rollup(resolution)
+
+        minute = MetricRollup.objects.get(resolution='minute', category='ops', bucket=self.base)
+        self.assertEqual((minute.count, minute.total, minute.max_value), (3, 80, 50))
+        hour = MetricRollup.objects.get(resolution='hour', category='ops')
+        self.assertEqual((hour.count, hour.total), (4, 110))
+
+    def test_rollup_tiers(self):
+        self.assertEqual(rollup('minute'), 3)
+        self.assertEqual(rollup('hour'), 2)
+        self.assertEqual(rollup('day'), 2)
+
+        hour = MetricRollup.objects.get(resolution='hour', category='ops')
+        self.assertEqual(hour.bucket, self.base)
+        self.assertEqual((hour.count, hour.total, hour.min_value, hour.max_value), (3, 60, 10, 30))
+
+        # Re-running is idempotent
+        rollup('minute')
+        self.assertEqual(MetricRollup.objects.filter(resolution='minute').count(), 3)
+
+    def test_query_picks_tier_from_range(self):
+        now = timezone.now()
+        self.assertEqual(choose_resolution(now - timedelta(hours=3), now), 'minute')
+        self.assertEqual(choose_resolution(now - timedelta(days=10), now), 'hour')
+        self.assertEqual(choose_resolution(now - timedelta(days=90), now), 'day')
+
+        for resolution in ['minute', 'hour', 'day']:
+            rollup(resolution)
+        resolution, points = query_metric('response_time', self.base, now)
+        self.assertEqual(resolution, 'minute')
+        self.assertEqual([point['count'] for point in points], [2, 2])
+        self.assertEqual(points[1]['avg'], 35)
+
+    def test_ingest_and_query_endpoints(self):
+        response = self.client.post(reverse('dashboard-ingest-metrics'), {
+            'points': [
+                {'metric_type': 'response_time', 'value': 50, 'category': 'ops',
+                 'timestamp': (self.base + timedelta(minutes=5)).isoformat()},
+            ]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        metric_buffer.flush()
+
+        rollup('minute')
+        response = self.client.get(reverse('dashboard-metrics'), {
+            'metric_type': 'response_time',
+            'start': self.base.isoformat(),
+            'category': 'ops',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['resolution'], 'minute')
+        self.assertEqual([point['count'] for point in response.data['points']], [2, 2])
+
+
+class ActivitySinkTests(DashboardTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.officer = self.create_officer()
+
+    def test_activity_is_written_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.build_task(self.officer).save()
+            self.assertFalse(Activity.objects.filter(activity_type='task').exists())
+        self.assertEqual(Activity.objects.filter(activity_type='task').count(), 1)
+
+    def test_rolled_back_changes_leave_no_activity(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.build_task(self.officer).save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertFalse(Activity.objects.filter(activity_type='task').exists())
+
+    def test_batch_writes_with_one_insert(self):
+        with activity_sink.batch():
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(5):
+                    self.build_task(self.officer).save()
+            with CaptureQueriesContext(connection) as queries:
+                with activity_sink.batch():
+                    pass
+            self.assertEqual(len(queries), 0)
+            self.assertFalse(Activity.objects.filter(activity_type='task').exists())
+
+        self.assertEqual(Activity.objects.filter(activity_type='task').count(), 5)
+
+    def test_officer_touch_writes_no_activity(self):
+        officer = Officer.objects.get(pk=self.officer.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            officer.save()
+        self.assertFalse(Activity.objects.filter(activity_type='officer').exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            officer.status = 'on_mission'
+            officer.save()
+        activity = Activity.objects.get(activity_type='officer')
+        self.assertEqual(
+            activity.metadata['changes'],
+            {'status': {'old': 'available', 'new': 'on_mission'}}
+        )
+
+    def test_only_meaningful_task_changes_are_recorded(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.build_task(self.officer).save()
+        task = Task.objects.get()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.save()
+        self.assertEqual(Activity.objects.filter(activity_type='task').count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.priority = 'high'
+            task.save()
+        activity = Activity.objects.filter(title__startswith='Task Updated').get()
+        self.assertEqual(activity.metadata['changes'], {'priority': {'old': 'medium', 'new': 'high'}})
+
+
+class ActivityArchiveTests(DashboardTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive_dir.cleanup)
+        overrides = override_settings(DASHBOARD_ACTIVITY_ARCHIVE_DIR=self.archive_dir.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.officer = self.create_officer()
+        now = timezone.now()
+        Activity.objects.bulk_create([
+            Activity(activity_type='task' if i % 2 else 'order', title=f'Activity {i}',
+                     description='', related_officer=self.officer, status='pending')
+            for i in range(7)
+        ])
+        # auto_now_add ignores explicit values, so age the rows afterwards
+        for i, activity in enumerate(Activity.objects.order_by('id')):
+            age = timedelta(days=100 - i) if i < 5 else timedelta(days=1)
+            Activity.objects.filter(pk=activity.pk).update(timestamp=now - age)
+
+    def test_old_rows_move_to_archive_files(self):
+        self.assertEqual(archive_activities(days=90, batch_size=2), 5)
+        self.assertEqual(Activity.objects.count(), 2)
+
+        manifest = load_manifest()
+        self.assertEqual([entry['count'] for entry in manifest], [2, 2, 1])
+        for entry in manifest:
+            self.assertTrue(os.path.exists(os.path.join(self.archive_dir.name, entry['file'])))
+
+        rows = list(read_archive())
+        self.assertEqual([row['title'] for row in rows], [f'Activity {i}' for i in range(5)])
+        self.assertEqual([row['title'] for row in read_archive(activity_type='task')],
+                         ['Activity 1', 'Activity 3'])
+
+        # Nothing left to archive on a second run
+        self.assertEqual(archive_activities(days=90), 0)
+
+    def test_interrupted_run_can_be_repeated(self):
+        # Crash after the first file is listed, before its rows are deleted
+        with mock.patch('django.db.models.query.QuerySet.delete', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                archive_activities(days=90, batch_size=2)
+        self.assertEqual([entry['count'] for entry in load_manifest()], [2])
+        self.assertEqual(Activity.objects.count(), 7)
+
+        self.assertEqual(archive_activities(days=90, batch_size=3), 5)
+        self.assertEqual(Activity.objects.count(), 2)
+        self.assertEqual([row['title'] for row in read_archive()],
+                         [f'Activity {i}' for i in range(5)])
+
+    def test_archive_endpoint_pages_lazily(self):
+        archive_activities(days=90, batch_size=2)
+        url = reverse('dashboard-activity-archive')
+
+        response = self.client.get(url, {'limit': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+
+        response = self.client.get(url, {'limit': 3, 'after': response.data['next']})
+        self.assertEqual([row['title'] for row in response.data['results']],
+                         ['Activity 3', 'Activity 4'])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(url, {'type': 'bogus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ActivityFeedTests(DashboardTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.officer = self.create_officer()
+        self.other_officer = self.create_officer(name='Other Officer')
+        Activity.objects.bulk_create([
+            Activity(activity_type='task' if i % 3 else 'order', title=f'Activity {i}',
+                     description='', actor=self.user, status='pending',
+                     related_officer=self.officer if i % 2 else self.other_officer)
+            for i in range(25)
+        ])
+        # Give several rows the same timestamp so the id tie-breaker matters
+        Activity.objects.filter(title__in=['Activity 10', 'Activity 11', 'Activity 12']).update(
+            timestamp=Activity.objects.get(title='Activity 11').timestamp
+        )
+        self.url = reverse('dashboard-activity')
+
+    def collect(self, params):
+        seen = []
+        response = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                return seen
+            response = self.client.get(response.data['next'])
+
+    def test_pages_walk_the_whole_feed_in_order(self):
+        seen = self.collect({'page_size': 4})
+        expected = list(
+            Activity.objects.order_by('-timestamp', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_deep_pages_do_not_use_offset(self):
+        response = self.client.get(self.url, {'page_size': 5})
+        for _ in range(3):
+            response = self.client.get(response.data['next'])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(response.data['next'])
+        sql = [query['sql'] for query in queries if 'dashboard_activity' in query['sql']]
+        self.assertEqual(len(sql), 1)
+        self.assertNotIn('OFFSET', sql[0])
+
+    def test_filters(self):
+        self.assertEqual(len(self.collect({'type': 'order'})), 9)
+        self.assertEqual(len(self.collect({'officer': self.officer.id})), 12)
+        self.assertEqual(len(self.collect({'actor': self.user.id, 'type': 'task'})), 16)
+
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_summary_reads_recent_activities_from_feed(self):
+        response = self.client.get(reverse('dashboard-summary'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['recent_activities']), 10)
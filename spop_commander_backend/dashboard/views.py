@@ -1,17 +1,35 @@
 # dashboard/views.py
 
-from rest_framework import viewsets
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Q, Sum, Avg, Max
+from django.db.models import Count, Q, F, Sum, Avg, Max
 from django.utils import timezone
 from datetime import timedelta
+from itertools import islice
 
+from core.pagination import KeysetPagination
 from officers.models import Officer
 from tasks.models import Task
-from order.models import Order
-from .serializers import DashboardSummarySerializer
+from .archive import read_archive
+from .metrics import metric_buffer, query_metric
+from .models import Activity, PerformanceSnapshot
+from .serializers import (
+    ActivityFeedQuerySerializer,
+    ActivityFeedSerializer,
+    ArchiveQuerySerializer,
+    DashboardSummarySerializer,
+    MetricPointSerializer,
+    MetricQuerySerializer,
+    PerformanceSnapshotSerializer,
+)
+from .cache import summary_cache
+from .stats import get_officer_stats, get_task_stats, get_order_stats
+
+
+class ActivityFeedPagination(KeysetPagination):
+    ordering = ('-timestamp', '-id')
 
 
 class DashboardViewSet(viewsets.ViewSet):
@@ -27,56 +45,29 @@ class DashboardViewSet(viewsets.ViewSet):
         - Recent activities
         """
         try:
-            # Get current date for calculations
-            today = timezone.now()
-            thirty_days_ago = today - timedelta(days=30)
-
-            # Officers Statistics
-            officers_stats = {
-                'total_officers': Officer.objects.count(),
-                'available_officers': Officer.objects.filter(status='available').count(),
-                'on_mission_officers': Officer.objects.filter(status='on_mission').count(),
-                'on_leave_officers': Officer.objects.filter(status='on_leave').count(),
-            }
-
-            # Tasks Statistics
-            tasks_stats = {
-                'total_tasks': Task.objects.count(),
-                'pending_tasks': Task.objects.filter(status='pending').count(),
-                'in_progress_tasks': Task.objects.filter(status='in_progress').count(),
-                'completed_tasks': Task.objects.filter(status='completed').count(),
-                'overdue_tasks': Task.objects.filter(
-                    due_date__lt=today,
-                    status__in=['pending', 'in_progress']
-                ).count(),
-                'completion_rate': self._calculate_completion_rate(),
-            }
-
-            # Orders Statistics
-            orders_stats = {
-                'total_orders': Order.objects.count(),
-                'urgent_orders': Order.objects.filter(priority='urgent').count(),
-                'pending_orders': Order.objects.filter(status='pending').count(),
-                'recent_orders': Order.objects.filter(
-                    created_at__gte=thirty_days_ago
-                ).count(),
-            }
-
-            # Recent Activities
-            recent_activities = self._get_recent_activities()
-
-            # Performance Metrics
-            performance_metrics = self._get_performance_metrics()
-
-            # Compile summary data
-            summary_data = {
-                'officers': officers_stats,
-                'tasks': tasks_stats,
-                'orders': orders_stats,
-                'recent_activities': recent_activities,
-                'performance_metrics': performance_metrics,
-                'last_updated': timezone.now(),
+            # Start from fresh data when explicitly requested
+            if request.query_params.get('refresh') == 'true':
+                summary_cache.invalidate()
+
+            now = timezone.now()
+
+            # Each section is read through the dashboard cache
+            sections = {
+                'officers': ('officers', get_officer_stats),
+                'tasks': ('tasks', lambda: get_task_stats(now)),
+                'orders': ('orders', lambda: get_order_stats(now)),
+                'recent_activities': ('activities', self._get_recent_activities),
+                'performance_metrics': ('performance', self._get_performance_metrics),
             }
+            summary_data = {}
+            computed = []
+            for name, (section, compute) in sections.items():
+                summary_data[name], computed_at = summary_cache.get_with_timestamp(
+                    section, compute
+                )
+                computed.append(computed_at)
+            # When the oldest section was computed, i.e. how stale the summary may be
+            summary_data['last_updated'] = min(computed)
 
             serializer = DashboardSummarySerializer(summary_data)
             return Response(serializer.data)
@@ -87,65 +78,138 @@ class DashboardViewSet(viewsets.ViewSet):
                 status=500
             )
 
-    def _calculate_completion_rate(self):
-        """Calculate task completion rate for the last 30 days"""
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        completed = Task.objects.filter(
-            status='completed',
-            completion_date__gte=thirty_days_ago
-        ).count()
-        total = Task.objects.filter(
-            created_at__gte=thirty_days_ago
-        ).count()
+    @action(detail=False, methods=['get'], url_path='trends')
+    def trends(self, request):
+        """
+        Daily performance trend for the last `days` days (default 30),
+        served from PerformanceSnapshot rows rather than the task table
+        """
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response(
+                {'error': 'Invalid days parameter'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        return (completed / total * 100) if total > 0 else 0
+        days = min(max(days, 1), 366)
+        since = timezone.localdate() - timedelta(days=days - 1)
+        snapshots = PerformanceSnapshot.objects.filter(date__gte=since).order_by('date')
+        return Response(PerformanceSnapshotSerializer(snapshots, many=True).data)
 
-    def _get_recent_activities(self):
-        """Get recent activities across tasks and orders"""
-        today = timezone.now()
-        seven_days_ago = today - timedelta(days=7)
-
-        # Recent task updates
-        recent_tasks = Task.objects.filter(
-            updated_at__gte=seven_days_ago
-        ).order_by('-updated_at')[:5].values(
-            'id', 'title', 'status', 'updated_at', 'assigned_to__name'
+    @action(detail=False, methods=['get'], url_path='metrics')
+    def metrics(self, request):
+        """
+        Time series for a metric. The rollup tier (minute/hour/day) is
+        chosen from the requested range and max_points.
+        """
+        serializer = MetricQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        resolution, points = query_metric(
+            params['metric_type'],
+            params['start'],
+            params['end'] or timezone.now(),
+            category=params['category'],
+            max_points=params['max_points'],
+        )
+        return Response({
+            'metric_type': params['metric_type'],
+            'resolution': resolution,
+            'points': points,
+        })
+
+    @action(detail=False, methods=['post'], url_path='metrics/ingest')
+    def ingest_metrics(self, request):
+        """Buffer metric points; they are bulk-written on the next flush"""
+        serializer = MetricPointSerializer(data=request.data.get('points', []), many=True)
+        serializer.is_valid(raise_exception=True)
+
+        for point in serializer.validated_data:
+            metric_buffer.record(
+                point['metric_type'],
+                point['value'],
+                label=point['label'],
+                category=point['category'],
+                timestamp=point['timestamp'],
+            )
+
+        return Response(
+            {'accepted': len(serializer.validated_data)},
+            status=status.HTTP_202_ACCEPTED
         )
 
-        # Recent order updates
-        recent_orders = Order.objects.filter(
-            updated_at__gte=seven_days_ago
-        ).order_by('-updated_at')[:5].values(
-            'id', 'title', 'status', 'updated_at', 'assigned_to__name'
+    @action(detail=False, methods=['get'], url_path='activity')
+    def activity(self, request):
+        """
+        Activity feed, newest first, filterable by type, officer and actor.
+        Paged with an opaque cursor on (timestamp, id); follow `next`.
+        """
+        serializer = ActivityFeedQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        activities = Activity.objects.select_related('actor', 'related_officer')
+        if params['type']:
+            activities = activities.filter(activity_type=params['type'])
+        if params['officer'] is not None:
+            activities = activities.filter(related_officer_id=params['officer'])
+        if params['actor'] is not None:
+            activities = activities.filter(actor_id=params['actor'])
+
+        paginator = ActivityFeedPagination()
+        page = paginator.paginate_queryset(activities, request, view=self)
+        return paginator.get_paginated_response(
+            ActivityFeedSerializer(page, many=True).data
         )
 
-        # Combine and sort activities
-        activities = []
-        for task in recent_tasks:
-            activities.append({
-                'type': 'task',
-                'id': task['id'],
-                'title': task['title'],
-                'status': task['status'],
-                'timestamp': task['updated_at'],
-                'officer': task['assigned_to__name'],
-            })
-
-        for order in recent_orders:
-            activities.append({
-                'type': 'order',
-                'id': order['id'],
-                'title': order['title'],
-                'status': order['status'],
-                'timestamp': order['updated_at'],
-                'officer': order['assigned_to__name'],
-            })
-
-        return sorted(
-            activities,
-            key=lambda x: x['timestamp'],
-            reverse=True
-        )[:10]
+    @action(detail=False, methods=['get'], url_path='activity/archive')
+    def activity_archive(self, request):
+        """
+        Activities moved out of the hot table by archive_activities. Pages
+        are read lazily from the archive files; pass the returned `next`
+        as `after` to continue.
+        """
+        serializer = ArchiveQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        rows = read_archive(
+            start=params['start'],
+            end=params['end'],
+            activity_type=params['type'],
+            related_officer=params['officer'],
+            after_id=params['after'],
+        )
+        results = list(islice(rows, params['limit'] + 1))
+        has_more = len(results) > params['limit']
+        results = results[:params['limit']]
+
+        return Response({
+            'results': results,
+            'next': results[-1]['id'] if has_more else None,
+        })
+
+    def _get_recent_activities(self):
+        """Latest activities of the last week from the activity feed"""
+        seven_days_ago = timezone.now() - timedelta(days=7)
+        activities = Activity.objects.filter(
+            timestamp__gte=seven_days_ago
+        ).select_related('related_officer').order_by('-timestamp', '-id')[:10]
+
+        return [
+            {
+                'type': activity.activity_type,
+                # The task/order/officer the activity is about, when recorded
+                'id': activity.metadata.get(f'{activity.activity_type}_id', activity.id),
+                'title': activity.title,
+                'status': activity.status,
+                'timestamp': activity.timestamp,
+                'officer': activity.related_officer.name if activity.related_officer else '',
+            }
+            for activity in activities
+        ]
 
     def _get_performance_metrics(self):
         """Calculate performance metrics"""
@@ -155,7 +219,7 @@ class DashboardViewSet(viewsets.ViewSet):
         task_metrics = Task.objects.filter(
             completion_date__gte=thirty_days_ago
         ).aggregate(
-            avg_completion_time=Avg('completion_time'),
+            avg_completion_time=Avg(F('completion_date') - F('start_date')),
             total_completed=Count('id'),
             on_time_completion=Count(
                 'id',
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("officers", "0003_alter_officer_options_remove_officer_is_active_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="officer",
+            name="field_stamps",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("officers", "0004_officer_field_stamps"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="officer",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
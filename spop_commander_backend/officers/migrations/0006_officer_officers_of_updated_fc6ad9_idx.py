@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("officers", "0005_officer_version"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="officer",
+            index=models.Index(
+                fields=["updated_at", "id"], name="officers_of_updated_fc6ad9_idx"
+            ),
+        ),
+    ]
@@ -3,13 +3,37 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 
-class Officer(models.Model):
+from core.models import ChangeTrackingMixin
+
+
+class OfficerQuerySet(models.QuerySet):
+    def with_task_counts(self):
+        """Annotate total, active and completed task counts in the same query"""
+        return self.annotate(
+            total_tasks_count=models.Count('assigned_tasks'),
+            active_tasks_count=models.Count(
+                'assigned_tasks',
+                filter=models.Q(assigned_tasks__status__in=['pending', 'in_progress'])
+            ),
+            completed_tasks_count=models.Count(
+                'assigned_tasks',
+                filter=models.Q(assigned_tasks__status='completed')
+            ),
+        )
+
+
+class Officer(ChangeTrackingMixin, models.Model):
     STATUS_CHOICES = [
         ('available', 'متاح'),
         ('on_mission', 'في مهمة'),
         ('on_leave', 'إجازة'),
     ]
 
+    # Snapshotted on load for change detection (see dashboard.signals).
+    # last_active and updated_at are bumped on every save and deliberately
+    # left out so a plain touch is not reported as a change.
+    tracked_fields = ('status',)
+
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -27,12 +51,20 @@ class Officer(models.Model):
     last_active = models.DateTimeField(default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # When, and in which version, each field last changed (see sync.signals)
+    field_stamps = models.JSONField(default=dict, blank=True, editable=False)
+    # Bumped on every change; pushes send it back as base_version
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    objects = OfficerQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['status']),
             models.Index(fields=['created_at']),
+            # Sync pull key, see sync.views
+            models.Index(fields=['updated_at', 'id']),
         ]
 
     def __str__(self):
@@ -13,19 +13,24 @@ class OfficerSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'user', 'name', 'rank', 'status', 'phone_number',
             'specializations', 'active_tasks_count', 'completed_tasks_count',
-            'last_active'
+            'last_active', 'version'
         ]
-        read_only_fields = ['last_active']
+        read_only_fields = ['last_active', 'version']
 
     def get_active_tasks_count(self, obj):
+        # Precomputed by OfficerQuerySet.with_task_counts() on list views
+        if hasattr(obj, 'active_tasks_count'):
+            return obj.active_tasks_count
         return Task.objects.filter(
-            assigned_officer=obj,
+            assigned_to=obj,
             status__in=['pending', 'in_progress']
         ).count()
 
     def get_completed_tasks_count(self, obj):
+        if hasattr(obj, 'completed_tasks_count'):
+            return obj.completed_tasks_count
         return Task.objects.filter(
-            assigned_officer=obj,
+            assigned_to=obj,
             status='completed'
         ).count()
 
@@ -48,28 +53,41 @@ class OfficerDetailSerializer(OfficerSerializer):
         ]
 
     def get_active_tasks(self, obj):
-        tasks = Task.objects.filter(
-            assigned_officer=obj,
-            status__in=['pending', 'in_progress']
-        ).order_by('-created_at')[:5]
+        # Loaded by OfficerViewSet with Task.objects.officer_summary()
+        summary_tasks = getattr(obj, 'summary_tasks', None)
+        if summary_tasks is not None:
+            tasks = [task for task in summary_tasks if task.status != 'completed']
+        else:
+            tasks = Task.objects.filter(
+                assigned_to=obj,
+                status__in=['pending', 'in_progress']
+            ).order_by('-created_at')[:5]
         return TaskSerializer(tasks, many=True).data
 
     def get_recent_tasks(self, obj):
-        tasks = Task.objects.filter(
-            assigned_officer=obj,
-            status='completed'
-        ).order_by('-completed_at')[:5]
+        summary_tasks = getattr(obj, 'summary_tasks', None)
+        if summary_tasks is not None:
+            tasks = [task for task in summary_tasks if task.status == 'completed']
+        else:
+            tasks = Task.objects.filter(
+                assigned_to=obj,
+                status='completed'
+            ).order_by('-completion_date')[:5]
         return TaskSerializer(tasks, many=True).data
 
     def get_performance_metrics(self, obj):
-        total_tasks = Task.objects.filter(assigned_officer=obj).count()
-        completed_tasks = Task.objects.filter(
-            assigned_officer=obj,
-            status='completed'
-        ).count()
+        if hasattr(obj, 'total_tasks_count'):
+            total_tasks = obj.total_tasks_count
+            completed_tasks = obj.completed_tasks_count
+        else:
+            total_tasks = Task.objects.filter(assigned_to=obj).count()
+            completed_tasks = Task.objects.filter(
+                assigned_to=obj,
+                status='completed'
+            ).count()
 
         return {
             'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
             'total_tasks': total_tasks,
             'completed_tasks': completed_tasks
-        }
\ No newline at end of file
+        }
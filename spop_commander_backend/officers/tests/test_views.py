@@ -1,9 +1,16 @@
+import json
+from datetime import timedelta
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
 from authentication.models import User
 from officers.models import Officer
+from tasks.models import Task, TaskUpdate
 
 
 class OfficerTests(APITestCase):
@@ -73,4 +80,149 @@ class OfficerTests(APITestCase):
 
         response = self.client.put(url, updated_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(Officer.objects.get().name, 'Updated Officer')
\ No newline at end of file
+        self.assertEqual(Officer.objects.get().name, 'Updated Officer')
+
+class OfficerQueryCountTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='commander',
+            password='testpass123',
+            is_commander=True
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('officer-list')
+
+    def _create_officers(self, count):
+        for i in range(count):
+            user = User.objects.create_user(
+                username=f'officer{Officer.objects.count()}',
+                password='officer123'
+            )
+            officer = Officer.objects.create(
+                user=user,
+                name=f'Officer {i}',
+                rank='Lieutenant',
+                phone_number='1234567890'
+            )
+            now = timezone.now()
+            Task.objects.bulk_create([
+                Task(
+                    title=f'Task {status}',
+                    description='Test Description',
+                    assigned_to=officer,
+                    created_by=self.user,
+                    status=status,
+                    start_date=now,
+                    due_date=now + timedelta(days=1)
+                )
+                for status in ['pending', 'in_progress', 'completed', 'completed']
+            ])
+
+    def _count_list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries), response.data
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        self._create_officers(2)
+        small_count, _ = self._count_list_queries()
+
+        self._create_officers(8)
+        large_count, data = self._count_list_queries()
+
+        self.assertEqual(len(data), 10)
+        self.assertEqual(small_count, large_count)
+
+    def test_list_includes_annotated_task_counts(self):
+        self._create_officers(1)
+        _, data = self._count_list_queries()
+
+        self.assertEqual(data[0]['active_tasks_count'], 2)
+        self.assertEqual(data[0]['completed_tasks_count'], 2)
+
+    def test_streamed_list_matches_list(self):
+        self._create_officers(3)
+        _, data = self._count_list_queries()
+
+        response = self.client.get(self.url, {'stream': 'true'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), data)
+
+    def test_detail_query_count_is_bounded(self):
+        self._create_officers(1)
+        officer = Officer.objects.get()
+        now = timezone.now()
+        tasks = Task.objects.bulk_create([
+            Task(
+                title=f'History {i}',
+                description='Test Description',
+                assigned_to=officer,
+                created_by=self.user,
+                status='completed',
+                start_date=now,
+                due_date=now,
+                completion_date=now - timedelta(hours=i)
+            )
+            for i in range(20)
+        ])
+        TaskUpdate.objects.bulk_create([
+            TaskUpdate(task=task, user=self.user, update_type='note', description='Done')
+            for task in tasks
+        ])
+
+        url = reverse('officer-detail', kwargs={'pk': officer.id})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(queries), 4)
+        self.assertEqual(len(response.data['active_tasks']), 2)
+        self.assertEqual(len(response.data['recent_tasks']), 5)
+        self.assertEqual(response.data['recent_tasks'][0]['title'], 'History 0')
+        self.assertEqual(len(response.data['recent_tasks'][0]['updates']), 1)
+        self.assertEqual(response.data['performance_metrics']['total_tasks'], 24)
+        self.assertEqual(response.data['performance_metrics']['completed_tasks'], 22)
+
+    def test_performance_aggregates_response_times(self):
+        self._create_officers(1)
+        officer = Officer.objects.get()
+        Task.objects.filter(assigned_to=officer).delete()
+        now = timezone.now()
+        tasks = Task.objects.bulk_create([
+            Task(
+                title=f'Task {hours}',
+                description='Test Description',
+                assigned_to=officer,
+                created_by=self.user,
+                status='completed' if hours < 4 else 'pending',
+                start_date=now,
+                due_date=now
+            )
+            for hours in [1, 2, 3, 10]
+        ])
+        for task, hours in zip(tasks, [1, 2, 3, 10]):
+            Task.objects.filter(pk=task.pk).update(
+                created_at=now - timedelta(hours=hours)
+            )
+
+        url = reverse('officer-performance', kwargs={'pk': officer.id})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'bucket': 'day'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(queries), 3)
+        self.assertEqual(response.data['total_tasks'], 4)
+        self.assertEqual(response.data['completed_tasks'], 3)
+        self.assertAlmostEqual(response.data['average_response_time'], 4 * 3600, delta=1)
+        self.assertAlmostEqual(response.data['median_response_time'], 2.5 * 3600, delta=1)
+        self.assertAlmostEqual(response.data['p90_response_time'], 7.9 * 3600, delta=1)
+        self.assertEqual(
+            sum(row['total_tasks'] for row in response.data['series']), 4
+        )
+
+    def test_performance_rejects_unknown_bucket(self):
+        self._create_officers(1)
+        url = reverse('officer-performance', kwargs={'pk': Officer.objects.get().id})
+        response = self.client.get(url, {'bucket': 'year'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -5,14 +5,20 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Q, F
-from datetime import datetime, timedelta
+from django.db.models import Avg, Count, Q, F, Prefetch
+from django.db.models.functions import TruncDay, TruncWeek
+from django.utils import timezone
+from datetime import timedelta
+
+from core.aggregates import Percentile
+from core.streaming import StreamingJSONResponse, serialize_iter, wants_stream
+from dashboard.stats import get_officer_stats
 
 from reports.serializers import ReportSerializer
 from weekly_plans.serializers import WeeklyPlanSerializer
 from .models import Officer
 from .serializers import OfficerSerializer, OfficerDetailSerializer
-from tasks.models import Task
+from tasks.models import Task, TaskStateSnapshot
 from tasks.serializers import TaskSerializer
 
 
@@ -20,6 +26,11 @@ class OfficerViewSet(viewsets.ModelViewSet):
     queryset = Officer.objects.all()
     serializer_class = OfficerSerializer
 
+    PERFORMANCE_BUCKETS = {
+        'day': TruncDay,
+        'week': TruncWeek,
+    }
+
     @action(detail=False, methods=['get'])
     def profile(self, request):
         officer = request.user.officer_profile
@@ -47,6 +58,20 @@ class OfficerViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = Officer.objects.all()
 
+        # Compute task counts in the list query instead of per row
+        if self.action in ['list', 'active', 'available']:
+            queryset = queryset.with_task_counts()
+
+        # Detail view: aggregates plus both top-5 task lists in bounded queries
+        if self.action in ['retrieve', 'details']:
+            queryset = queryset.with_task_counts().prefetch_related(
+                Prefetch(
+                    'assigned_tasks',
+                    queryset=Task.objects.officer_summary().prefetch_related('updates'),
+                    to_attr='summary_tasks'
+                )
+            )
+
         # Filter by status if provided
         status = self.request.query_params.get('status', None)
         if status:
@@ -91,21 +116,22 @@ class OfficerViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def active(self, request):
-        active_officers = self.queryset.filter(status='active')
+        active_officers = self.get_queryset().filter(status='active')
         serializer = self.get_serializer(active_officers, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def available(self, request):
-        available_officers = self.queryset.filter(status='available')
+        available_officers = self.get_queryset().filter(status='available')
         serializer = self.get_serializer(available_officers, many=True)
         return Response(serializer.data)
 
     def list(self, request, *args, **kwargs):
-        status_filter = request.query_params.get('status', None)
-        queryset = self.queryset
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
+        queryset = self.get_queryset()
+        if wants_stream(request):
+            return StreamingJSONResponse(serialize_iter(
+                queryset, self.get_serializer_class(), self.get_serializer_context()
+            ))
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -170,47 +196,117 @@ class OfficerViewSet(viewsets.ModelViewSet):
         """Get officer's performance metrics"""
         officer = self.get_object()
         period = request.query_params.get('period', '30')  # Default to 30 days
+        bucket = request.query_params.get('bucket')  # Optional: day | week
+
+        if bucket and bucket not in self.PERFORMANCE_BUCKETS:
+            return Response(
+                {'error': 'Invalid bucket parameter'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         try:
             days = int(period)
-            start_date = datetime.now() - timedelta(days=days)
-
-            # Get tasks in period
-            tasks = Task.objects.filter(
-                assigned_officer=officer,
-                created_at__gte=start_date
+        except ValueError:
+            return Response(
+                {'error': 'Invalid period parameter'},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-            # Calculate metrics
-            total_tasks = tasks.count()
-            completed_tasks = tasks.filter(status='completed').count()
-            completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
-
-            # Average response time calculation
-            response_times = tasks.exclude(
-                started_at__isnull=True
-            ).annotate(
-                response_time=(F('started_at') - F('created_at'))
-            ).values_list('response_time', flat=True)
-
-            avg_response_time = sum(
-                [rt.total_seconds() for rt in response_times]
-            ) / len(response_times) if response_times else 0
-
-            return Response({
-                'total_tasks': total_tasks,
-                'completed_tasks': completed_tasks,
-                'completion_rate': completion_rate,
-                'average_response_time': avg_response_time,
-                'period_days': days
-            })
+        start_date = timezone.now() - timedelta(days=days)
+
+        # Get tasks in period
+        tasks = Task.objects.filter(
+            assigned_to=officer,
+            created_at__gte=start_date
+        ).with_response_time()
+
+        # Counts and response time distribution in a single aggregate query
+        metrics = tasks.aggregate(
+            total_tasks=Count('id'),
+            completed_tasks=Count('id', filter=Q(status='completed')),
+            average_response_time=Avg('response_time'),
+            median_response_time=Percentile('response_time', 0.5),
+            p90_response_time=Percentile('response_time', 0.9),
+        )
+        total_tasks = metrics['total_tasks']
+        completed_tasks = metrics['completed_tasks']
+
+        data = {
+            'total_tasks': total_tasks,
+            'completed_tasks': completed_tasks,
+            'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
+            'average_response_time': self._seconds(metrics['average_response_time']),
+            'median_response_time': self._seconds(metrics['median_response_time']),
+            'p90_response_time': self._seconds(metrics['p90_response_time']),
+            'period_days': days
+        }
+
+        if bucket:
+            series = tasks.annotate(
+                bucket=self.PERFORMANCE_BUCKETS[bucket]('created_at')
+            ).values('bucket').annotate(
+                total_tasks=Count('id'),
+                completed_tasks=Count('id', filter=Q(status='completed')),
+                average_response_time=Avg('response_time'),
+            ).order_by('bucket')
+
+            data['bucket'] = bucket
+            data['series'] = [
+                {
+                    'bucket': row['bucket'],
+                    'total_tasks': row['total_tasks'],
+                    'completed_tasks': row['completed_tasks'],
+                    'average_response_time': self._seconds(row['average_response_time']),
+                }
+                for row in series
+            ]
+
+        return Response(data)
+
+    @staticmethod
+    def _seconds(duration):
+        return duration.total_seconds() if duration is not None else 0
 
+    @action(detail=False, methods=['get'])
+    def cycle_times(self, request):
+        """
+        Per officer: tasks completed in the period and their average time
+        from creation to completion and in pending / in progress, read from
+        the task state snapshots rather than the task table
+        """
+        try:
+            days = int(request.query_params.get('period', '30'))
         except ValueError:
             return Response(
                 {'error': 'Invalid period parameter'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        rows = TaskStateSnapshot.objects.filter(
+            status='completed',
+            completed_at__gte=timezone.now() - timedelta(days=days)
+        ).values('task__assigned_to', 'task__assigned_to__name').annotate(
+            completed_tasks=Count('task'),
+            average_cycle_time=Avg('cycle_seconds'),
+            average_pending_time=Avg('pending_seconds'),
+            average_in_progress_time=Avg('in_progress_seconds'),
+        ).order_by('task__assigned_to')
+
+        return Response({
+            'period_days': days,
+            'officers': [
+                {
+                    'officer_id': row['task__assigned_to'],
+                    'officer_name': row['task__assigned_to__name'],
+                    'completed_tasks': row['completed_tasks'],
+                    'average_cycle_time': row['average_cycle_time'],
+                    'average_pending_time': row['average_pending_time'],
+                    'average_in_progress_time': row['average_in_progress_time'],
+                }
+                for row in rows
+            ],
+        })
+
     @action(detail=True)
     def task_history(self, request, pk=None):
         """Get officer's task history"""
@@ -226,16 +322,13 @@ class OfficerViewSet(viewsets.ModelViewSet):
     @action(detail=False)
     def statistics(self, request):
         """Get overall officer statistics"""
-        total_officers = Officer.objects.count()
-        available_officers = Officer.objects.filter(status='available').count()
-        on_mission = Officer.objects.filter(status='on_mission').count()
-        on_leave = Officer.objects.filter(status='on_leave').count()
+        stats = get_officer_stats()
 
         return Response({
-            'total': total_officers,
-            'available': available_officers,
-            'on_mission': on_mission,
-            'on_leave': on_leave
+            'total': stats['total_officers'],
+            'available': stats['available_officers'],
+            'on_mission': stats['on_mission_officers'],
+            'on_leave': stats['on_leave_officers']
         })
 
     def perform_destroy(self, instance):
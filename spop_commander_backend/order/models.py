@@ -1,10 +1,13 @@
 from django.db import models
-from core.models import BaseModel
+from core.models import BaseModel, ChangeTrackingMixin
 from django.conf import settings
 from officers.models import Officer
 
+# Statuses of orders that still need work
+OPEN_STATUSES = ['pending', 'in_progress']
 
-class Order(BaseModel):
+
+class Order(ChangeTrackingMixin, BaseModel):
     PRIORITY_CHOICES = [
         ('normal', 'عادي'),
         ('high', 'عالي'),
@@ -18,6 +21,12 @@ class Order(BaseModel):
         ('cancelled', 'ملغي'),
     ]
 
+    # Snapshotted on load for change detection (see dashboard.signals)
+    tracked_fields = (
+        'title', 'description', 'assigned_to_id', 'priority',
+        'status', 'due_date', 'is_urgent',
+    )
+
     title = models.CharField(max_length=200)
     description = models.TextField()
     created_by = models.ForeignKey(
@@ -42,9 +51,37 @@ class Order(BaseModel):
     )
     due_date = models.DateTimeField()
     is_urgent = models.BooleanField(default=False)
+    # When, and in which version, each field last changed (see sync.signals)
+    field_stamps = models.JSONField(default=dict, blank=True, editable=False)
+    # Bumped on every change; pushes send it back as base_version
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        # Hot filters, see dashboard/management/commands/benchmark_hot_queries.py.
+        # Conditional indexes are skipped on backends without partial
+        # index support.
+        indexes = [
+            # Sync pull key, see sync.views
+            models.Index(fields=['updated_at', 'id']),
+            # List filters in the default newest-first order
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['priority', 'created_at']),
+            # Orders of an officer, by status
+            models.Index(fields=['assigned_to', 'status']),
+            # Urgent orders are few; index only those
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(is_urgent=True),
+                name='order_urgent_idx',
+            ),
+            # Open orders by due date
+            models.Index(
+                fields=['due_date'],
+                condition=models.Q(status__in=OPEN_STATUSES),
+                name='order_open_due_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
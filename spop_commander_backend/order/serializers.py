@@ -22,5 +22,6 @@ class OrderSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Order
-        fields = '__all__'
-        read_only_fields = ['created_by', 'created_at']
\ No newline at end of file
+        # Sync bookkeeping; clients only need the version
+        exclude = ['field_stamps']
+        read_only_fields = ['created_by', 'created_at', 'version']
\ No newline at end of file
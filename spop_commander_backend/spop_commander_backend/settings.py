@@ -91,6 +91,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'drf_yasg',
+    'core',
     'authentication',
     'officers',
     'tasks',
@@ -115,6 +116,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'dashboard.middleware.ActivityBatchMiddleware',
 ]
 AUTH_USER_MODEL = 'authentication.User'
 
@@ -149,6 +151,76 @@ DATABASES = {
     }
 }
 
+# Caches
+# The dashboard alias sits in front of the dashboard.DashboardCache table.
+# Use locmem for development/tests; in production point it at a shared
+# backend with an atomic incr, e.g.
+# DASHBOARD_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache with
+# DASHBOARD_CACHE_LOCATION=redis://127.0.0.1:6379/1. The incremental
+# dashboard status counters (dashboard.counters) are only kept in such a
+# backend; with any other the statuses are counted on every read, unless
+# DASHBOARD_COUNTERS_ALLOW_LOCAL_CACHE=true (a single process setup).
+
+DASHBOARD_CACHE_ALIAS = 'dashboard'
+DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 60))  # seconds
+DASHBOARD_COUNTERS_ALLOW_LOCAL_CACHE = os.environ.get(
+    'DASHBOARD_COUNTERS_ALLOW_LOCAL_CACHE', 'false'
+).lower() == 'true'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    DASHBOARD_CACHE_ALIAS: {
+        'BACKEND': os.environ.get(
+            'DASHBOARD_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('DASHBOARD_CACHE_LOCATION', 'spop-dashboard'),
+        'TIMEOUT': DASHBOARD_CACHE_TTL,
+    },
+}
+
+# Write dashboard Activity rows from a background thread instead of the
+# request thread
+DASHBOARD_ACTIVITY_ASYNC = os.environ.get('DASHBOARD_ACTIVITY_ASYNC', 'false').lower() == 'true'
+
+# Activity rows older than this are moved out of the table into gzipped
+# JSON Lines files by the archive_activities command
+DASHBOARD_ACTIVITY_RETENTION_DAYS = int(os.environ.get('DASHBOARD_ACTIVITY_RETENTION_DAYS', 90))
+DASHBOARD_ACTIVITY_ARCHIVE_DIR = os.environ.get(
+    'DASHBOARD_ACTIVITY_ARCHIVE_DIR',
+    os.path.join(BASE_DIR, 'archive', 'activities')
+)
+
+# Deletes are logged for sync pulls this long; clients that have not
+# synced for longer must do a full resync
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+
+# SyncQueue worker: failed items are retried after BACKOFF_BASE * 2^(n-1)
+# seconds (at most BACKOFF_MAX) and given up on after MAX_ATTEMPTS.
+# The worker runs as the process_sync_queue command.
+SYNC_QUEUE_BACKOFF_BASE = int(os.environ.get('SYNC_QUEUE_BACKOFF_BASE', 5))
+SYNC_QUEUE_BACKOFF_MAX = int(os.environ.get('SYNC_QUEUE_BACKOFF_MAX', 3600))
+SYNC_QUEUE_MAX_ATTEMPTS = int(os.environ.get('SYNC_QUEUE_MAX_ATTEMPTS', 8))
+
+# The run_overdue_scheduler command keeps open task due dates in memory
+# (see tasks.overdue) and announces tasks as overdue when their deadline
+# passes. Every TASKS_OVERDUE_POLL_SECONDS it picks up tasks saved or
+# deleted by other processes and publishes the overdue count to the
+# dashboard cache (which must be shared, e.g. Redis, for the web workers
+# to read it). Everything is reloaded every TASKS_OVERDUE_REFRESH_SECONDS.
+TASKS_OVERDUE_POLL_SECONDS = int(os.environ.get('TASKS_OVERDUE_POLL_SECONDS', 5))
+TASKS_OVERDUE_REFRESH_SECONDS = int(os.environ.get('TASKS_OVERDUE_REFRESH_SECONDS', 3600))
+
+# Retention per DashboardMetric tier in days (None keeps data forever)
+DASHBOARD_METRIC_RETENTION_DAYS = {
+    'raw': 2,
+    'minute': 14,
+    'hour': 180,
+    'day': None,
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -209,3 +281,6 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
 
+
+# Most tasks one bulk assign/status/cancel request may change (see tasks.bulk)
+TASKS_BULK_MAX = int(os.environ.get('TASKS_BULK_MAX', 500))
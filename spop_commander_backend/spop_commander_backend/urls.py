@@ -7,6 +7,7 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from authentication.views import UserViewSet
 from circular.views import CircularViewSet
+from dashboard.views import DashboardViewSet
 from notifcations.views import NotificationViewSet
 from officers.views import OfficerViewSet
 from order.views import OrderViewSet
@@ -39,6 +40,7 @@ router.register(r'orders', OrderViewSet, basename='order')
 router.register(r'weeklyplan', WeeklyPlanViewSet, basename='weekly-plan')
 router.register(r'reports' , ReportsViewSet, basename='reports')
 router.register(r'circulars', CircularViewSet, basename='circulars')
+router.register(r'dashboard', DashboardViewSet, basename='dashboard')
 
 
 
@@ -1,3 +1,17 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import DeviceSyncState, Tombstone
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ('entity_type', 'entity_id', 'deleted_at')
+    list_filter = ('entity_type',)
+    search_fields = ('entity_id',)
+
+
+@admin.register(DeviceSyncState)
+class DeviceSyncStateAdmin(admin.ModelAdmin):
+    list_display = ('user', 'device_id', 'entity_type', 'synced_to', 'last_pull_at', 'last_push_at')
+    list_filter = ('entity_type',)
+    search_fields = ('device_id', 'user__username')
@@ -0,0 +1,292 @@
+# sync/bulk.py
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
+from rest_framework import serializers
+
+from tasks.models import Task
+from tasks.workflow import task_events
+from .conflicts import find_conflicts
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class BulkApply:
+    """
+    Applies pushed changes for one model in batches instead of row by row.
+
+    Per batch, the rows being updated are fetched with one ``in_bulk``
+    query and each foreign key column with one more. Items are validated
+    as the serializer would: field validators, ``validate_<field>`` hooks,
+    serializer validators and ``validate()``.
+    Valid items are then written with ``bulk_create``/``bulk_update`` in a
+    savepoint. Updates carrying a ``base_version`` are merged field by
+    field (see sync.conflicts). pre_save/post_save are sent by hand so
+    dashboard counters, activities and sync stamps behave as for
+    ``save()``. If the database rejects a batch, its items are retried one
+    savepoint each so only the offending items fail. Rows being updated
+    are locked (select_for_update) for the whole batch.
+    """
+
+    def __init__(self, serializer_class, user, batch_size=DEFAULT_BATCH_SIZE):
+        self.model = serializer_class.Meta.model
+        self.user = user
+        self.batch_size = batch_size
+        self.db = router.db_for_write(self.model)
+
+        # Runs the serializer's validate_<field>, validators and validate()
+        self.serializer = serializer_class()
+        self.fields = {
+            name: field
+            for name, field in self.serializer.fields.items()
+            if not field.read_only
+        }
+        self.related_fields = {
+            name: self.model._meta.get_field(field.source)
+            for name, field in self.fields.items()
+            if isinstance(field, serializers.PrimaryKeyRelatedField)
+        }
+
+    def apply(self, items):
+        """
+        Apply `items` (dicts with an `id` to update, without one to create).
+        Returns one {'id', 'error', 'conflicts', 'version'} per item, in
+        order; `error` is None for items that were applied and `id` and
+        `version` are the saved row's. Fields that conflict with server
+        edits made after the item's `base_version` are left out and
+        returned in `conflicts` with their server values.
+        """
+        results = [
+            {
+                'id': item.get('id') if isinstance(item, dict) else None,
+                'error': None,
+                'conflicts': {},
+                'version': None,
+            }
+            for item in items
+        ]
+        indexed = list(enumerate(items))
+        for start in range(0, len(indexed), self.batch_size):
+            self._apply_batch(indexed[start:start + self.batch_size], results)
+        return results
+
+    def _apply_batch(self, batch, results):
+        # The rows being updated stay locked from the version check to the
+        # write, so concurrent pushes based on the same version are merged
+        # one after the other instead of the later one overwriting
+        with transaction.atomic(using=self.db):
+            self._apply_locked(batch, results)
+
+    def _apply_locked(self, batch, results):
+        existing = self._fetch_existing(batch)
+        related = self._fetch_related(batch)
+
+        prepared = []
+        for index, item in batch:
+            try:
+                instance, created, touched, conflicts = self._prepare(item, existing, related)
+            except (ValidationError, serializers.ValidationError) as e:
+                results[index]['error'] = str(e)
+            else:
+                prepared.append((index, instance, created, touched))
+                results[index]['conflicts'] = conflicts
+
+        if not prepared:
+            return
+        # pre_save bumps the version and stamps in memory; a retry must
+        # start again from the loaded values or it would bump them twice
+        stamps = [self._stamps(instance) for _, instance, _, _ in prepared]
+        try:
+            with transaction.atomic(using=self.db):
+                self._write(prepared)
+        except DatabaseError:
+            for entry, entry_stamps in zip(prepared, stamps):
+                entry[1].__dict__.update(entry_stamps)
+                try:
+                    with transaction.atomic(using=self.db):
+                        self._write([entry])
+                except DatabaseError as e:
+                    results[entry[0]]['error'] = str(e)
+                else:
+                    self._saved(results[entry[0]], entry[1])
+        else:
+            for index, instance, _, _ in prepared:
+                self._saved(results[index], instance)
+
+    @staticmethod
+    def _stamps(instance):
+        return {
+            name: instance.__dict__[name]
+            for name in ('version', 'field_stamps')
+            if name in instance.__dict__
+        }
+
+    @staticmethod
+    def _saved(result, instance):
+        result['id'] = str(instance.pk)
+        result['version'] = getattr(instance, 'version', None)
+
+    def _fetch_existing(self, batch):
+        pk_field = self.model._meta.pk
+        ids = []
+        for _, item in batch:
+            if isinstance(item, dict) and item.get('id') is not None:
+                try:
+                    ids.append(pk_field.to_python(item['id']))
+                except ValidationError:
+                    pass
+
+        foreign_keys = [
+            field.name for field in self.model._meta.concrete_fields
+            if field.is_relation
+        ]
+        queryset = self.model.objects.using(self.db).select_related(*foreign_keys)
+        if connections[self.db].features.has_select_for_update_of:
+            # Only the rows themselves, not the joined related rows
+            queryset = queryset.select_for_update(of=('self',))
+        else:
+            queryset = queryset.select_for_update()
+        return queryset.in_bulk(ids)
+
+    def _fetch_related(self, batch):
+        related = {}
+        for name, model_field in self.related_fields.items():
+            target = model_field.target_field
+            ids = set()
+            for _, item in batch:
+                if isinstance(item, dict) and item.get(name) is not None:
+                    try:
+                        ids.add(target.to_python(item[name]))
+                    except ValidationError:
+                        pass
+            related[name] = model_field.related_model.objects.in_bulk(list(ids)) if ids else {}
+        return related
+
+    def _prepare(self, item, existing, related):
+        if not isinstance(item, dict):
+            raise ValidationError('Expected an object')
+
+        if item.get('id') is not None:
+            try:
+                instance = existing.get(self.model._meta.pk.to_python(item['id']))
+            except ValidationError:
+                instance = None
+            if instance is None:
+                raise ValidationError(f"{self.model.__name__} {item['id']} does not exist")
+            created = False
+            conflicts = find_conflicts(instance, item, self.fields)
+        else:
+            instance = self.model()
+            created = True
+            conflicts = {}
+            missing = [
+                name for name, field in self.fields.items()
+                if field.required and name not in item
+            ]
+            if missing:
+                raise serializers.ValidationError({
+                    name: ['This field is required.'] for name in missing
+                })
+
+        field_errors = {}
+        attrs = {}
+        for name, value in item.items():
+            field = self.fields.get(name)
+            if field is None or name in conflicts:
+                # Read-only and unknown keys are ignored, as by the serializer;
+                # conflicting fields keep the server's value
+                continue
+            try:
+                if name in self.related_fields:
+                    value = self._resolve(name, value, related)
+                else:
+                    value = field.run_validation(value)
+                validate_field = getattr(self.serializer, f'validate_{name}', None)
+                if validate_field is not None:
+                    value = validate_field(value)
+            except serializers.ValidationError as e:
+                field_errors[name] = e.detail
+            except ValidationError as e:
+                field_errors[name] = e.messages
+            else:
+                attrs[field.source] = value
+
+        if field_errors:
+            raise serializers.ValidationError(field_errors)
+
+        # Object level checks, as for a (partial, when updating) save
+        self.serializer.instance = None if created else instance
+        self.serializer.partial = not created
+        self.serializer.run_validators(attrs)
+        attrs = self.serializer.validate(attrs)
+
+        touched = set()
+        for source, value in attrs.items():
+            setattr(instance, source, value)
+            touched.add(self.model._meta.get_field(source).attname)
+
+        if created and hasattr(self.model, 'created_by') and instance.created_by_id is None:
+            instance.created_by = self.user
+
+        return instance, created, touched, conflicts
+
+    def _resolve(self, name, value, related):
+        field = self.fields[name]
+        if value is None:
+            if not field.allow_null:
+                raise serializers.ValidationError('This field may not be null.')
+            return None
+
+        model_field = self.related_fields[name]
+        try:
+            instance = related[name].get(model_field.target_field.to_python(value))
+        except ValidationError:
+            instance = None
+        if instance is None:
+            raise serializers.ValidationError(f'Invalid pk "{value}" - object does not exist.')
+        return instance
+
+    def _write(self, prepared):
+        now = timezone.now()
+        update_fields = set()
+
+        for _, instance, created, touched in prepared:
+            instance._state.adding = created
+            if not created:
+                # bulk_update skips auto_now
+                instance.updated_at = now
+                update_fields |= touched | {'updated_at'}
+            pre_save.send(
+                sender=self.model, instance=instance, raw=False,
+                using=self.db, update_fields=None
+            )
+
+        if hasattr(self.model, 'field_stamps'):
+            update_fields |= {'field_stamps', 'version'}
+
+        creates = [instance for _, instance, created, _ in prepared if created]
+        updates = [instance for _, instance, created, _ in prepared if not created]
+        if creates:
+            self.model.objects.bulk_create(creates, batch_size=self.batch_size)
+        if updates:
+            self.model.objects.bulk_update(
+                updates,
+                [self.model._meta.get_field(name).name for name in update_fields],
+                batch_size=self.batch_size
+            )
+
+        # Task status events from the post_save receivers go in one write
+        with task_events.batch():
+            for _, instance, created, _ in prepared:
+                instance._state.adding = False
+                if self.model is Task and not created and self.user is not None:
+                    # Status changes are logged as the pushing user's (see tasks.signals)
+                    instance._workflow = {'user_id': self.user.pk}
+                post_save.send(
+                    sender=self.model, instance=instance, created=created,
+                    raw=False, using=self.db, update_fields=None
+                )
+                if hasattr(instance, 'take_snapshot'):
+                    instance.take_snapshot()
@@ -0,0 +1,96 @@
+# sync/codec.py
+
+import gzip
+import json
+import lzma
+
+from rest_framework.utils.encoders import JSONEncoder
+
+VERSION = 1
+TABLE_KEY = '$table'
+
+# Stdlib codecs; the name is the suffix of the media type
+COMPRESSORS = {
+    'gzip': (lambda data: gzip.compress(data, compresslevel=6), gzip.decompress),
+    'xz': (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+
+
+def to_columns(value):
+    """
+    Rewrite every list of objects in `value` as a table: the field names
+    once, then one array of values per field. Rows missing a field (as in
+    compact sync pulls) are listed under `absent` so they decode exactly.
+    """
+    if isinstance(value, dict):
+        return {key: to_columns(item) for key, item in value.items()}
+    if not isinstance(value, list):
+        return value
+    if not value or not all(isinstance(row, dict) for row in value):
+        return [to_columns(item) for item in value]
+
+    fields = []
+    seen = set()
+    for row in value:
+        for name in row:
+            if name not in seen:
+                seen.add(name)
+                fields.append(name)
+
+    table = {
+        'count': len(value),
+        'fields': fields,
+        'columns': [
+            [to_columns(row.get(name)) for row in value]
+            for name in fields
+        ],
+    }
+    absent = {
+        name: [index for index, row in enumerate(value) if name not in row]
+        for name in fields
+    }
+    absent = {name: rows for name, rows in absent.items() if rows}
+    if absent:
+        table['absent'] = absent
+    return {TABLE_KEY: table}
+
+
+def from_columns(value):
+    """Inverse of to_columns"""
+    if isinstance(value, list):
+        return [from_columns(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if set(value) != {TABLE_KEY}:
+        return {key: from_columns(item) for key, item in value.items()}
+
+    table = value[TABLE_KEY]
+    absent = {
+        name: set(rows) for name, rows in table.get('absent', {}).items()
+    }
+    rows = [{} for _ in range(table['count'])]
+    for name, column in zip(table['fields'], table['columns']):
+        missing = absent.get(name, ())
+        for index, cell in enumerate(column):
+            if index not in missing:
+                rows[index][name] = from_columns(cell)
+    return rows
+
+
+def encode(payload, compression='gzip'):
+    """Columnar, compressed bytes for a JSON-serializable payload"""
+    document = {'v': VERSION, 'data': to_columns(payload)}
+    raw = json.dumps(
+        document, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+    compress, _ = COMPRESSORS[compression]
+    return compress(raw)
+
+
+def decode(blob, compression='gzip'):
+    """Payload encoded by encode()"""
+    _, decompress = COMPRESSORS[compression]
+    document = json.loads(decompress(blob).decode('utf-8'))
+    if document.get('v') != VERSION:
+        raise ValueError(f"Unsupported columnar version: {document.get('v')}")
+    return from_columns(document['data'])
@@ -0,0 +1,62 @@
+# sync/conflicts.py
+
+from rest_framework import serializers
+
+
+def server_changed_fields(instance, base_version):
+    """
+    Names of the fields changed on the server after `base_version`, or
+    None when the row changed but its field stamps cannot tell which
+    """
+    if instance.version <= base_version:
+        return set()
+    changed = {
+        name for name, stamp in instance.field_stamps.items()
+        if stamp.get('version', 0) > base_version
+    }
+    return changed or None
+
+
+def find_conflicts(instance, item, fields):
+    """
+    Fields of a pushed `item` the server also changed, to a different
+    value, since the item's `base_version`. `fields` are the writable
+    serializer fields. Returns {name: current server value}; empty when
+    the edits can be merged (or the client sent no base_version).
+    """
+    base_version = item.get('base_version')
+    if base_version is None:
+        return {}
+    try:
+        base_version = int(base_version)
+    except (TypeError, ValueError):
+        raise serializers.ValidationError({'base_version': ['A valid integer is required.']})
+
+    changed = server_changed_fields(instance, base_version)
+    conflicts = {}
+    for name, value in item.items():
+        field = fields.get(name)
+        if field is None:
+            continue
+        if changed is not None and field.source not in changed:
+            continue
+        if not _same_value(instance, field, value):
+            conflicts[name] = _server_value(instance, field)
+    return conflicts
+
+
+def _same_value(instance, field, value):
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        current = getattr(instance, instance._meta.get_field(field.source).attname)
+        return (current is None and value is None) or str(current) == str(value)
+    try:
+        return field.run_validation(value) == getattr(instance, field.source)
+    except serializers.ValidationError:
+        return False
+
+
+def _server_value(instance, field):
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return getattr(instance, instance._meta.get_field(field.source).attname)
+    current = getattr(instance, field.source)
+    return None if current is None else field.to_representation(current)
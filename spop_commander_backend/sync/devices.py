@@ -0,0 +1,30 @@
+# sync/devices.py
+
+from .models import DeviceSyncState
+
+UNIQUE_FIELDS = ['user', 'device_id', 'entity_type']
+
+
+def get_device_id(request):
+    """Device named by `device_id` in the body or the X-Device-ID header, if any"""
+    device_id = request.data.get('device_id') if hasattr(request.data, 'get') else None
+    device_id = device_id or request.query_params.get('device_id') or request.headers.get('X-Device-ID')
+    return str(device_id)[:64] if device_id else None
+
+
+def record_states(user, device_id, states, fields):
+    """
+    Upsert `states` ({entity_type: {field: value}}) of one device in a
+    single query, overwriting only `fields` on rows that already exist
+    """
+    if not device_id or not states:
+        return
+    DeviceSyncState.objects.bulk_create(
+        [
+            DeviceSyncState(user=user, device_id=device_id, entity_type=entity_type, **values)
+            for entity_type, values in states.items()
+        ],
+        update_conflicts=True,
+        unique_fields=UNIQUE_FIELDS,
+        update_fields=fields,
+    )
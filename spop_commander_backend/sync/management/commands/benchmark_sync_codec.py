@@ -0,0 +1,84 @@
+# sync/management/commands/benchmark_sync_codec.py
+
+import gzip
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from authentication.models import User
+from officers.models import Officer
+from sync import codec
+from sync.views import SyncViewSet
+from tasks.models import Task
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the size and encode time of a sync pull of N tasks as JSON, '
+        'gzipped JSON and the columnar encodings. Rows are created in a '
+        'transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Number of tasks to pull')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                payload = self._payload(options['rows'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        encoders = {
+            'json': lambda data: json.dumps(data, cls=JSONEncoder).encode('utf-8'),
+            'json+gzip': lambda data: gzip.compress(
+                json.dumps(data, cls=JSONEncoder).encode('utf-8'), compresslevel=6
+            ),
+        }
+        for compression in codec.COMPRESSORS:
+            encoders[f'columnar+{compression}'] = (
+                lambda data, compression=compression: codec.encode(data, compression)
+            )
+
+        baseline = None
+        for name, encode in encoders.items():
+            started = time.perf_counter()
+            size = len(encode(payload))
+            elapsed = (time.perf_counter() - started) * 1000
+            baseline = baseline or size
+            self.stdout.write(
+                f'{name:<16} {size:>12,} bytes  {size / baseline:6.1%}  {elapsed:8.1f} ms'
+            )
+
+    def _payload(self, rows):
+        user = User.objects.create_user(username='sync-codec-benchmark')
+        officer = Officer.objects.create(
+            user=user, name='Benchmark Officer', rank='Sergeant',
+            phone_number='0000000000', status='available'
+        )
+        now = timezone.now()
+        Task.objects.bulk_create(
+            Task(
+                title=f'Benchmark task {i}',
+                description='Patrol the assigned sector and report back.',
+                priority=('low', 'medium', 'high')[i % 3],
+                assigned_to=officer,
+                created_by=user,
+                start_date=now,
+                due_date=now + timedelta(days=1),
+            )
+            for i in range(rows)
+        )
+        queryset = SyncViewSet.PULL_QUERYSETS['tasks']().filter(created_by=user)
+        serializer = SyncViewSet.PULL_SERIALIZERS['tasks'](queryset, many=True)
+        return {'updates': {'tasks': serializer.data}}
@@ -0,0 +1,42 @@
+# sync/management/commands/process_sync_queue.py
+
+from django.core.management.base import BaseCommand
+
+from sync.queue import DEFAULT_BATCH_SIZE, SyncQueueWorker, queue_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Process SyncQueue items in priority order, retrying failures with '
+        'exponential backoff. Safe to run several workers at once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Items claimed per transaction')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to wait when no item is due')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the items due now and exit')
+
+    def handle(self, *args, **options):
+        worker = SyncQueueWorker(batch_size=options['batch_size'], interval=options['interval'])
+
+        if options['once']:
+            while worker.run_once():
+                pass
+        else:
+            try:
+                worker.run()
+            except KeyboardInterrupt:
+                pass
+
+        stats = queue_stats()
+        self.stdout.write(
+            f"Processed {worker.succeeded} item(s), {worker.failed} failed, "
+            f"{worker.items_per_second:.1f} items/sec"
+        )
+        self.stdout.write(
+            f"Queue depth {stats['depth']} ({stats['ready']} due, {stats['dead']} dead), "
+            f"oldest item {stats['oldest_age_seconds']:.0f}s old"
+        )
@@ -1,16 +1,19 @@
 from django.db import models
 
 # Create your models here.
+from django.conf import settings
 from django.db import models
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 
 from core.models import BaseModel
 
 
 class SyncStatus(BaseModel):
     entity_type = models.CharField(max_length=50)
-    entity_id = models.UUIDField()
+    # Officers have integer ids, tasks and orders UUIDs
+    entity_id = models.CharField(max_length=64)
     last_sync = models.DateTimeField()
     is_synced = models.BooleanField(default=False)
     sync_attempts = models.IntegerField(default=0)
@@ -32,7 +35,8 @@ class SyncQueue(BaseModel):
     ]
 
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
-    object_id = models.UUIDField()
+    # Officers have integer ids, tasks and orders UUIDs
+    object_id = models.CharField(max_length=64)
     content_object = GenericForeignKey('content_type', 'object_id')
     sync_type = models.CharField(max_length=10, choices=SYNC_TYPES)
     data = models.JSONField()
@@ -40,7 +44,68 @@ class SyncQueue(BaseModel):
     attempts = models.IntegerField(default=0)
     last_attempt = models.DateTimeField(null=True)
     error_message = models.TextField(blank=True)
+    # Not claimed before this; None once retries are exhausted
+    next_attempt_at = models.DateTimeField(null=True, default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # Claim order of the queue worker, see sync.queue
+            models.Index(
+                fields=['-priority', 'next_attempt_at'],
+                condition=models.Q(processed_at__isnull=True),
+                name='sync_queue_pending_idx',
+            ),
+        ]
+
+
+
+class Tombstone(models.Model):
+    """
+    A deleted Task, Order or Officer, kept so sync pulls can tell offline
+    clients to drop it. Pruned after SYNC_TOMBSTONE_RETENTION_DAYS.
+    """
+    entity_type = models.CharField(max_length=50)
+    # Officers have integer ids, tasks and orders UUIDs
+    entity_id = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['entity_type', 'deleted_at', 'id']),
+            models.Index(fields=['deleted_at']),
+        ]
+
+
+class DeviceSyncState(models.Model):
+    """
+    What one device of a user has acknowledged per entity type: the last
+    pull cursor it sent back (it holds every row up to that cursor) and
+    when it last pulled and pushed. Written in one upsert per request,
+    see sync.devices.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='sync_states'
+    )
+    device_id = models.CharField(max_length=64)
+    entity_type = models.CharField(max_length=50)
+    cursor = models.TextField(blank=True)
+    # updated_at of the last row acknowledged, for reporting
+    synced_to = models.DateTimeField(null=True, blank=True)
+    last_pull_at = models.DateTimeField(null=True, blank=True)
+    last_push_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'device_id', 'entity_type'],
+                name='sync_device_state_unique',
+            ),
+        ]
 
+    def __str__(self):
+        return f'{self.device_id} {self.entity_type}'
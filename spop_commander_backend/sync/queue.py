@@ -0,0 +1,296 @@
+# sync/queue.py
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from dashboard.metrics import metric_buffer
+from dashboard.snapshots import stale_day_log
+from officers.models import Officer
+from officers.serializers import OfficerSerializer
+from order.models import Order
+from order.serializers import OrderSerializer
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+from .bulk import BulkApply
+from .models import SyncQueue, SyncStatus
+from .signals import ENTITY_TYPES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+
+SERIALIZERS = {
+    Task: TaskSerializer,
+    Order: OrderSerializer,
+    Officer: OfficerSerializer,
+}
+
+
+def backoff(attempts):
+    """Delay before retrying an item that has failed `attempts` times"""
+    delay = settings.SYNC_QUEUE_BACKOFF_BASE * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.SYNC_QUEUE_BACKOFF_MAX))
+
+
+def claim_batch(batch_size, now=None):
+    """
+    The next `batch_size` items due for an attempt, highest priority
+    first. Must run inside a transaction: where the database supports it
+    the rows stay locked until it ends, and concurrent workers skip them.
+    """
+    now = now or timezone.now()
+    queryset = SyncQueue.objects.filter(
+        processed_at__isnull=True,
+        next_attempt_at__lte=now
+    ).order_by('-priority', 'next_attempt_at', 'created_at')
+    if connection.features.has_select_for_update_skip_locked:
+        queryset = queryset.select_for_update(skip_locked=True)
+    return list(queryset[:batch_size])
+
+
+def apply_items(items):
+    """
+    Apply claimed items to their models, returning {item id: error or None}.
+    Creates and updates go through BulkApply per model (creates grouped by
+    the `created_by` in their data), then deletes run as one query. A
+    group that raises is rolled back and retried item by item, so only
+    the items that raise fail (see _isolate).
+    """
+    errors = {}
+    groups = defaultdict(list)
+    user_pk = get_user_model()._meta.pk
+    for item in items:
+        owner = None
+        if item.sync_type == 'create' and isinstance(item.data, dict):
+            try:
+                owner = user_pk.to_python(item.data.get('created_by'))
+            except (ValidationError, TypeError):
+                # Left for BulkApply to reject
+                owner = None
+        groups[item.content_type_id, owner].append(item)
+
+    owners = get_user_model().objects.in_bulk(
+        [owner for _, owner in groups if owner is not None]
+    )
+
+    for (content_type_id, owner), group in groups.items():
+        content_type = ContentType.objects.get_for_id(content_type_id)
+        model = content_type.model_class()
+        serializer_class = SERIALIZERS.get(model)
+        if serializer_class is None:
+            errors.update({item.id: f'Unsupported model: {content_type.model}' for item in group})
+            continue
+
+        errors.update(_isolate(group, lambda items: _apply_group(
+            model, serializer_class, owners.get(owner), items
+        )))
+
+    return errors
+
+
+def _isolate(items, apply):
+    """
+    apply(items) in a savepoint. If it raises, the savepoint is rolled
+    back and each item is applied on its own, so an item that cannot be
+    applied fails (and is retried, then dead-lettered, by record_results)
+    instead of failing the whole batch every time it is claimed.
+    """
+    try:
+        with transaction.atomic():
+            return apply(items)
+    except Exception as e:
+        if len(items) == 1:
+            logger.warning('Sync queue item %s failed', items[0].id, exc_info=True)
+            return {items[0].id: str(e) or type(e).__name__}
+    errors = {}
+    for item in items:
+        errors.update(_isolate([item], apply))
+    return errors
+
+
+def _apply_group(model, serializer_class, owner, items):
+    errors = {}
+    upserts = [item for item in items if item.sync_type != 'delete']
+    payload = []
+    for item in upserts:
+        if not isinstance(item.data, dict):
+            # Reported as invalid by BulkApply
+            payload.append(item.data)
+            continue
+        data = {key: value for key, value in item.data.items() if key != 'id'}
+        if item.sync_type == 'update':
+            data['id'] = str(item.object_id)
+        payload.append(data)
+
+    applier = BulkApply(serializer_class, owner)
+    for item, outcome in zip(upserts, applier.apply(payload)):
+        errors[item.id] = outcome['error']
+
+    deletes = [item for item in items if item.sync_type == 'delete']
+    if deletes:
+        # Already deleted rows count as done
+        model.objects.filter(pk__in=[item.object_id for item in deletes]).delete()
+        errors.update({item.id: None for item in deletes})
+    return errors
+
+
+def record_results(items, errors, now=None):
+    """Write attempt outcomes to the items and their SyncStatus rows in bulk"""
+    now = now or timezone.now()
+    max_attempts = settings.SYNC_QUEUE_MAX_ATTEMPTS
+
+    for item in items:
+        error = errors.get(item.id)
+        item.attempts += 1
+        item.last_attempt = now
+        item.updated_at = now
+        item.error_message = error or ''
+        if error is None:
+            item.processed_at = now
+        elif item.attempts >= max_attempts:
+            # Dead: kept for inspection, never claimed again
+            item.next_attempt_at = None
+        else:
+            item.next_attempt_at = now + backoff(item.attempts)
+
+    SyncQueue.objects.bulk_update(items, [
+        'attempts', 'last_attempt', 'updated_at', 'error_message',
+        'processed_at', 'next_attempt_at',
+    ])
+
+    # One status per entity; the last item for it in the batch wins
+    outcomes = {}
+    for item in items:
+        content_type = ContentType.objects.get_for_id(item.content_type_id)
+        entity_type = ENTITY_TYPES.get(content_type.model_class(), content_type.model)
+        outcomes[entity_type, str(item.object_id)] = errors.get(item.id)
+
+    existing = {
+        (status.entity_type, status.entity_id): status
+        for status in SyncStatus.objects.filter(
+            entity_id__in=[entity_id for _, entity_id in outcomes]
+        )
+    }
+    updated, created = [], []
+    for key, error in outcomes.items():
+        status = existing.get(key)
+        if status is None:
+            status = SyncStatus(entity_type=key[0], entity_id=key[1], sync_attempts=0)
+            created.append(status)
+        else:
+            updated.append(status)
+        status.last_sync = now
+        status.updated_at = now
+        status.is_synced = error is None
+        status.sync_attempts += 1
+        status.error_message = error or ''
+
+    SyncStatus.objects.bulk_create(created)
+    SyncStatus.objects.bulk_update(updated, [
+        'last_sync', 'updated_at', 'is_synced', 'sync_attempts', 'error_message',
+    ])
+
+
+def queue_stats(now=None):
+    """Queue depth, items due now, dead items and age of the oldest pending item"""
+    now = now or timezone.now()
+    pending = Q(processed_at__isnull=True, next_attempt_at__isnull=False)
+    stats = SyncQueue.objects.filter(processed_at__isnull=True).aggregate(
+        depth=Count('id', filter=pending),
+        ready=Count('id', filter=pending & Q(next_attempt_at__lte=now)),
+        dead=Count('id', filter=Q(next_attempt_at__isnull=True)),
+        oldest=Min('created_at', filter=pending),
+    )
+    oldest = stats.pop('oldest')
+    stats['oldest_age_seconds'] = (now - oldest).total_seconds() if oldest else 0
+    return stats
+
+
+class SyncQueueWorker:
+    """
+    Drains SyncQueue in batches: claim, apply, record outcomes, all in one
+    transaction per batch. Run it from the process_sync_queue command or
+    on a background thread with start(). Throughput and queue depth go to
+    `metrics` (a dashboard.metrics.MetricBuffer, the shared one by default).
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, interval=1.0, metrics=None):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.metrics = metrics if metrics is not None else metric_buffer
+        self.succeeded = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """Process one batch, returning the number of items attempted"""
+        started = time.monotonic()
+        # Stale snapshot days of the whole batch go into one insert
+        with stale_day_log.batch(), transaction.atomic():
+            items = claim_batch(self.batch_size)
+            if not items:
+                return 0
+            errors = apply_items(items)
+            record_results(items, errors)
+
+        self.busy_seconds += time.monotonic() - started
+        failed = sum(1 for error in errors.values() if error)
+        self.failed += failed
+        self.succeeded += len(items) - failed
+        self._record_metrics()
+        return len(items)
+
+    def run(self, max_batches=None):
+        """Process batches until stopped, sleeping `interval` when the queue is idle"""
+        batches = 0
+        while not self._stop.is_set():
+            if max_batches is not None and batches >= max_batches:
+                break
+            try:
+                attempted = self.run_once()
+            except Exception:
+                logger.exception('Sync queue batch failed')
+                attempted = 0
+            finally:
+                close_old_connections()
+
+            if attempted:
+                batches += 1
+            else:
+                self._stop.wait(self.interval)
+
+    def start(self):
+        """Run the worker on a daemon thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='sync-queue-worker', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def items_per_second(self):
+        attempted = self.succeeded + self.failed
+        return attempted / self.busy_seconds if self.busy_seconds else 0.0
+
+    def _record_metrics(self):
+        stats = queue_stats()
+        self.metrics.record('sync_queue_throughput', self.items_per_second, category='sync')
+        self.metrics.record('sync_queue_depth', stats['depth'], category='sync')
+        self.metrics.record('sync_queue_oldest_age', stats['oldest_age_seconds'], category='sync')
@@ -0,0 +1,29 @@
+# sync/renderers.py
+
+from rest_framework.renderers import BaseRenderer
+
+from . import codec
+
+
+class ColumnarRenderer(BaseRenderer):
+    """
+    Compressed columnar encoding of a response (see sync.codec), picked
+    with `Accept: application/vnd.spop.columnar+gzip` or `?format=columnar-gzip`
+    """
+    media_type = 'application/vnd.spop.columnar+gzip'
+    format = 'columnar-gzip'
+    charset = None
+    render_style = 'binary'
+    compression = 'gzip'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return codec.encode(data, self.compression)
+
+
+class ColumnarXZRenderer(ColumnarRenderer):
+    """Smaller but slower to encode than ColumnarRenderer; for very slow links"""
+    media_type = 'application/vnd.spop.columnar+xz'
+    format = 'columnar-xz'
+    compression = 'xz'
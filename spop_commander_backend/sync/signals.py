@@ -0,0 +1,70 @@
+# sync/signals.py
+
+from django.db.models.signals import post_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from officers.models import Officer
+from order.models import Order
+from tasks.models import Task
+from .models import Tombstone
+
+# Names the synced models go by in sync pull/push
+ENTITY_TYPES = {
+    Task: 'tasks',
+    Order: 'orders',
+    Officer: 'officers',
+}
+
+# Bookkeeping fields that are sent with every row anyway
+UNSTAMPED_FIELDS = {'id', 'created_at', 'updated_at', 'field_stamps', 'version'}
+
+
+def stamped_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if field.name not in UNSTAMPED_FIELDS
+    ]
+
+
+@receiver(pre_save, sender=Task)
+@receiver(pre_save, sender=Order)
+@receiver(pre_save, sender=Officer)
+def stamp_changed_fields(sender, instance, update_fields=None, **kwargs):
+    """
+    Bump the row version and record when, and in which version, each field
+    last changed. Sync pulls use this to send only changes and pushes to
+    detect conflicting edits.
+    """
+    if instance._state.adding:
+        # New rows are always sent in full
+        return
+    if update_fields is not None and not {'field_stamps', 'version'} <= set(update_fields):
+        return
+
+    fields = stamped_fields(sender)
+    if getattr(instance, 'loaded_values', None) is None:
+        # No load snapshot, so any field may have changed
+        changed = fields
+    else:
+        changes = instance.changed_fields([field.attname for field in fields])
+        changed = [field for field in fields if field.attname in changes]
+
+    if changed:
+        instance.version += 1
+        stamp = {'at': timezone.now().isoformat(), 'version': instance.version}
+        instance.field_stamps = {
+            **instance.field_stamps,
+            **{field.name: stamp for field in changed},
+        }
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Order)
+@receiver(post_delete, sender=Officer)
+def record_tombstone(sender, instance, **kwargs):
+    """Log the delete so sync pulls can propagate it"""
+    Tombstone.objects.create(
+        entity_type=ENTITY_TYPES[sender],
+        entity_id=str(instance.pk)
+    )
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from authentication.models import User
+from officers.models import Officer
+from sync import codec
+from tasks.models import Task
+
+
+class CodecTests(SimpleTestCase):
+    def test_round_trip(self):
+        payload = {
+            'last_sync': '2026-01-01T00:00:00Z',
+            'updates': {
+                # Compact rows: not every row carries every field
+                'tasks': [
+                    {'id': 'a', 'title': 'Patrol', 'notes': None, 'updates': [{'note': 'ok'}]},
+                    {'id': 'b', 'priority': 'high'},
+                    {'id': 'c', 'title': 'Überwachung ✓', 'updates': []},
+                ],
+                'orders': [],
+            },
+            'deleted': {'tasks': ['x', 'y']},
+            'has_more': False,
+        }
+        for compression in codec.COMPRESSORS:
+            with self.subTest(compression=compression):
+                blob = codec.encode(payload, compression)
+                self.assertEqual(codec.decode(blob, compression), payload)
+
+    def test_tables_list_field_names_once(self):
+        rows = [{'id': i, 'status': 'pending'} for i in range(3)]
+        table = codec.to_columns(rows)[codec.TABLE_KEY]
+        self.assertEqual(table['fields'], ['id', 'status'])
+        self.assertEqual(table['columns'], [[0, 1, 2], ['pending'] * 3])
+        self.assertNotIn('absent', table)
+
+    def test_unknown_version_is_rejected(self):
+        blob = codec.COMPRESSORS['gzip'][0](b'{"v": 99, "data": {}}')
+        with self.assertRaises(ValueError):
+            codec.decode(blob)
+
+
+class ColumnarPullTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='commander', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        officer_user = User.objects.create_user(username='officer1', password='officer123')
+        officer = Officer.objects.create(
+            user=officer_user,
+            name='Test Officer',
+            rank='Lieutenant',
+            phone_number='1234567890',
+            status='available'
+        )
+        now = timezone.now()
+        for i in range(3):
+            Task.objects.create(
+                title=f'Task {i}',
+                description='Test Description',
+                assigned_to=officer,
+                created_by=self.user,
+                start_date=now,
+                due_date=now + timedelta(days=1)
+            )
+
+    def test_pull_is_negotiated_by_accept_header(self):
+        url = reverse('sync-pull')
+        body = {'entity_types': ['tasks', 'officers']}
+        plain = self.client.post(url, body, format='json')
+
+        for compression in codec.COMPRESSORS:
+            with self.subTest(compression=compression):
+                response = self.client.post(
+                    url, body, format='json',
+                    HTTP_ACCEPT=f'application/vnd.spop.columnar+{compression}'
+                )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(
+                    response['Content-Type'], f'application/vnd.spop.columnar+{compression}'
+                )
+                decoded = codec.decode(response.content, compression)
+                self.assertEqual(decoded['updates'], plain.json()['updates'])
+                self.assertLess(len(response.content), len(plain.content))
@@ -0,0 +1,602 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from authentication.models import User
+from core.pagination import decode_cursor, encode_cursor
+from dashboard.metrics import MetricBuffer
+from dashboard.models import Activity
+from officers.models import Officer
+from sync.bulk import BulkApply
+from sync.models import DeviceSyncState, SyncQueue, SyncStatus, Tombstone
+from sync.queue import SyncQueueWorker, backoff
+from sync.views import SyncViewSet
+from tasks.models import Task, TaskUpdate
+
+
+class SyncPullTests(APITestCase):
+    def setUp(self):
+        # No re-read window unless a test is about it, so caught up
+        # clients get nothing back
+        settle = mock.patch.object(SyncViewSet, 'PULL_SETTLE', timedelta(0))
+        settle.start()
+        self.addCleanup(settle.stop)
+
+        self.user = User.objects.create_user(
+            username='commander',
+            password='testpass123',
+            is_commander=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+        officer_user = User.objects.create_user(username='officer1', password='officer123')
+        self.officer = Officer.objects.create(
+            user=officer_user,
+            name='Test Officer',
+            rank='Lieutenant',
+            phone_number='1234567890',
+            status='available'
+        )
+        now = timezone.now()
+        for i in range(5):
+            Task.objects.create(
+                title=f'Task {i}',
+                description='Test Description',
+                assigned_to=self.officer,
+                created_by=self.user,
+                start_date=now,
+                due_date=now + timedelta(days=1)
+            )
+        self.url = reverse('sync-pull')
+
+    def pull(self, cursors=None, **params):
+        response = self.client.post(self.url, {
+            'entity_types': ['tasks'],
+            'cursors': cursors or {},
+            **params
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def sync(self, cursors=None, **params):
+        """Pull until caught up, returning the rows and the final cursors"""
+        rows = []
+        while True:
+            data = self.pull(cursors, **params)
+            rows.extend(data['updates'].get('tasks', []))
+            cursors = data['cursors']
+            if not data['has_more']:
+                return rows, cursors
+
+    def test_pages_are_bounded_and_resumable(self):
+        data = self.pull(limit=2)
+        self.assertEqual(len(data['updates']['tasks']), 2)
+        self.assertTrue(data['has_more'])
+
+        # Resume from the cursor of the partial sync
+        rows, cursors = self.sync(data['cursors'], limit=2)
+        titles = [row['title'] for row in data['updates']['tasks'] + rows]
+        self.assertEqual(sorted(titles), [f'Task {i}' for i in range(5)])
+
+        # Caught up: nothing new until something changes
+        rows, cursors = self.sync(cursors)
+        self.assertEqual(rows, [])
+
+        task = Task.objects.get(title='Task 3')
+        task.status = 'in_progress'
+        task.save()
+        rows, _ = self.sync(cursors)
+        self.assertEqual([row['title'] for row in rows], ['Task 3'])
+
+    @mock.patch.object(SyncViewSet, 'PULL_SETTLE', timedelta(minutes=1))
+    def test_rows_committed_behind_the_cursor_are_pulled(self):
+        _, cursors = self.sync()
+
+        # Stamped before the last row sent, but committed after the pull
+        late = Task.objects.get(title='Task 0')
+        Task.objects.filter(pk=late.pk).update(
+            title='Late', updated_at=late.updated_at - timedelta(seconds=1)
+        )
+        rows, _ = self.sync(cursors)
+
+        # Everything in the window is sent again, each row once
+        self.assertIn('Late', [row['title'] for row in rows])
+        self.assertEqual(len(rows), len({row['id'] for row in rows}))
+
+    def test_compact_mode_sends_changed_fields_only(self):
+        _, cursors = self.sync()
+
+        task = Task.objects.get(title='Task 1')
+        task.priority = 'high'
+        task.save()
+        Task.objects.create(
+            title='Task 5',
+            description='Test Description',
+            assigned_to=self.officer,
+            created_by=self.user,
+            start_date=timezone.now(),
+            due_date=timezone.now() + timedelta(days=1)
+        )
+
+        rows, _ = self.sync(cursors, compact=True)
+        updated, created = rows
+        self.assertEqual(set(updated), {'id', 'updated_at', 'version', 'priority'})
+        self.assertEqual(updated['priority'], 'high')
+        self.assertEqual(created['title'], 'Task 5')
+        self.assertIn('description', created)
+
+    def test_streamed_pull_matches_buffered_pull(self):
+        body = {'entity_types': ['tasks', 'officers'], 'limit': 3}
+        buffered = self.client.post(self.url, body, format='json').json()
+
+        response = self.client.post(f'{self.url}?stream=true', body, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        streamed = json.loads(b''.join(response.streaming_content))
+
+        self.assertTrue(streamed['has_more'])
+        for key in ('updates', 'deleted', 'has_more', 'full_resync_required'):
+            self.assertEqual(streamed[key], buffered[key])
+        self.assertEqual(
+            {name: decode_cursor(cursor)['key'] for name, cursor in streamed['cursors'].items()},
+            {name: decode_cursor(cursor)['key'] for name, cursor in buffered['cursors'].items()}
+        )
+
+    def test_device_acknowledgements_are_tracked(self):
+        headers = {'HTTP_X_DEVICE_ID': 'tablet-1'}
+        first = self.pull(limit=3)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.post(self.url, {
+                'entity_types': ['tasks'], 'cursors': first['cursors'], 'limit': 3,
+            }, format='json', **headers).data
+        upserts = [query for query in queries if 'sync_devicesyncstate' in query['sql']]
+        self.assertEqual(len(upserts), 1)
+
+        state = DeviceSyncState.objects.get(user=self.user, device_id='tablet-1')
+        self.assertEqual(state.cursor, first['cursors']['tasks'])
+        self.assertIsNotNone(state.synced_to)
+
+        Task.objects.get(title='Task 0').delete()
+        response = self.client.get(reverse('sync-device'), **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        entity, = response.data['entity_types']
+        self.assertEqual(entity['entity_type'], 'tasks')
+        # Tasks 3 and 4 come after the acknowledged cursor, and the delete
+        # of an acknowledged task is pending
+        self.assertEqual(entity['pending_updates'], 2)
+        self.assertEqual(entity['pending_deletes'], 1)
+
+        # Acknowledging the next cursor updates the same row
+        self.client.post(self.url, {
+            'entity_types': ['tasks'], 'cursors': second['cursors'],
+        }, format='json', **headers)
+        state = DeviceSyncState.objects.get()
+        self.assertEqual(state.cursor, second['cursors']['tasks'])
+
+    def test_rows_leave_out_bookkeeping_fields(self):
+        row = self.pull()['updates']['tasks'][0]
+        self.assertEqual(row['version'], 1)
+        self.assertNotIn('field_stamps', row)
+        self.assertNotIn('overdue_notified_at', row)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.post(self.url, {
+            'entity_types': ['tasks'],
+            'cursors': {'tasks': 'not-a-cursor'},
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_malformed_cursor_payloads_are_rejected(self):
+        headers = {'HTTP_X_DEVICE_ID': 'tablet-1'}
+        at = '2026-01-01T00:00:00Z'
+        payloads = [
+            {'key': []},
+            {'key': [1, 2]},
+            {'key': ['garbage', None]},
+            {'key': ['2026-01-01T00:00:00', None]},
+            {'key': [at, 'not-a-uuid']},
+            {'key': [at, None], 'deleted': [at, 'abc']},
+            {'key': [at, None], 'since': 5},
+        ]
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                response = self.client.post(self.url, {
+                    'entity_types': ['tasks'],
+                    'cursors': {'tasks': encode_cursor(payload)},
+                }, format='json', **headers)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(DeviceSyncState.objects.exists())
+
+        # Cursors stored before they were checked are counted from scratch
+        DeviceSyncState.objects.create(
+            user=self.user, device_id='tablet-1', entity_type='tasks',
+            cursor=encode_cursor({'key': [at, 'not-a-uuid']}),
+        )
+        response = self.client.get(reverse('sync-device'), **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['entity_types'][0]['pending_updates'], 5)
+
+    def test_deletes_are_pulled_as_tombstones(self):
+        _, cursors = self.sync()
+
+        task = Task.objects.get(title='Task 2')
+        task_id = str(task.id)
+        task.delete()
+        self.assertTrue(Tombstone.objects.filter(entity_type='tasks', entity_id=task_id).exists())
+
+        data = self.pull(cursors)
+        self.assertEqual(data['deleted']['tasks'], [task_id])
+        self.assertEqual(data['updates']['tasks'], [])
+
+        # Each delete is only sent once
+        data = self.pull(data['cursors'])
+        self.assertEqual(data['deleted']['tasks'], [])
+
+    @override_settings(SYNC_TOMBSTONE_RETENTION_DAYS=30)
+    def test_cursor_past_retention_requires_full_resync(self):
+        data = self.pull(last_sync=(timezone.now() - timedelta(days=31)).isoformat())
+        self.assertEqual(data['full_resync_required'], ['tasks'])
+        self.assertNotIn('tasks', data['updates'])
+
+        data = self.pull(last_sync=(timezone.now() - timedelta(days=29)).isoformat())
+        self.assertEqual(data['full_resync_required'], [])
+        self.assertEqual(len(data['updates']['tasks']), 5)
+
+
+class SyncBulkPushTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='commander',
+            password='testpass123',
+            is_commander=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+        officer_user = User.objects.create_user(username='officer1', password='officer123')
+        self.officer = Officer.objects.create(
+            user=officer_user,
+            name='Test Officer',
+            rank='Lieutenant',
+            phone_number='1234567890',
+            status='available'
+        )
+        now = timezone.now()
+        Task.objects.bulk_create([
+            Task(
+                title=f'Task {i}',
+                description='Test Description',
+                assigned_to=self.officer,
+                created_by=self.user,
+                start_date=now,
+                due_date=now + timedelta(days=1)
+            )
+            for i in range(50)
+        ])
+        self.url = reverse('sync-push')
+
+    def test_bulk_push_applies_items_in_constant_queries(self):
+        now = timezone.now()
+        updates = [
+            {'id': str(task.id), 'status': 'in_progress'}
+            for task in Task.objects.all()
+        ]
+        creates = [
+            {
+                'title': f'New Task {i}',
+                'description': 'Pushed offline',
+                'assigned_to': self.officer.id,
+                'start_date': now.isoformat(),
+                'due_date': (now + timedelta(days=2)).isoformat(),
+            }
+            for i in range(50)
+        ]
+        invalid = [
+            {'id': updates[0]['id'], 'status': 'unknown'},
+            {'title': 'No dates', 'description': '', 'assigned_to': self.officer.id},
+            {'title': 'Bad officer', 'description': '', 'assigned_to': 999,
+             'start_date': now.isoformat(), 'due_date': now.isoformat()},
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, {
+                    'mode': 'bulk',
+                    'changes': {'tasks': updates + creates + invalid},
+                }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['success']), 100)
+        self.assertEqual(len(response.data['failed']), 3)
+        self.assertLess(len(queries), 20)
+
+        self.assertEqual(Task.objects.filter(status='in_progress').count(), 50)
+        self.assertEqual(Task.objects.filter(created_by=self.user).count(), 100)
+        # Save signals still fire for bulk writes
+        task = Task.objects.get(id=updates[1]['id'])
+        self.assertIn('status', task.field_stamps)
+        self.assertEqual(Activity.objects.filter(activity_type='task').count(), 100)
+
+    def test_database_errors_only_fail_offending_items(self):
+        officer_user = User.objects.create_user(username='officer2', password='officer123')
+        response = self.client.post(self.url, {
+            'mode': 'bulk',
+            'changes': {'officers': [
+                {'user': officer_user.id, 'name': 'New Officer', 'rank': 'Captain',
+                 'phone_number': '1234567890'},
+                # user is one-to-one, so this one violates the unique constraint
+                {'user': self.officer.user_id, 'name': 'Duplicate', 'rank': 'Captain',
+                 'phone_number': '1234567890'},
+                {'id': self.officer.id, 'name': 'Renamed'},
+            ]},
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['success']), 2)
+        self.assertEqual(len(response.data['failed']), 1)
+        self.assertTrue(Officer.objects.filter(name='New Officer').exists())
+        self.assertFalse(Officer.objects.filter(name='Duplicate').exists())
+
+        # The retried update is stamped once, not once per attempt
+        self.officer.refresh_from_db()
+        self.assertEqual(self.officer.version, 2)
+        self.assertEqual(self.officer.field_stamps['name']['version'], 2)
+        self.assertEqual(response.data['success'][1]['version'], 2)
+
+
+    def test_serializer_hooks_apply_in_both_modes(self):
+        bad_phone = {'id': self.officer.id, 'phone_number': '12ab'}
+        for mode in ('bulk', 'items'):
+            with self.subTest(mode=mode):
+                response = self.client.post(self.url, {
+                    'mode': mode,
+                    'changes': {'officers': [bad_phone]},
+                }, format='json')
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                failed, = response.data['failed']
+                self.assertIn('phone_number', failed['error'])
+
+        self.officer.refresh_from_db()
+        self.assertEqual(self.officer.phone_number, '1234567890')
+
+    def test_status_changes_follow_the_workflow_in_both_modes(self):
+        pusher = self.officer.user
+        self.client.force_authenticate(user=pusher)
+        first, second = Task.objects.order_by('id')[:2]
+        for mode, task in (('bulk', first), ('items', second)):
+            with self.subTest(mode=mode):
+                # A pending task has to be started before it is completed
+                response = self.client.post(self.url, {
+                    'mode': mode,
+                    'changes': {'tasks': [{'id': str(task.id), 'status': 'completed'}]},
+                }, format='json')
+                failed, = response.data['failed']
+                self.assertIn('cannot become completed', failed['error'])
+
+                response = self.client.post(self.url, {
+                    'mode': mode,
+                    'changes': {'tasks': [{'id': str(task.id), 'status': 'in_progress'}]},
+                }, format='json')
+                self.assertEqual(len(response.data['success']), 1)
+                event = TaskUpdate.objects.get(task=task, update_type='status_change')
+                self.assertEqual(event.user, pusher)
+
+
+@override_settings(SYNC_QUEUE_BACKOFF_BASE=5, SYNC_QUEUE_BACKOFF_MAX=3600, SYNC_QUEUE_MAX_ATTEMPTS=2)
+class SyncQueueWorkerTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='commander',
+            password='testpass123',
+            is_commander=True
+        )
+        self.client.force_authenticate(user=self.user)
+        officer_user = User.objects.create_user(username='officer1', password='officer123')
+        self.officer = Officer.objects.create(
+            user=officer_user,
+            name='Test Officer',
+            rank='Lieutenant',
+            phone_number='1234567890',
+            status='available'
+        )
+        now = timezone.now()
+        self.tasks = [
+            Task.objects.create(
+                title=f'Task {i}',
+                description='Test Description',
+                assigned_to=self.officer,
+                created_by=self.user,
+                start_date=now,
+                due_date=now + timedelta(days=1)
+            )
+            for i in range(3)
+        ]
+        self.content_type = ContentType.objects.get_for_model(Task)
+        # Not the shared buffer, whose timer would write points after the test
+        self.metrics = MetricBuffer(flush_interval=3600)
+        self.addCleanup(self.metrics.flush)
+
+    def enqueue(self, task, data, priority=0, sync_type='update'):
+        return SyncQueue.objects.create(
+            content_type=self.content_type,
+            object_id=task.id,
+            sync_type=sync_type,
+            data=data,
+            priority=priority
+        )
+
+    def test_items_are_applied_in_priority_order(self):
+        low = self.enqueue(self.tasks[0], {'status': 'in_progress'})
+        high = self.enqueue(self.tasks[1], {'status': 'cancelled'}, priority=10)
+        self.enqueue(self.tasks[2], {}, sync_type='delete')
+
+        worker = SyncQueueWorker(batch_size=1, metrics=self.metrics)
+        self.assertEqual(worker.run_once(), 1)
+        high.refresh_from_db()
+        low.refresh_from_db()
+        self.assertIsNotNone(high.processed_at)
+        self.assertIsNone(low.processed_at)
+
+        while worker.run_once():
+            pass
+        self.assertEqual(worker.succeeded, 3)
+        self.assertGreater(len(self.metrics), 0)
+        self.assertEqual(Task.objects.get(id=self.tasks[0].id).status, 'in_progress')
+        self.assertFalse(Task.objects.filter(id=self.tasks[2].id).exists())
+        self.assertEqual(SyncStatus.objects.filter(entity_type='tasks', is_synced=True).count(), 3)
+
+    def test_failures_back_off_then_die(self):
+        self.assertEqual(backoff(1), timedelta(seconds=5))
+        self.assertEqual(backoff(3), timedelta(seconds=20))
+        self.assertEqual(backoff(20), timedelta(seconds=3600))
+
+        item = self.enqueue(self.tasks[0], {'status': 'unknown'})
+        worker = SyncQueueWorker(metrics=self.metrics)
+        worker.run_once()
+
+        item.refresh_from_db()
+        self.assertEqual(item.attempts, 1)
+        self.assertIn('status', item.error_message)
+        self.assertAlmostEqual(
+            (item.next_attempt_at - item.last_attempt).total_seconds(), 5, places=3
+        )
+        # Not due yet
+        self.assertEqual(worker.run_once(), 0)
+
+        SyncQueue.objects.filter(pk=item.pk).update(next_attempt_at=timezone.now())
+        worker.run_once()
+        item.refresh_from_db()
+        self.assertIsNone(item.next_attempt_at)
+
+        status_row = SyncStatus.objects.get(entity_id=self.tasks[0].id)
+        self.assertFalse(status_row.is_synced)
+        self.assertEqual(status_row.sync_attempts, 2)
+
+        response = self.client.get(reverse('sync-queue'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['dead'], 1)
+        self.assertEqual(response.data['depth'], 0)
+
+
+    def test_poison_items_fail_alone_and_die(self):
+        good = self.enqueue(self.tasks[0], {'status': 'in_progress'})
+        officer = SyncQueue.objects.create(
+            content_type=ContentType.objects.get_for_model(Officer),
+            object_id=str(self.officer.id),
+            sync_type='update',
+            data={'name': 'Renamed'},
+        )
+        poison = self.enqueue(self.tasks[1], {'status': 'completed'})
+
+        worker = SyncQueueWorker(metrics=self.metrics)
+        # Something the per-item validation does not catch
+        apply = BulkApply.apply
+        with mock.patch('sync.queue.BulkApply.apply', autospec=True,
+                        side_effect=lambda applier, payload: _raise_on(apply, applier, payload)):
+            self.assertEqual(worker.run_once(), 3)
+            for item in (good, officer, poison):
+                item.refresh_from_db()
+            self.assertIsNotNone(good.processed_at)
+            self.assertIsNotNone(officer.processed_at)
+            self.assertEqual(poison.attempts, 1)
+            self.assertIn('poison', poison.error_message)
+
+            SyncQueue.objects.filter(pk=poison.pk).update(next_attempt_at=timezone.now())
+            worker.run_once()
+        poison.refresh_from_db()
+        self.assertIsNone(poison.next_attempt_at)
+        self.assertEqual(Officer.objects.get().name, 'Renamed')
+
+
+def _raise_on(apply, applier, payload):
+    """BulkApply.apply that raises on payloads completing a task"""
+    if any(item.get('status') == 'completed' for item in payload):
+        raise RuntimeError('poison')
+    return apply(applier, payload)
+
+
+class SyncConflictTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='commander',
+            password='testpass123',
+            is_commander=True
+        )
+        self.client.force_authenticate(user=self.user)
+        officer_user = User.objects.create_user(username='officer1', password='officer123')
+        self.officer = Officer.objects.create(
+            user=officer_user,
+            name='Test Officer',
+            rank='Lieutenant',
+            phone_number='1234567890',
+            status='available'
+        )
+        now = timezone.now()
+        self.task = Task.objects.create(
+            title='Task',
+            description='Test Description',
+            assigned_to=self.officer,
+            created_by=self.user,
+            start_date=now,
+            due_date=now + timedelta(days=1)
+        )
+        self.assertEqual(self.task.version, 1)
+
+        # Edited on the server while the client was offline
+        self.task.status = 'completed'
+        self.task.save()
+        self.assertEqual(self.task.version, 2)
+
+    def push(self, item, **params):
+        response = self.client.post(reverse('sync-push'), {
+            'changes': {'tasks': [{'id': str(self.task.id), 'base_version': 1, **item}]},
+            **params
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def assert_overlapping_edits_are_reported(self, **params):
+        data = self.push({'priority': 'high', 'status': 'cancelled'}, **params)
+
+        self.assertEqual(data['success'], [])
+        conflict, = data['conflicts']
+        self.assertEqual(conflict['fields'], {'status': 'completed'})
+
+        # The non-overlapping field is merged in
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.priority, 'high')
+        self.assertEqual(self.task.status, 'completed')
+        self.assertEqual(conflict['version'], self.task.version)
+
+    def test_overlapping_edits_are_reported(self):
+        self.assert_overlapping_edits_are_reported()
+
+    def test_overlapping_edits_are_reported_in_bulk_mode(self):
+        self.assert_overlapping_edits_are_reported(mode='bulk')
+
+    def test_rows_are_locked_while_merging(self):
+        select_for_update = QuerySet.select_for_update
+        for mode in ('items', 'bulk'):
+            with self.subTest(mode=mode), mock.patch.object(
+                QuerySet, 'select_for_update', autospec=True, side_effect=select_for_update
+            ) as locked:
+                self.push({'title': f'Locked {mode}'}, mode=mode)
+                self.assertEqual(locked.call_args.args[0].model, Task)
+
+    def test_identical_or_disjoint_edits_merge_cleanly(self):
+        data = self.push({'status': 'completed', 'title': 'Renamed'})
+        self.assertEqual(data['conflicts'], [])
+        self.assertEqual(data['success'][0]['version'], 3)
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'Renamed')
+        self.assertEqual(self.task.field_stamps['title']['version'], 3)
@@ -1,78 +1,434 @@
 
 # Create your views here.
+from datetime import timedelta
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
+from core.pagination import decode_cursor, encode_cursor, key_values, keyset_filter
+from core.streaming import StreamingJSONResponse, iter_chunks, wants_stream
 from officers.models import Officer
 from officers.serializers import OfficerSerializer
 from order.models import Order
 from order.serializers import OrderSerializer
 from tasks.models import Task
 from tasks.serializers import TaskSerializer
-from .models import SyncStatus, SyncQueue
+from .bulk import BulkApply
+from .conflicts import find_conflicts
+from .devices import get_device_id, record_states
+from .models import DeviceSyncState, SyncStatus, SyncQueue, Tombstone
+from .queue import queue_stats
+from .renderers import ColumnarRenderer, ColumnarXZRenderer
 from .serializers import SyncStatusSerializer, SyncQueueSerializer
+from .signals import ENTITY_TYPES
+
+ENTITY_MODELS = {name: model for model, name in ENTITY_TYPES.items()}
+
+
+def _timestamp(value):
+    """An aware datetime from a cursor; raises ValueError if malformed"""
+    at = parse_datetime(value) if isinstance(value, str) else None
+    if at is None or timezone.is_naive(at):
+        raise ValueError('Malformed cursor timestamp')
+    return at
+
+
+def _pull_key(values, model):
+    """A cursor's [timestamp, id or None] key for `model`; raises ValueError if malformed"""
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError('Malformed cursor key')
+    _timestamp(values[0])
+    if values[1] is not None:
+        try:
+            model._meta.pk.to_python(values[1])
+        except ValidationError as e:
+            raise ValueError(str(e))
+    return values
 
 
 
 class SyncViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [
+        ColumnarRenderer,
+        ColumnarXZRenderer,
+    ]
+
+    # Rows per entity type per pull
+    PULL_LIMIT = 200
+    MAX_PULL_LIMIT = 1000
+    PULL_ORDERING = ('updated_at', 'id')
+    PULL_CHUNK_SIZE = 200
+    TOMBSTONE_ORDERING = ('deleted_at', 'id')
+    TOMBSTONE_SETTLE = timedelta(minutes=1)
+    # Writes are assumed to commit within this long of their updated_at.
+    # A row can commit after rows with a later updated_at were sent, so
+    # each pass starts this long before the previous one began and
+    # re-sends what changed since (clients upsert rows by id).
+    PULL_SETTLE = timedelta(minutes=1)
+
+    PULL_QUERYSETS = {
+        'tasks': lambda: Task.objects.select_related('assigned_to').prefetch_related('updates'),
+        'orders': lambda: Order.objects.select_related(
+            'created_by', 'assigned_to'
+        ).prefetch_related('acknowledgments'),
+        'officers': lambda: Officer.objects.with_task_counts(),
+    }
+
+    PULL_SERIALIZERS = {
+        'tasks': TaskSerializer,
+        'orders': OrderSerializer,
+        'officers': OfficerSerializer,
+    }
 
     @action(detail=False, methods=['post'])
     def pull(self, request):
-        last_sync = request.data.get('last_sync')
+        """
+        Incremental pull. Each entity type is read in (updated_at, id)
+        order from the opaque cursor returned for it by the previous pull,
+        at most `limit` rows at a time; keep pulling with the returned
+        cursors while `has_more` is true. A partial sync resumes from the
+        last cursor received. Each pass re-sends the rows changed in the
+        PULL_SETTLE before the previous pass began, so rows that committed
+        late are not missed; clients upsert rows by id. Without a cursor, `last_sync` (if given) is
+        the starting point. With `compact`, rows the client already has
+        only carry id, updated_at and the fields changed since its last
+        completed sync.
+
+        Ids deleted since the cursor come back in `deleted`. Tombstones are
+        only kept for SYNC_TOMBSTONE_RETENTION_DAYS; entity types whose
+        cursor is older than that are listed in `full_resync_required`
+        and the client must drop them and pull again without a cursor.
+
+        Clients on slow links can ask for the compressed columnar encoding
+        (see sync.codec) with the Accept header or `?format=columnar-gzip`.
+        With `?stream=true` the JSON body is written as rows are read, so
+        large pulls start arriving at once and memory use stays flat.
+
+        Cursors sent by a device that names itself (`device_id` or the
+        X-Device-ID header) are recorded as acknowledged, see `device`.
+        """
         entity_types = request.data.get('entity_types', [])
+        cursors = request.data.get('cursors') or {}
+        if not isinstance(cursors, dict):
+            return Response(
+                {'error': 'cursors must map entity types to cursors'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        compact = bool(request.data.get('compact', False))
 
         try:
-            last_sync_date = timezone.datetime.fromisoformat(last_sync)
+            limit = int(request.data.get('limit', self.PULL_LIMIT))
         except (ValueError, TypeError):
-            last_sync_date = timezone.now() - timezone.timedelta(days=30)
+            return Response(
+                {'error': 'Invalid limit'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = min(max(limit, 1), self.MAX_PULL_LIMIT)
+
+        last_sync = request.data.get('last_sync')
+        last_sync_date = parse_datetime(last_sync) if isinstance(last_sync, str) else None
+        if last_sync_date and timezone.is_naive(last_sync_date):
+            last_sync_date = timezone.make_aware(last_sync_date)
+
+        now = timezone.now()
+        horizon = now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        updates = {}
+        deleted = {}
+        next_cursors = {}
+        full_resync_required = []
+        finishes = []
+        acknowledged = {}
+        streaming = wants_stream(request)
+
+        for entity_type in entity_types:
+            if entity_type not in self.PULL_QUERYSETS:
+                continue
+
+            try:
+                cursor = self._decode_pull_cursor(
+                    cursors.get(entity_type), last_sync_date, ENTITY_MODELS[entity_type]
+                )
+            except ValueError:
+                return Response(
+                    {'error': f'Invalid cursor for {entity_type}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            acknowledged[entity_type] = {
+                'cursor': cursors.get(entity_type) or '',
+                'synced_to': parse_datetime(cursor['key'][0]) if cursor else None,
+                'last_pull_at': now,
+            }
+
+            if cursor and parse_datetime(cursor['deleted'][0]) < horizon:
+                # Deletes this old may already have been pruned
+                full_resync_required.append(entity_type)
+                continue
+
+            rows, finish = self._pull_entity(entity_type, cursor, limit, compact, now)
+            finishes.append(finish)
+            if streaming:
+                # Written after all the rows, once the last key is known
+                updates[entity_type] = rows
+                deleted[entity_type] = lambda finish=finish: finish()[0]
+                next_cursors[entity_type] = lambda finish=finish: finish()[1]
+            else:
+                updates[entity_type] = list(rows)
+                deleted[entity_type], next_cursors[entity_type], _ = finish()
+
+        record_states(request.user, get_device_id(request), acknowledged,
+                      ['cursor', 'synced_to', 'last_pull_at'])
+
+        payload = {
+            'last_sync': now.isoformat(),
+            'updates': updates,
+            'deleted': deleted,
+            'cursors': next_cursors,
+            'has_more': lambda: any(finish()[2] for finish in finishes),
+            'full_resync_required': full_resync_required,
+        }
+        if streaming:
+            return StreamingJSONResponse(payload)
+        payload['has_more'] = payload['has_more']()
+        return Response(payload)
+
+    @staticmethod
+    def _decode_pull_cursor(token, last_sync_date, model):
+        """
+        Cursor payload: `key` is the (updated_at, id) of the last row sent,
+        `since` the point the client had fully synced to when this pass
+        over the entity started, `started` when the pass's first page was
+        served (None once the pass is over) and `deleted` the
+        (deleted_at, id) of the last tombstone sent. Raises ValueError if
+        any of it is malformed.
+        """
+        if token:
+            payload = decode_cursor(token)
+            if not isinstance(payload, dict):
+                raise ValueError('Malformed cursor')
+            key = _pull_key(payload.get('key'), model)
+            since, started = payload.get('since'), payload.get('started')
+            return {
+                'key': key,
+                'since': _timestamp(since) if since else None,
+                'started': _timestamp(started) if started else None,
+                'deleted': _pull_key(payload.get('deleted') or [key[0], None], Tombstone),
+            }
+        if last_sync_date:
+            start = [last_sync_date.isoformat(), None]
+            return {'key': start, 'since': last_sync_date, 'started': None, 'deleted': start}
+        return None
+
+    def _pull_entity(self, entity_type, cursor, limit, compact, now):
+        """
+        A generator of the rows after the cursor, read and serialized
+        PULL_CHUNK_SIZE at a time, and a callable returning (deleted ids,
+        next cursor, has_more) once the rows have been consumed
+        """
+        queryset = self.PULL_QUERYSETS[entity_type]().order_by(*self.PULL_ORDERING)
+        if cursor:
+            queryset = queryset.filter(
+                keyset_filter(queryset.model, self.PULL_ORDERING, cursor['key'])
+            )
+
+        serializer_class = self.PULL_SERIALIZERS[entity_type]
+        since = cursor['since'] if cursor else None
+        page = {'count': 0, 'last': None, 'has_more': False}
+
+        def rows():
+            for chunk in iter_chunks(queryset[:limit + 1], self.PULL_CHUNK_SIZE):
+                for instance, data in zip(chunk, serializer_class(chunk, many=True).data):
+                    if page['count'] == limit:
+                        page['has_more'] = True
+                        return
+                    page['count'] += 1
+                    page['last'] = instance
+                    yield self._compact_row(instance, data, since) if compact and since else data
+
+        result = []
+
+        def finish():
+            if not result:
+                result.extend(self._finish_entity(entity_type, cursor, limit, now, page))
+            return result
+
+        return rows(), finish
 
-        updates = {
-            'tasks': [],
-            'orders': [],
-            'officers': [],
+    def _finish_entity(self, entity_type, cursor, limit, now, page):
+        since = cursor['since'] if cursor else None
+        has_more = page['has_more']
+        if page['last'] is not None:
+            key = key_values(page['last'], self.PULL_ORDERING)
+        else:
+            key = cursor['key'] if cursor else None
+
+        deleted_ids, deleted_key, more_deleted = self._pull_tombstones(
+            entity_type, cursor, limit, now
+        )
+
+        started = (cursor or {}).get('started') or now
+        if key is None:
+            # Fresh client with nothing to pull yet
+            next_cursor = None
+        elif has_more:
+            next_cursor = encode_cursor({
+                'key': key,
+                'since': since.isoformat() if since else None,
+                'started': started.isoformat(),
+                'deleted': deleted_key,
+            })
+        else:
+            # The pass is over: the next one starts PULL_SETTLE before this
+            # one began, to pick up rows that committed behind the key.
+            # Later changes are compacted against that point.
+            settled = started - self.PULL_SETTLE
+            if parse_datetime(key[0]) > settled:
+                key = [settled.isoformat(), None]
+            next_cursor = encode_cursor({
+                'key': key,
+                'since': key[0],
+                'started': None,
+                'deleted': deleted_key,
+            })
+
+        return deleted_ids, next_cursor, has_more or more_deleted
+
+    def _pull_tombstones(self, entity_type, cursor, limit, now):
+        """Ids deleted after the cursor's tombstone position, and the next position"""
+        if not cursor:
+            # A full sync only needs deletes from here on
+            return [], [now.isoformat(), None], False
+
+        tombstones = Tombstone.objects.filter(entity_type=entity_type).filter(
+            keyset_filter(Tombstone, self.TOMBSTONE_ORDERING, cursor['deleted'])
+        ).order_by(*self.TOMBSTONE_ORDERING)
+        page = list(tombstones[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        if page:
+            key = key_values(page[-1], self.TOMBSTONE_ORDERING)
+        else:
+            # Nothing deleted: move the position up so active clients stay
+            # inside the retention horizon, leaving room for deletes that
+            # have not committed yet
+            settled = now - self.TOMBSTONE_SETTLE
+            key = cursor['deleted']
+            if parse_datetime(key[0]) < settled:
+                key = [settled.isoformat(), None]
+
+        return [tombstone.entity_id for tombstone in page], key, has_more
+
+    @staticmethod
+    def _compact_row(instance, data, since):
+        """Only the fields changed after `since` for a row the client already has"""
+        if instance.created_at > since or not instance.field_stamps:
+            return data
+
+        changed = {
+            name for name, stamp in instance.field_stamps.items()
+            if parse_datetime(stamp['at']) > since
         }
+        row = {
+            name: value for name, value in data.items()
+            if name in changed or name == 'id'
+        }
+        row['updated_at'] = instance.updated_at.isoformat()
+        row['version'] = instance.version
+        return row
 
-        # Get updated tasks
-        if 'tasks' in entity_types:
-            tasks = Task.objects.filter(updated_at__gt=last_sync_date)
-            updates['tasks'] = TaskSerializer(tasks, many=True).data
+    @action(detail=False, methods=['get'])
+    def device(self, request):
+        """
+        Sync state of the requesting device per entity type, with the
+        number of rows changed and deleted since its acknowledged cursor
+        (one indexed count each)
+        """
+        device_id = get_device_id(request)
+        if not device_id:
+            return Response(
+                {'error': 'device_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Get updated orders
-        if 'orders' in entity_types:
-            orders = Order.objects.filter(updated_at__gt=last_sync_date)
-            updates['orders'] = OrderSerializer(orders, many=True).data
+        states = DeviceSyncState.objects.filter(
+            user=request.user, device_id=device_id
+        ).order_by('entity_type')
+        results = []
+        for state in states:
+            model = ENTITY_MODELS[state.entity_type]
+            try:
+                cursor = self._decode_pull_cursor(state.cursor, None, model)
+            except ValueError:
+                # Stored before cursors were checked; count from scratch
+                cursor = None
+            if cursor:
+                changed = model.objects.filter(
+                    keyset_filter(model, self.PULL_ORDERING, cursor['key'])
+                ).count()
+                deleted = Tombstone.objects.filter(entity_type=state.entity_type).filter(
+                    keyset_filter(Tombstone, self.TOMBSTONE_ORDERING, cursor['deleted'])
+                ).count()
+            else:
+                # Nothing acknowledged yet: everything is missing
+                changed, deleted = model.objects.count(), 0
+            results.append({
+                'entity_type': state.entity_type,
+                'synced_to': state.synced_to,
+                'last_pull_at': state.last_pull_at,
+                'last_push_at': state.last_push_at,
+                'pending_updates': changed,
+                'pending_deletes': deleted,
+            })
 
-        # Get updated officers
-        if 'officers' in entity_types:
-            officers = Officer.objects.filter(updated_at__gt=last_sync_date)
-            updates['officers'] = OfficerSerializer(officers, many=True).data
+        return Response({'device_id': device_id, 'entity_types': results})
 
-        return Response({
-            'last_sync': timezone.now().isoformat(),
-            'updates': updates
-        })
+    @action(detail=False, methods=['get'], url_path='queue')
+    def queue(self, request):
+        """SyncQueue depth, due and dead items and age of the oldest pending item"""
+        return Response(queue_stats())
 
     @action(detail=False, methods=['post'])
     def push(self, request):
+        """
+        Apply client changes. Updates that carry the `base_version` the
+        client last saw are merged with server edits made since: fields
+        only one side changed are applied, fields both sides changed keep
+        the server value and are returned under `conflicts` so the client
+        can resend just those with the new version.
+        """
         changes = request.data.get('changes', {})
 
+        now = timezone.now()
+        record_states(request.user, get_device_id(request), {
+            entity_type: {'last_push_at': now}
+            for entity_type in changes if entity_type in self.PULL_SERIALIZERS
+        }, ['last_push_at'])
+
+        if request.data.get('mode') == 'bulk':
+            return Response(self._bulk_push(changes, request.user))
+
         processed = {
             'success': [],
-            'failed': []
+            'failed': [],
+            'conflicts': [],
         }
 
         for entity_type, entities in changes.items():
             for entity_data in entities:
                 try:
-                    self._process_entity_change(entity_type, entity_data)
-                    processed['success'].append({
-                        'type': entity_type,
-                        'id': entity_data.get('id')
-                    })
+                    instance, conflicts = self._process_entity_change(entity_type, entity_data)
+                    self._report_applied(processed, entity_type, instance.pk,
+                                         getattr(instance, 'version', None), conflicts)
                 except Exception as e:
                     processed['failed'].append({
                         'type': entity_type,
@@ -82,6 +438,51 @@ class SyncViewSet(viewsets.ViewSet):
 
         return Response(processed)
 
+    def _bulk_push(self, changes, user):
+        """
+        Apply each entity type's changes in batches (see sync.bulk), with
+        the same per-item success/failure report as a regular push
+        """
+        processed = {
+            'success': [],
+            'failed': [],
+            'conflicts': [],
+        }
+
+        for entity_type, entities in changes.items():
+            if entity_type not in self.PULL_SERIALIZERS:
+                processed['failed'].extend(
+                    {
+                        'type': entity_type,
+                        'id': entity.get('id') if isinstance(entity, dict) else None,
+                        'error': f'Unknown entity type: {entity_type}'
+                    }
+                    for entity in entities
+                )
+                continue
+
+            applier = BulkApply(self.PULL_SERIALIZERS[entity_type], user)
+            for outcome in applier.apply(entities):
+                if outcome['error']:
+                    processed['failed'].append({
+                        'type': entity_type,
+                        'id': outcome['id'],
+                        'error': outcome['error']
+                    })
+                else:
+                    self._report_applied(processed, entity_type, outcome['id'],
+                                         outcome['version'], outcome['conflicts'])
+
+        return processed
+
+    @staticmethod
+    def _report_applied(processed, entity_type, pk, version, conflicts):
+        result = {'type': entity_type, 'id': str(pk), 'version': version}
+        if conflicts:
+            processed['conflicts'].append({**result, 'fields': conflicts})
+        else:
+            processed['success'].append(result)
+
     def _process_entity_change(self, entity_type, data):
         model_map = {
             'tasks': Task,
@@ -101,11 +502,23 @@ class SyncViewSet(viewsets.ViewSet):
         model = model_map[entity_type]
         serializer_class = serializer_map[entity_type]
 
-        if 'id' in data:
-            instance = model.objects.get(id=data['id'])
-            serializer = serializer_class(instance, data=data, partial=True)
-        else:
-            serializer = serializer_class(data=data)
+        conflicts = {}
+        # The row stays locked from the version check to the save, so a
+        # concurrent push based on the same version is merged afterwards
+        with transaction.atomic():
+            if 'id' in data:
+                instance = model.objects.select_for_update().get(id=data['id'])
+                writable = {
+                    name: field for name, field in serializer_class().fields.items()
+                    if not field.read_only
+                }
+                conflicts = find_conflicts(instance, data, writable)
+                data = {name: value for name, value in data.items() if name not in conflicts}
+                serializer = serializer_class(
+                    instance, data=data, partial=True, context={'request': self.request}
+                )
+            else:
+                serializer = serializer_class(data=data, context={'request': self.request})
 
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+            serializer.is_valid(raise_exception=True)
+            return serializer.save(), conflicts
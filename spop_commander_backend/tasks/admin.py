@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import TaskStateSnapshot
+
+
+@admin.register(TaskStateSnapshot)
+class TaskStateSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'entered_at', 'pending_seconds',
+                    'in_progress_seconds', 'cycle_seconds', 'events')
+    list_filter = ('status',)
+    raw_id_fields = ('task',)
@@ -0,0 +1,123 @@
+# tasks/bulk.py
+
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
+
+from dashboard.activity import activity_sink
+from dashboard.snapshots import stale_day_log
+from .models import Task, TaskUpdate
+from .workflow import InvalidTransition, apply_status, task_events
+
+REASSIGNMENT = 'reassignment'
+
+# Fields a bulk change can write
+WRITTEN_FIELDS = [
+    'status', 'completion_date', 'assigned_to', 'updated_at', 'field_stamps', 'version',
+]
+
+
+def bulk_change(task_ids, user, status=None, officer=None, note='', now=None):
+    """
+    Move the tasks `task_ids` to `status` and/or `officer` in one
+    transaction: the rows are locked and read with one query, checked
+    against the workflow one by one and written with one bulk_update.
+    pre_save/post_save are sent by hand, as in sync.bulk, so sync stamps,
+    dashboard counters and activities behave as for ``save()``; the
+    status_change events, reassignment events and activities are each
+    written with one bulk_create.
+
+    Returns one {'id', 'error', 'changed', 'status', 'assigned_to'} per
+    id, in order. Tasks that are missing or cannot make the move get an
+    `error` and are left alone; tasks already in the requested state are
+    reported with `changed` false.
+    """
+    now = now or timezone.now()
+    db = router.db_for_write(Task)
+    pk_field = Task._meta.pk
+
+    results, keys = [], []
+    for task_id in task_ids:
+        results.append({
+            'id': str(task_id), 'error': None, 'changed': False,
+            'status': None, 'assigned_to': None,
+        })
+        try:
+            keys.append(pk_field.to_python(task_id))
+        except ValidationError:
+            keys.append(None)
+
+    # The batches close after the commit, so the activities and stale
+    # snapshot days recorded on commit go into one insert each
+    with activity_sink.batch(), stale_day_log.batch(), transaction.atomic(using=db):
+        tasks = Task.objects.select_for_update().select_related(
+            'assigned_to', 'created_by'
+        ).in_bulk([key for key in keys if key is not None])
+
+        changed, reassignments = {}, []
+        for result, key in zip(results, keys):
+            task = tasks.get(key) if key is not None else None
+            if task is None:
+                result['error'] = f"Task {result['id']} does not exist"
+                continue
+
+            if key not in changed:
+                try:
+                    reassignment = _change(task, user, status, officer, note, now)
+                except InvalidTransition as e:
+                    result['error'] = str(e)
+                    continue
+                if task.changed_fields(['status', 'assigned_to_id']):
+                    changed[key] = task
+                    if reassignment is not None:
+                        reassignments.append(reassignment)
+                    result['changed'] = True
+            result['status'] = task.status
+            result['assigned_to'] = task.assigned_to_id
+
+        if changed:
+            _write(list(changed.values()), reassignments, user, note, now, db)
+    return results
+
+
+def _change(task, user, status, officer, note, now):
+    """Apply the change to `task` in memory; returns its reassignment event, if any"""
+    if status is not None and status != task.status:
+        apply_status(task, status, now)
+
+    if officer is None or officer.pk == task.assigned_to_id:
+        return None
+    previous = task.assigned_to
+    task.assigned_to = officer
+    return TaskUpdate(
+        task=task,
+        user=user,
+        update_type=REASSIGNMENT,
+        description=note or f'{previous.name} -> {officer.name}',
+        data={
+            'from': str(previous.pk),
+            'to': str(officer.pk),
+            'at': now.isoformat(),
+        },
+    )
+
+
+def _write(tasks, reassignments, user, note, now, db):
+    for task in tasks:
+        # bulk_update skips auto_now
+        task.updated_at = now
+        pre_save.send(sender=Task, instance=task, raw=False, using=db, update_fields=None)
+
+    Task.objects.bulk_update(tasks, WRITTEN_FIELDS)
+    TaskUpdate.objects.bulk_create(reassignments)
+
+    with task_events.batch():
+        for task in tasks:
+            # Picked up by the status_change logger, see tasks.signals
+            task._workflow = {'user_id': user.pk, 'note': note, 'at': now}
+            post_save.send(
+                sender=Task, instance=task, created=False,
+                raw=False, using=db, update_fields=None
+            )
+            task.take_snapshot()
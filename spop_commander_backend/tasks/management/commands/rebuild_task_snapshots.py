@@ -0,0 +1,28 @@
+# tasks/management/commands/rebuild_task_snapshots.py
+
+from django.core.management.base import BaseCommand
+
+from tasks.models import Task
+from tasks.workflow import STATUS_CHANGE, rebuild_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild task state snapshots by replaying their status_change '
+        'events. Only needed to repair snapshots; they are kept current '
+        'as events are logged.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('task_ids', nargs='*', help='Tasks to rebuild (default: all with events)')
+
+    def handle(self, *args, **options):
+        tasks = Task.objects.filter(updates__update_type=STATUS_CHANGE).distinct()
+        if options['task_ids']:
+            tasks = tasks.filter(pk__in=options['task_ids'])
+
+        rebuilt = 0
+        for task in tasks.iterator(chunk_size=500):
+            rebuild_snapshot(task)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} task snapshot(s)'))
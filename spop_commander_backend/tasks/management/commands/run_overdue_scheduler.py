@@ -0,0 +1,28 @@
+# tasks/management/commands/run_overdue_scheduler.py
+
+from django.core.management.base import BaseCommand
+
+from tasks.overdue import overdue_scheduler as scheduler
+
+
+class Command(BaseCommand):
+    help = (
+        'Announce tasks as overdue when their due date passes (notification, '
+        'dashboard activity, task_overdue signal). Run one instance; '
+        'extra instances never announce a task twice.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Announce the tasks that are due now and exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            scheduler.run_once()
+        else:
+            try:
+                scheduler.run()
+            except KeyboardInterrupt:
+                pass
+
+        self.stdout.write(f'Announced {scheduler.announced} overdue task(s)')
@@ -1,10 +1,53 @@
 from django.db import models
-from core.models import BaseModel
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from core.models import BaseModel, ChangeTrackingMixin
 from django.conf import settings
 from officers.models import Officer
 
 
-class Task(BaseModel):
+class TaskQuerySet(models.QuerySet):
+    def with_response_time(self):
+        """Annotate the time between a task being created and its start"""
+        return self.annotate(
+            response_time=models.ExpressionWrapper(
+                models.F('start_date') - models.F('created_at'),
+                output_field=models.DurationField()
+            )
+        )
+
+    def officer_summary(self, limit=5):
+        """
+        Latest open tasks and most recently completed tasks per officer,
+        ranked with a window function so both lists load in one query
+        """
+        is_completed = models.Q(status='completed')
+        return self.filter(
+            status__in=['pending', 'in_progress', 'completed']
+        ).annotate(
+            summary_rank=models.Window(
+                expression=RowNumber(),
+                partition_by=[
+                    models.F('assigned_to'),
+                    models.Case(
+                        models.When(is_completed, then=models.Value(True)),
+                        default=models.Value(False),
+                        output_field=models.BooleanField()
+                    ),
+                ],
+                order_by=models.Case(
+                    models.When(is_completed, then=models.F('completion_date')),
+                    default=models.F('created_at')
+                ).desc(nulls_last=True),
+            )
+        ).filter(summary_rank__lte=limit).order_by('summary_rank')
+
+
+# Statuses of tasks that still need work
+OPEN_STATUSES = ['pending', 'in_progress']
+
+
+class Task(ChangeTrackingMixin, BaseModel):
     PRIORITY_CHOICES = [
         ('low', 'منخفض'),
         ('medium', 'متوسط'),
@@ -19,6 +62,12 @@ class Task(BaseModel):
         ('cancelled', 'ملغي'),
     ]
 
+    # Snapshotted on load for change detection (see dashboard.signals)
+    tracked_fields = (
+        'title', 'description', 'assigned_to_id', 'priority',
+        'status', 'due_date', 'completion_date',
+    )
+
     title = models.CharField(max_length=200)
     description = models.TextField()
     assigned_to = models.ForeignKey(
@@ -44,6 +93,43 @@ class Task(BaseModel):
     start_date = models.DateTimeField()
     due_date = models.DateTimeField()
     completion_date = models.DateTimeField(null=True, blank=True)
+    # When the task was last announced as overdue, see tasks.overdue
+    overdue_notified_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # When, and in which version, each field last changed (see sync.signals)
+    field_stamps = models.JSONField(default=dict, blank=True, editable=False)
+    # Bumped on every change; pushes send it back as base_version
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        # Hot filters, see dashboard/management/commands/benchmark_hot_queries.py.
+        # Conditional indexes are skipped on backends without partial
+        # index support.
+        indexes = [
+            # Sync pull key, see sync.views
+            models.Index(fields=['updated_at', 'id']),
+            # List pagination key, see tasks.views
+            models.Index(fields=['created_at', 'id']),
+            # Status filters ordered newest first (available, active)
+            models.Index(fields=['status', 'created_at']),
+            # Officer workload and task counts
+            models.Index(fields=['assigned_to', 'status']),
+            # Completion metrics over a recent window
+            models.Index(fields=['completion_date']),
+            # Overdue: open tasks past their due date
+            models.Index(
+                fields=['due_date'],
+                condition=models.Q(status__in=OPEN_STATUSES),
+                name='task_open_due_idx',
+            ),
+            # Open tasks per officer, newest first (officer summaries)
+            models.Index(
+                fields=['assigned_to', 'created_at'],
+                condition=models.Q(status__in=OPEN_STATUSES),
+                name='task_open_officer_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -55,3 +141,43 @@ class TaskUpdate(BaseModel):
     update_type = models.CharField(max_length=20)
     description = models.TextField()
     data = models.JSONField(null=True, blank=True)
+
+
+class TaskStateSnapshot(models.Model):
+    """
+    A task's workflow state folded from its status_change TaskUpdate
+    events (see tasks.workflow): current status, when it was entered and
+    the time spent so far in pending and in progress. Updated with every
+    event, so reading a task's state never replays the log.
+    """
+    task = models.OneToOneField(
+        Task,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='state'
+    )
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES)
+    entered_at = models.DateTimeField()
+    pending_seconds = models.FloatField(default=0)
+    in_progress_seconds = models.FloatField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # From creation to completion
+    cycle_seconds = models.FloatField(null=True, blank=True)
+    events = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Cycle time analytics over a completion window
+            models.Index(fields=['completed_at']),
+        ]
+
+    def durations(self, now=None):
+        """Seconds spent in pending and in progress, including the current stay"""
+        durations = {
+            'pending': self.pending_seconds,
+            'in_progress': self.in_progress_seconds,
+        }
+        if self.status in durations:
+            elapsed = ((now or timezone.now()) - self.entered_at).total_seconds()
+            durations[self.status] += max(elapsed, 0)
+        return durations
@@ -0,0 +1,276 @@
+# tasks/overdue.py
+
+import heapq
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from dashboard.models import Activity
+from notifcations.models import Notification, NotificationType
+from sync.models import Tombstone
+from .models import OPEN_STATUSES, Task
+
+logger = logging.getLogger(__name__)
+
+# Sent once per task when its due date passes while it is still open
+task_overdue = Signal()
+
+OVERDUE_COUNT_KEY = 'tasks:overdue:count'
+CHANGE_SETTLE = timedelta(minutes=1)
+
+
+class OverdueScheduler:
+    """
+    Due dates of open tasks in a min-heap, so tasks are reported the
+    moment they fall due and the overdue count is a memory read.
+
+    Loaded with one query on the open-due index, then kept current by
+    catch_up(): tasks saved since the last pass (on the updated_at index)
+    and tasks deleted since (sync tombstones), whichever process made the
+    change. A full reload every TASKS_OVERDUE_REFRESH_SECONDS is only a
+    safety net. Heap entries are not removed when a task is rescheduled or
+    closed; stale ones are skipped when they reach the top.
+
+    After every pass the overdue count is published to the dashboard cache
+    for get_task_stats (see published_overdue_count).
+
+    With `notify`, tasks that fall due are queued for emit_overdue(), which
+    claims each task in the database first, so a task is announced once
+    even if more than one scheduler runs. Run by the run_overdue_scheduler
+    command.
+    """
+
+    def __init__(self, notify=True):
+        self.notify = notify
+        self.loaded_at = None
+        self.caught_up_at = None
+        self.announced = 0
+        self._lock = threading.Lock()
+        self._heap = []       # (due_date, task id)
+        self._due = {}        # task id -> due date, for open tasks not yet due
+        self._overdue = {}    # task id -> due date, for open tasks past it
+        self._pending = []    # fell due, not yet emitted
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    def rebuild(self, now=None):
+        """Reload every open task's due date from the table"""
+        now = now or timezone.now()
+        rows = Task.objects.filter(status__in=OPEN_STATUSES).values_list(
+            'id', 'due_date', 'overdue_notified_at'
+        )
+        heap, due, overdue, pending = [], {}, {}, []
+        for task_id, due_date, notified_at in rows:
+            if due_date > now:
+                heap.append((due_date, task_id))
+                due[task_id] = due_date
+            else:
+                overdue[task_id] = due_date
+                if notified_at is None or notified_at < due_date:
+                    # Fell due while no scheduler was watching
+                    pending.append(task_id)
+        heapq.heapify(heap)
+
+        with self._lock:
+            self._heap, self._due, self._overdue = heap, due, overdue
+            if self.notify:
+                self._pending = list(dict.fromkeys(self._pending + pending))
+            self.loaded_at = self.caught_up_at = now
+        self._wakeup.set()
+
+    def catch_up(self, now=None):
+        """Track the tasks saved or deleted since the last pass (two indexed queries)"""
+        now = now or timezone.now()
+        # Saves can commit a little after their updated_at
+        since = self.caught_up_at - CHANGE_SETTLE
+        saved = Task.objects.filter(updated_at__gte=since).values_list(
+            'id', 'status', 'due_date'
+        )
+        for task_id, status, due_date in saved:
+            self.track(task_id, status, due_date)
+
+        deleted = Tombstone.objects.filter(
+            entity_type='tasks', deleted_at__gte=since
+        ).values_list('entity_id', flat=True)
+        for entity_id in deleted:
+            self.forget(Task._meta.pk.to_python(entity_id))
+        self.caught_up_at = now
+
+    def track(self, task_id, status, due_date):
+        """Account for a task's current status and due date"""
+        is_open = status in OPEN_STATUSES and due_date is not None
+        with self._lock:
+            known = self._due.get(task_id, self._overdue.get(task_id))
+            if is_open and known == due_date:
+                return
+            self._due.pop(task_id, None)
+            self._overdue.pop(task_id, None)
+            if not is_open:
+                return
+            self._due[task_id] = due_date
+            heapq.heappush(self._heap, (due_date, task_id))
+            earliest = self._heap[0][1] == task_id
+        if earliest:
+            self._wakeup.set()
+
+    def forget(self, task_id):
+        with self._lock:
+            self._due.pop(task_id, None)
+            self._overdue.pop(task_id, None)
+
+    def poll(self, now=None):
+        """Move tasks whose due date has passed to the overdue set"""
+        now = now or timezone.now()
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due_date, task_id = heapq.heappop(self._heap)
+                if self._due.get(task_id) != due_date:
+                    continue
+                del self._due[task_id]
+                self._overdue[task_id] = due_date
+                if self.notify:
+                    self._pending.append(task_id)
+
+    def next_deadline(self):
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def overdue_count(self, now=None):
+        """Open tasks past their due date"""
+        self.poll(now)
+        return len(self._overdue)
+
+    def drain(self):
+        """Task ids that fell due since the last drain"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return pending
+
+    def _is_stale(self, now):
+        if not self.loaded:
+            return True
+        return (now - self.loaded_at).total_seconds() >= settings.TASKS_OVERDUE_REFRESH_SECONDS
+
+    def run_once(self, now=None):
+        """
+        Catch up, poll, emit and publish the overdue count; returns seconds
+        until the next deadline or catch up
+        """
+        now = now or timezone.now()
+        if self._is_stale(now):
+            self.rebuild(now)
+        else:
+            self.catch_up(now)
+        self.poll(now)
+        pending = self.drain()
+        if pending:
+            self.announced += len(emit_overdue(pending, now))
+        publish_overdue_count(self.overdue_count(now))
+
+        timeout = settings.TASKS_OVERDUE_POLL_SECONDS
+        deadline = self.next_deadline()
+        if deadline is not None:
+            timeout = min(timeout, (deadline - now).total_seconds())
+        return max(timeout, 0)
+
+    def run(self):
+        """Emit overdue tasks as their deadlines pass, until stopped"""
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            try:
+                timeout = self.run_once()
+            except Exception:
+                logger.exception('Overdue scheduler pass failed')
+                timeout = settings.TASKS_OVERDUE_POLL_SECONDS
+            finally:
+                close_old_connections()
+            self._wakeup.wait(timeout)
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+
+def publish_overdue_count(count):
+    # Expires if the scheduler stops, so readers fall back to counting
+    timeout = settings.TASKS_OVERDUE_POLL_SECONDS * 3
+    caches[settings.DASHBOARD_CACHE_ALIAS].set(OVERDUE_COUNT_KEY, count, timeout=timeout)
+
+
+def published_overdue_count():
+    """The overdue count of a running scheduler, or None if none has published one"""
+    return caches[settings.DASHBOARD_CACHE_ALIAS].get(OVERDUE_COUNT_KEY)
+
+
+def emit_overdue(task_ids, now=None):
+    """
+    Announce tasks that fell due: a notification to the assigned officer,
+    a dashboard activity and the task_overdue signal. The tasks are claimed
+    (locked and stamped with overdue_notified_at) in the same transaction
+    that writes the notifications and activities, so concurrent schedulers
+    announce a task once per due date and a failed write leaves it to be
+    announced again. Returns the announced tasks.
+    """
+    now = now or timezone.now()
+    not_announced = Q(overdue_notified_at__isnull=True) | Q(overdue_notified_at__lt=F('due_date'))
+    with transaction.atomic():
+        claimed = list(
+            Task.objects.select_for_update().filter(
+                not_announced, pk__in=task_ids, status__in=OPEN_STATUSES, due_date__lte=now
+            ).values_list('pk', flat=True)
+        )
+        if not claimed:
+            return []
+        Task.objects.filter(pk__in=claimed).update(overdue_notified_at=now)
+
+        tasks = list(
+            Task.objects.filter(pk__in=claimed).select_related('assigned_to__user', 'created_by')
+        )
+        content_type = ContentType.objects.get_for_model(Task)
+        Notification.objects.bulk_create([
+            Notification(
+                recipient=task.assigned_to.user,
+                type=NotificationType.TASK,
+                title=f'Task overdue: {task.title}',
+                body=f'"{task.title}" was due {task.due_date:%Y-%m-%d %H:%M}.',
+                action_id=str(task.pk),
+                action_type='task_overdue',
+                priority=1,
+                content_type=content_type,
+                object_id=str(task.pk),
+            )
+            for task in tasks
+        ])
+        Activity.objects.bulk_create([
+            Activity(
+                activity_type='task',
+                title=f'Task Overdue: {task.title}',
+                description=task.description,
+                actor=task.created_by,
+                related_officer=task.assigned_to,
+                status=task.status,
+                metadata={'task_id': str(task.pk), 'due_date': task.due_date.isoformat()},
+            )
+            for task in tasks
+        ])
+
+    for task in tasks:
+        task_overdue.send(sender=Task, task=task)
+    return tasks
+
+
+overdue_scheduler = OverdueScheduler()
@@ -1,5 +1,7 @@
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Task, TaskUpdate
+from .workflow import InvalidTransition, check_transition, completion_date
 
 class TaskUpdateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -8,10 +10,55 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
 
 class TaskSerializer(serializers.ModelSerializer):
     updates = TaskUpdateSerializer(many=True, read_only=True)
-    assigned_to_name = serializers.CharField(source='assigned_to.get_full_name',
+    assigned_to_name = serializers.CharField(source='assigned_to.name',
                                           read_only=True)
 
     class Meta:
         model = Task
-        fields = '__all__'
-        read_only_fields = ['created_by', 'created_at', 'updated_at']
\ No newline at end of file
+        # Sync and scheduler bookkeeping; clients only need the version
+        exclude = ['field_stamps', 'overdue_notified_at']
+        read_only_fields = ['created_by', 'created_at', 'updated_at', 'version']
+
+    def validate(self, attrs):
+        """Status changes follow the task workflow, as in tasks.workflow.transition()"""
+        new_status = attrs.get('status')
+        if self.instance is None or new_status is None or new_status == self.instance.status:
+            return attrs
+        try:
+            check_transition(self.instance.status, new_status)
+        except InvalidTransition as e:
+            raise serializers.ValidationError({'status': [str(e)]})
+        if new_status != 'completed' or not attrs.get('completion_date'):
+            # Offline clients may send when they completed the task
+            attrs['completion_date'] = completion_date(self.instance, new_status, timezone.now())
+        return attrs
+
+    def update(self, instance, validated_data):
+        request = self.context.get('request')
+        if request is not None and request.user.is_authenticated:
+            # Names the author of the status_change event (see tasks.signals)
+            instance._workflow = {'user_id': request.user.pk}
+        return super().update(instance, validated_data)
+
+
+class TaskListSerializer(serializers.ModelSerializer):
+    """
+    Compact task rows for lists. `updates` is only included when the
+    serializer context asks for it with expand={'updates'}.
+    """
+    updates = TaskUpdateSerializer(many=True, read_only=True)
+    assigned_to_name = serializers.CharField(source='assigned_to.name', read_only=True)
+
+    class Meta:
+        model = Task
+        fields = [
+            'id', 'title', 'priority', 'status', 'assigned_to', 'assigned_to_name',
+            'created_by', 'start_date', 'due_date', 'completion_date',
+            'created_at', 'updated_at', 'version', 'updates',
+        ]
+        read_only_fields = fields
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'updates' not in self.context.get('expand', ()):
+            self.fields.pop('updates')
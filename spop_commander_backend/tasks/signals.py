@@ -0,0 +1,29 @@
+# tasks/signals.py
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Task
+from .workflow import task_events
+
+
+@receiver(post_save, sender=Task)
+def log_status_change(sender, instance, created, **kwargs):
+    """
+    Append a status_change event for every status change, whether made
+    through tasks.workflow.transition(), the API or a sync push (which
+    name the user) or a plain save (attributed to the task's creator)
+    """
+    workflow = instance.__dict__.pop('_workflow', None) or {}
+    if created:
+        return
+    change = instance.changed_fields(['status']).get('status')
+    if change is None:
+        return
+    old_status, new_status = change
+    task_events.record(
+        instance, old_status, new_status,
+        user_id=workflow.get('user_id') or instance.created_by_id,
+        note=workflow.get('note', ''),
+        at=workflow.get('at'),
+    )
@@ -0,0 +1,154 @@
+import uuid
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from authentication.models import User
+from dashboard.activity import activity_sink
+from dashboard.models import Activity
+from dashboard.snapshots import stale_day_log
+from officers.models import Officer
+from tasks.bulk import REASSIGNMENT
+from tasks.models import Task, TaskUpdate
+
+
+class BulkTaskTests(APITestCase):
+    def setUp(self):
+        self.commander = User.objects.create_user(
+            username='commander',
+            password='commander123',
+            is_commander=True
+        )
+        self.client.force_authenticate(user=self.commander)
+        self.officer = self._officer('officer1')
+        self.other_officer = self._officer('officer2')
+        self.tasks = [self._task(f'Task {i}') for i in range(3)]
+
+    def _officer(self, username):
+        user = User.objects.create_user(username=username, password='officer123')
+        return Officer.objects.create(
+            user=user,
+            name=username,
+            rank='Lieutenant',
+            phone_number='1234567890'
+        )
+
+    def _task(self, title, task_status='pending', priority='medium'):
+        now = timezone.now()
+        return Task.objects.create(
+            title=title,
+            description='Test Description',
+            assigned_to=self.officer,
+            created_by=self.commander,
+            priority=priority,
+            status=task_status,
+            start_date=now,
+            due_date=now + timedelta(days=1)
+        )
+
+    def _post(self, name, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse(f'task-{name}'), data, format='json')
+
+    def test_bulk_assign_by_ids(self):
+        ids = [str(task.id) for task in self.tasks]
+        response = self._post('bulk-assign', {
+            'ids': ids, 'officer_id': self.other_officer.id, 'note': 'Shift change'
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['changed'], 3)
+        self.assertEqual([result['id'] for result in response.data['results']], ids)
+        self.assertEqual(
+            Task.objects.filter(assigned_to=self.other_officer).count(), 3
+        )
+        events = TaskUpdate.objects.filter(update_type=REASSIGNMENT)
+        self.assertEqual(events.count(), 3)
+        self.assertEqual(events.first().description, 'Shift change')
+        self.assertEqual(Activity.objects.filter(activity_type='task').count(), 3)
+
+        # Assigning again changes nothing
+        response = self._post('bulk-assign', {'ids': ids, 'officer_id': self.other_officer.id})
+        self.assertEqual(response.data['changed'], 0)
+        self.assertEqual(response.data['failed'], 0)
+
+    def test_bulk_status_reports_each_task(self):
+        done = self._task('Done', task_status='completed')
+        missing = str(uuid.uuid4())
+        ids = [str(self.tasks[0].id), str(done.id), missing, 'not-a-uuid']
+
+        response = self._post('bulk-status', {'ids': ids, 'status': 'in_progress'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first, reopened, not_found, invalid = response.data['results']
+        self.assertTrue(first['changed'])
+        self.assertEqual(first['status'], 'in_progress')
+        self.assertTrue(reopened['changed'])
+        done.refresh_from_db()
+        self.assertIsNone(done.completion_date)
+        self.assertIn('does not exist', not_found['error'])
+        self.assertIn('does not exist', invalid['error'])
+
+        response = self._post('bulk-status', {
+            'ids': [str(self.tasks[1].id)], 'status': 'completed'
+        })
+        self.assertIsNotNone(response.data['results'][0]['error'])
+        self.assertEqual(Task.objects.get(id=self.tasks[1].id).status, 'pending')
+
+        self.assertEqual(
+            TaskUpdate.objects.filter(update_type='status_change').count(), 2
+        )
+
+    def test_bulk_cancel_by_filter(self):
+        urgent = self._task('Urgent', priority='urgent')
+        self._task('Finished', task_status='completed', priority='urgent')
+
+        response = self._post('bulk-cancel', {'filter': {'priority': 'urgent', 'status': 'pending'}})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['changed'], 1)
+        self.assertEqual(response.data['results'][0]['id'], str(urgent.id))
+        urgent.refresh_from_db()
+        self.assertEqual(urgent.status, 'cancelled')
+        self.assertEqual(urgent.version, 2)
+
+    def test_queries_do_not_grow_with_tasks(self):
+        def cancel(tasks):
+            # Commits inside the activity and stale day batches, as outside
+            # a test transaction
+            with CaptureQueriesContext(connection) as queries, \
+                    activity_sink.batch(), stale_day_log.batch():
+                self._post('bulk-cancel', {'ids': [str(task.id) for task in tasks]})
+            return len(queries)
+
+        few = cancel(self.tasks)
+        many = cancel([self._task(f'More {i}') for i in range(10)])
+        self.assertEqual(few, many)
+
+    def test_invalid_requests(self):
+        ids = [str(self.tasks[0].id)]
+        for name, data in [
+            ('bulk-cancel', {}),
+            ('bulk-cancel', {'ids': ids, 'filter': {'status': 'pending'}}),
+            ('bulk-cancel', {'filter': {'title': 'x'}}),
+            ('bulk-cancel', {'ids': []}),
+            ('bulk-status', {'ids': ids, 'status': 'archived'}),
+            ('bulk-assign', {'ids': ids, 'officer_id': 999}),
+        ]:
+            with self.subTest(name=name, data=data):
+                response = self._post(name, data)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(TASKS_BULK_MAX=2):
+            response = self._post('bulk-cancel', {'filter': {'status': 'pending'}})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=self.officer.user)
+        response = self._post('bulk-cancel', {'ids': ids})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Task.objects.filter(status='cancelled').count(), 0)
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from authentication.models import User
+from dashboard.models import Activity
+from notifcations.models import Notification
+from officers.models import Officer
+from tasks.models import Task
+from dashboard.stats import get_task_stats
+from tasks.overdue import OverdueScheduler, emit_overdue, published_overdue_count
+
+
+@override_settings(TASKS_OVERDUE_REFRESH_SECONDS=86400)
+class OverdueSchedulerTests(TestCase):
+    def setUp(self):
+        self.commander = User.objects.create_user(username='commander', password='commander123')
+        officer_user = User.objects.create_user(username='officer1', password='officer123')
+        self.officer = Officer.objects.create(
+            user=officer_user,
+            name='Test Officer',
+            rank='Lieutenant',
+            phone_number='1234567890'
+        )
+        self.now = timezone.now()
+        self.late = self._task('Late', hours=-1)
+        self.soon = self._task('Soon', hours=1)
+        self.later = self._task('Later', hours=2)
+        self._task('Done', hours=-1, status='completed')
+
+    def _task(self, title, hours, status='pending'):
+        return Task.objects.create(
+            title=title,
+            description='Test Description',
+            assigned_to=self.officer,
+            created_by=self.commander,
+            status=status,
+            start_date=self.now - timedelta(days=1),
+            due_date=self.now + timedelta(hours=hours)
+        )
+
+    def test_deadlines_pass_in_order(self):
+        scheduler = OverdueScheduler()
+        scheduler.rebuild(self.now)
+        self.assertEqual(scheduler.overdue_count(self.now), 1)
+        self.assertEqual(scheduler.drain(), [self.late.pk])
+        self.assertEqual(scheduler.next_deadline(), self.soon.due_date)
+
+        self.assertEqual(scheduler.overdue_count(self.now + timedelta(minutes=90)), 2)
+        self.assertEqual(scheduler.drain(), [self.soon.pk])
+        self.assertEqual(scheduler.next_deadline(), self.later.due_date)
+
+    def test_saves_and_deletes_are_caught_up(self):
+        scheduler = OverdueScheduler()
+        scheduler.rebuild(self.now)
+
+        # Made by other processes: only the table knows
+        self.soon.due_date = self.now + timedelta(hours=3)
+        self.soon.save()
+        self.late.status = 'completed'
+        self.late.save()
+        self.later.delete()
+        earlier = self._task('Earlier', hours=0.5)
+
+        with self.assertNumQueries(2):
+            scheduler.catch_up(self.now)
+        # The stale heap entry of the old due date is skipped
+        self.assertEqual(scheduler.next_deadline(), earlier.due_date)
+        self.assertEqual(scheduler.overdue_count(self.now + timedelta(minutes=90)), 1)
+        self.assertEqual(scheduler.overdue_count(self.now + timedelta(hours=4)), 2)
+
+    def test_dashboard_reads_the_published_count(self):
+        cache = caches[settings.DASHBOARD_CACHE_ALIAS]
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.assertEqual(get_task_stats(self.now)['overdue_tasks'], 1)
+
+        scheduler = OverdueScheduler(notify=False)
+        scheduler.run_once(self.now)
+        self.assertEqual(published_overdue_count(), 1)
+
+        # Counted by the scheduler, not by a query
+        self.soon.due_date = self.now - timedelta(hours=1)
+        self.soon.save()
+        self.assertEqual(get_task_stats(self.now)['overdue_tasks'], 1)
+        scheduler.run_once(self.now)
+        self.assertEqual(get_task_stats(self.now)['overdue_tasks'], 2)
+
+    def test_tasks_are_announced_once(self):
+        announced = emit_overdue([self.late.pk, self.soon.pk], self.now)
+        # Not due yet
+        self.assertEqual([task.pk for task in announced], [self.late.pk])
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.recipient, self.officer.user)
+        self.assertEqual(notification.action_id, str(self.late.pk))
+        self.assertTrue(Activity.objects.filter(title='Task Overdue: Late').exists())
+
+        # A second scheduler that saw the same deadline pass stays quiet
+        self.assertEqual(emit_overdue([self.late.pk], self.now), [])
+        scheduler = OverdueScheduler()
+        scheduler.rebuild(self.now)
+        self.assertEqual(scheduler.drain(), [])
+
+        # Pushing the deadline back lets it be announced again
+        self.late.due_date = self.now + timedelta(minutes=30)
+        self.late.save()
+        later = self.now + timedelta(hours=1)
+        self.assertEqual(len(emit_overdue([self.late.pk], later)), 1)
+
+    def test_failed_announcement_is_not_claimed(self):
+        with mock.patch.object(Activity.objects, 'bulk_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                emit_overdue([self.late.pk], self.now)
+
+        self.late.refresh_from_db()
+        self.assertIsNone(self.late.overdue_notified_at)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(len(emit_overdue([self.late.pk], self.now)), 1)
@@ -1,9 +1,12 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from authentication.serializers import User
-from tasks.models import Task
+from tasks.models import Task, TaskUpdate
 from officers.models import Officer
 from datetime import datetime, timedelta
 
@@ -45,4 +48,94 @@ class TaskViewSetTests(APITestCase):
 
         response = self.client.post(url, {'status': 'in_progress'}, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(Task.objects.get().status, 'in_progress')
\ No newline at end of file
+        self.assertEqual(Task.objects.get().status, 'in_progress')
+
+class TaskListTests(APITestCase):
+    def setUp(self):
+        self.commander = User.objects.create_user(
+            username='commander',
+            password='commander123',
+            is_commander=True
+        )
+        self.client.force_authenticate(user=self.commander)
+        self.url = reverse('task-list')
+
+    def _create_tasks(self, count):
+        officer_user = User.objects.create_user(
+            username=f'officer{Officer.objects.count()}',
+            password='officer123'
+        )
+        officer = Officer.objects.create(
+            user=officer_user,
+            name='Test Officer',
+            rank='Lieutenant',
+            phone_number='1234567890'
+        )
+        now = timezone.now()
+        for i in range(count):
+            task = Task.objects.create(
+                title=f'Task {i}',
+                description='Test Description',
+                assigned_to=officer,
+                created_by=self.commander,
+                start_date=now,
+                due_date=now + timedelta(days=1)
+            )
+            TaskUpdate.objects.create(
+                task=task,
+                user=self.commander,
+                update_type='note',
+                description='On it'
+            )
+
+    def _get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries), response.data
+
+    def test_list_is_compact_and_query_count_is_constant(self):
+        self._create_tasks(2)
+        small_count, _ = self._get(self.url)
+
+        self._create_tasks(8)
+        large_count, data = self._get(self.url)
+
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(len(data['results']), 10)
+        row = data['results'][0]
+        self.assertNotIn('updates', row)
+        self.assertNotIn('description', row)
+        self.assertEqual(row['assigned_to_name'], 'Test Officer')
+
+    def test_expand_updates_prefetches_them(self):
+        self._create_tasks(2)
+        small_count, _ = self._get(self.url, expand='updates')
+
+        self._create_tasks(8)
+        large_count, data = self._get(self.url, expand='updates')
+
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(data['results'][0]['updates'][0]['description'], 'On it')
+
+    def test_pages_follow_the_cursor(self):
+        self._create_tasks(5)
+        seen = []
+        url, params = self.url, {'page_size': 2}
+        while url:
+            _, data = self._get(url, **params)
+            seen.extend(row['id'] for row in data['results'])
+            url, params = data['next'], {}
+
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(
+            seen,
+            [str(pk) for pk in Task.objects.order_by('-created_at', '-id').values_list('pk', flat=True)]
+        )
+
+    def test_available_is_paginated(self):
+        self._create_tasks(3)
+        Task.objects.filter(title='Task 0').update(status='completed')
+        _, data = self._get(reverse('task-available'))
+        self.assertEqual({row['title'] for row in data['results']}, {'Task 1', 'Task 2'})
+        self.assertIsNone(data['next'])
@@ -0,0 +1,139 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from authentication.models import User
+from officers.models import Officer
+from tasks.models import Task, TaskStateSnapshot, TaskUpdate
+from tasks.workflow import InvalidTransition, rebuild_snapshot, transition
+
+
+class TaskWorkflowTests(APITestCase):
+    def setUp(self):
+        self.commander = User.objects.create_user(
+            username='commander',
+            password='commander123',
+            is_commander=True
+        )
+        self.client.force_authenticate(user=self.commander)
+        officer_user = User.objects.create_user(username='officer1', password='officer123')
+        self.officer = Officer.objects.create(
+            user=officer_user,
+            name='Test Officer',
+            rank='Lieutenant',
+            phone_number='1234567890'
+        )
+        self.task = self._task('Patrol')
+        self.start = self.task.created_at
+
+    def _task(self, title):
+        now = timezone.now()
+        return Task.objects.create(
+            title=title,
+            description='Test Description',
+            assigned_to=self.officer,
+            created_by=self.commander,
+            start_date=now,
+            due_date=now + timedelta(days=1)
+        )
+
+    def _walk(self, task, *steps):
+        """Apply (status, minutes after creation) steps"""
+        for new_status, minutes in steps:
+            transition(task, new_status, self.commander,
+                       now=task.created_at + timedelta(minutes=minutes))
+
+    def test_transitions_are_logged_and_folded(self):
+        self._walk(self.task, ('in_progress', 10), ('pending', 15),
+                   ('in_progress', 30), ('completed', 90))
+
+        events = TaskUpdate.objects.filter(task=self.task, update_type='status_change')
+        self.assertEqual(events.count(), 4)
+        self.assertEqual(
+            sorted((event.data['from'], event.data['to']) for event in events),
+            sorted([('pending', 'in_progress'), ('in_progress', 'pending'),
+                    ('pending', 'in_progress'), ('in_progress', 'completed')])
+        )
+
+        state = TaskStateSnapshot.objects.get(task=self.task)
+        self.assertEqual(state.status, 'completed')
+        self.assertEqual(state.events, 4)
+        self.assertEqual(state.durations(), {'pending': 25 * 60, 'in_progress': 65 * 60})
+        self.assertEqual(state.cycle_seconds, 90 * 60)
+        self.task.refresh_from_db()
+        self.assertIsNotNone(self.task.completion_date)
+
+        # The log alone reproduces the snapshot
+        rebuilt = rebuild_snapshot(self.task)
+        self.assertEqual(rebuilt.durations(), state.durations())
+        self.assertEqual(rebuilt.cycle_seconds, state.cycle_seconds)
+
+    def test_invalid_transitions_are_rejected(self):
+        with self.assertRaises(InvalidTransition):
+            transition(self.task, 'completed', self.commander)
+        with self.assertRaises(InvalidTransition):
+            transition(self.task, 'archived', self.commander)
+        self.assertFalse(TaskUpdate.objects.exists())
+
+        url = reverse('task-update-task-status', kwargs={'pk': self.task.id})
+        response = self.client.patch(url, {'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(url, {'status': 'in_progress'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        event = TaskUpdate.objects.get()
+        self.assertEqual(event.user, self.commander)
+
+        response = self.client.get(reverse('task-timeline', kwargs={'pk': self.task.id}))
+        self.assertEqual(response.data['status'], 'in_progress')
+        self.assertEqual(len(response.data['events']), 1)
+
+    def test_transitions_check_the_stored_status(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        task = transition(self.task, 'in_progress', self.commander)
+        self.assertIn('status', task.field_stamps)
+
+        # A copy read before the first move cannot start the task again
+        with self.assertRaises(InvalidTransition):
+            transition(stale, 'in_progress', self.commander)
+        self.assertEqual(TaskUpdate.objects.count(), 1)
+
+    def test_task_updates_follow_the_workflow(self):
+        url = reverse('task-detail', kwargs={'pk': self.task.id})
+        response = self.client.patch(url, {'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('status', response.data)
+
+        self.client.patch(url, {'status': 'in_progress'}, format='json')
+        response = self.client.patch(url, {'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.data['completion_date'])
+        self.assertEqual(TaskUpdate.objects.filter(user=self.commander).count(), 2)
+
+    def test_plain_saves_are_logged(self):
+        self.task.status = 'in_progress'
+        self.task.save()
+        self.task.title = 'Renamed'
+        self.task.save()
+
+        event = TaskUpdate.objects.get()
+        self.assertEqual(event.data['to'], 'in_progress')
+        self.assertEqual(event.user, self.commander)
+
+    def test_cycle_times_per_officer(self):
+        other = self._task('Escort')
+        self._walk(self.task, ('in_progress', 10), ('completed', 60))
+        self._walk(other, ('in_progress', 30), ('completed', 120))
+        self._walk(self._task('Open'), ('in_progress', 5))
+
+        response = self.client.get(reverse('officer-cycle-times'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        row, = response.data['officers']
+        self.assertEqual(row['officer_id'], self.officer.id)
+        self.assertEqual(row['completed_tasks'], 2)
+        self.assertAlmostEqual(row['average_cycle_time'], 90 * 60)
+        self.assertAlmostEqual(row['average_pending_time'], 20 * 60)
+        self.assertAlmostEqual(row['average_in_progress_time'], 70 * 60)
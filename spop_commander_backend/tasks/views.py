@@ -1,33 +1,72 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from core.pagination import KeysetPagination
+from core.permissions import IsCommanderOrReadOnly
+from core.streaming import StreamingJSONResponse, serialize_iter, wants_stream
+from officers.models import Officer
+from tasks.bulk import bulk_change
 from tasks.models import Task
-from tasks.serializers import TaskSerializer
+from tasks.serializers import TaskListSerializer, TaskSerializer, TaskUpdateSerializer
+from tasks.workflow import (
+    STATUS_CHANGE, TRANSITIONS, InvalidTransition, current_state, transition,
+)
+
+
+class TaskPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+# Filters of the task list, also accepted as a bulk request's `filter`
+FILTERS = {
+    'status': 'status',
+    'priority': 'priority',
+    'officer_id': 'assigned_to_id',
+}
+
+
+def filter_tasks(queryset, params):
+    """Apply the FILTERS given in `params` (query params or a dict)"""
+    for name, lookup in FILTERS.items():
+        value = params.get(name)
+        if value:
+            queryset = queryset.filter(**{lookup: value})
+    return queryset
 
 
 class TaskViewSet(viewsets.ModelViewSet):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
+    pagination_class = TaskPagination
 
+    # Expansions a list request can ask for with ?expand=a,b
+    LIST_EXPANSIONS = {'updates'}
 
-    def get_queryset(self):
-        """Override get_queryset to allow filtering based on query parameters."""
-        queryset = super().get_queryset()
-        status_filter = self.request.query_params.get('status')
-        priority = self.request.query_params.get('priority')
-        officer_id = self.request.query_params.get('officer_id')
+    def get_expand(self):
+        requested = self.request.query_params.get('expand', '')
+        return {name.strip() for name in requested.split(',')} & self.LIST_EXPANSIONS
 
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        if priority:
-            queryset = queryset.filter(priority=priority)
-        if officer_id:
-            queryset = queryset.filter(assigned_to_id=officer_id)
+    def get_serializer_class(self):
+        if self.action in ['list', 'available']:
+            return TaskListSerializer
+        return TaskSerializer
 
-        return queryset
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
+
+    def get_queryset(self):
+        """Override get_queryset to allow filtering based on query parameters."""
+        queryset = super().get_queryset().select_related('assigned_to', 'created_by')
+        if self.action not in ['list', 'available'] or 'updates' in self.get_expand():
+            queryset = queryset.prefetch_related('updates')
+        return filter_tasks(queryset, self.request.query_params)
 
     def create(self, request, *args, **kwargs):
         """Create a new task associated with the current user."""
@@ -48,28 +87,117 @@ class TaskViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def available(self, request):
-        tasks = Task.objects.filter(status='pending')
-        serializer = self.get_serializer(tasks, many=True)
-        return Response(serializer.data)
+        tasks = self.get_queryset().filter(status='pending')
+        if wants_stream(request):
+            return StreamingJSONResponse(serialize_iter(
+                tasks.order_by(*TaskPagination.ordering),
+                self.get_serializer_class(),
+                self.get_serializer_context()
+            ))
+        page = self.paginate_queryset(tasks)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     @action(detail=True, methods=['patch'])
     def update_task_status(self, request, pk=None):
         """Update the status of a specific task by its primary key."""
         task = self.get_object()
         new_status = request.data.get('status')
 
-        if new_status not in ['pending', 'in_progress', 'completed', 'cancelled']:
+        try:
+            task = transition(task, new_status, request.user, note=request.data.get('note', ''))
+        except InvalidTransition as e:
             return Response(
-                {'error': 'Invalid status'},
+                {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
-
-        task.status = new_status
-        task.save()
         return Response({'status': task.status}, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """Current workflow state, time spent per status and the status_change events"""
+        task = self.get_object()
+        state = current_state(task)
+        events = task.updates.filter(update_type=STATUS_CHANGE).order_by('created_at')
+        return Response({
+            'status': state.status,
+            'entered_at': state.entered_at,
+            'durations': state.durations(),
+            'cycle_seconds': state.cycle_seconds,
+            'events': TaskUpdateSerializer(events, many=True).data,
+        })
+
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get a list of active tasks with 'in_progress' status."""
         active_tasks = self.get_queryset().filter(status='in_progress')
         serializer = self.get_serializer(active_tasks, many=True)
         return Response(serializer.data)
+
+    def _bulk_targets(self, request):
+        """
+        Ids of the tasks a bulk request names, either listed in `ids` or
+        matched by `filter` (the list filters); returns (ids, error)
+        """
+        ids, filters = request.data.get('ids'), request.data.get('filter')
+        if (ids is None) == (filters is None):
+            return None, 'Provide either ids or filter'
+
+        if filters is not None:
+            if not isinstance(filters, dict) or not set(filters) & set(FILTERS):
+                return None, f"filter needs at least one of: {', '.join(FILTERS)}"
+            try:
+                ids = list(filter_tasks(Task.objects.all(), filters).values_list(
+                    'id', flat=True
+                )[:settings.TASKS_BULK_MAX + 1])
+            except (TypeError, ValueError, DjangoValidationError) as e:
+                return None, f'Invalid filter: {e}'
+        elif not isinstance(ids, list) or not ids:
+            return None, 'ids must be a non-empty list'
+
+        ids = list(dict.fromkeys(str(task_id) for task_id in ids))
+        if len(ids) > settings.TASKS_BULK_MAX:
+            return None, f'At most {settings.TASKS_BULK_MAX} tasks can be changed at once'
+        return ids, None
+
+    def _bulk_response(self, request, **change):
+        ids, error = self._bulk_targets(request)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = bulk_change(ids, request.user, note=request.data.get('note', ''), **change)
+        return Response({
+            'changed': sum(result['changed'] for result in results),
+            'failed': sum(result['error'] is not None for result in results),
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsCommanderOrReadOnly])
+    def bulk_assign(self, request):
+        """Assign (or reassign) the tasks to `officer_id`"""
+        officer_id = request.data.get('officer_id')
+        try:
+            officer = Officer.objects.filter(pk=officer_id).first() if officer_id else None
+        except (TypeError, ValueError, DjangoValidationError):
+            officer = None
+        if officer is None:
+            return Response(
+                {'error': 'officer_id must name an existing officer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return self._bulk_response(request, officer=officer)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsCommanderOrReadOnly])
+    def bulk_status(self, request):
+        """Move the tasks to `status`, task by task as the workflow allows"""
+        new_status = request.data.get('status')
+        if new_status not in TRANSITIONS:
+            return Response(
+                {'error': f'Unknown status: {new_status}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return self._bulk_response(request, status=new_status)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsCommanderOrReadOnly])
+    def bulk_cancel(self, request):
+        """Cancel the tasks"""
+        return self._bulk_response(request, status='cancelled')
@@ -0,0 +1,200 @@
+# tasks/workflow.py
+
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Task, TaskStateSnapshot, TaskUpdate
+
+# Allowed status moves; reopening is allowed, skipping in_progress is not
+TRANSITIONS = {
+    'pending': {'in_progress', 'cancelled'},
+    'in_progress': {'pending', 'completed', 'cancelled'},
+    'completed': {'in_progress'},
+    'cancelled': {'pending'},
+}
+
+STATUS_CHANGE = 'status_change'
+
+# Written by transition(); field_stamps and version keep sync stamping on
+TRANSITION_FIELDS = ['status', 'completion_date', 'updated_at', 'field_stamps', 'version']
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+def apply_status(task, new_status, now):
+    """
+    Set `task`'s status (without saving) if the workflow allows the move,
+    keeping completion_date in step
+    """
+    check_transition(task.status, new_status)
+    task.completion_date = completion_date(task, new_status, now)
+    task.status = new_status
+
+
+def check_transition(old_status, new_status):
+    if new_status not in TRANSITIONS:
+        raise InvalidTransition(f'Unknown status: {new_status}')
+    if new_status not in TRANSITIONS[old_status]:
+        raise InvalidTransition(f'A {old_status} task cannot become {new_status}')
+
+
+def completion_date(task, new_status, now):
+    """`task`'s completion_date once it moves to `new_status`"""
+    if new_status == 'completed':
+        return now
+    if task.status == 'completed':
+        return None
+    return task.completion_date
+
+
+def transition(task, new_status, user, note='', now=None):
+    """
+    Move `task` to `new_status` if the workflow allows it and return the
+    saved task. The row is locked and re-read first, so concurrent moves
+    are checked one after the other against the current status. The
+    status_change event is logged by the task save signal (tasks.signals)
+    with `user` as its author, in the same transaction.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        task = Task.objects.select_for_update().get(pk=task.pk)
+        apply_status(task, new_status, now)
+        # Picked up (once) by the save signal that logs the event
+        task._workflow = {'user_id': user.pk, 'note': note, 'at': now}
+        task.save(update_fields=TRANSITION_FIELDS)
+    return task
+
+
+class TaskEventLog:
+    """
+    Appends status_change TaskUpdate rows and folds them into the tasks'
+    TaskStateSnapshot, in the caller's transaction. Inside ``batch()``
+    (used by bulk sync writes) events are buffered and written together
+    when the batch closes: one insert for the events, one read and at
+    most two writes for the snapshots.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def record(self, task, old_status, new_status, user_id, note='', at=None):
+        event = (task, old_status, new_status, user_id, note, at or timezone.now())
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            buffer.append(event)
+        else:
+            self._write([event])
+
+    @contextmanager
+    def batch(self):
+        if getattr(self._local, 'buffer', None) is not None:
+            # Nested batches join the outermost one
+            yield
+            return
+
+        self._local.buffer = []
+        try:
+            yield
+            events = self._local.buffer
+        finally:
+            self._local.buffer = None
+        if events:
+            self._write(events)
+
+    def _write(self, events):
+        with transaction.atomic():
+            snapshots = TaskStateSnapshot.objects.select_for_update().in_bulk(
+                {task.pk for task, *_ in events}
+            )
+            created = {}
+            updates = []
+            for task, old_status, new_status, user_id, note, at in events:
+                snapshot = snapshots.get(task.pk)
+                if snapshot is None:
+                    # First event: the task has been in its old status since creation
+                    snapshot = TaskStateSnapshot(
+                        task=task, status=old_status, entered_at=task.created_at
+                    )
+                    snapshots[task.pk] = created[task.pk] = snapshot
+                seconds = fold(snapshot, new_status, at, task.created_at)
+                updates.append(TaskUpdate(
+                    task=task,
+                    user_id=user_id,
+                    update_type=STATUS_CHANGE,
+                    description=note or f'{old_status} -> {new_status}',
+                    data={
+                        'from': old_status,
+                        'to': new_status,
+                        'at': at.isoformat(),
+                        'seconds_in_previous': seconds,
+                    },
+                ))
+
+            TaskUpdate.objects.bulk_create(updates)
+            TaskStateSnapshot.objects.bulk_create(created.values())
+            existing = [
+                snapshot for pk, snapshot in snapshots.items() if pk not in created
+            ]
+            TaskStateSnapshot.objects.bulk_update(existing, [
+                'status', 'entered_at', 'pending_seconds', 'in_progress_seconds',
+                'completed_at', 'cycle_seconds', 'events',
+            ])
+
+
+def fold(snapshot, new_status, at, created_at):
+    """Apply one status change to a snapshot; returns the seconds spent in the previous status"""
+    seconds = max((at - snapshot.entered_at).total_seconds(), 0)
+    if snapshot.status == 'pending':
+        snapshot.pending_seconds += seconds
+    elif snapshot.status == 'in_progress':
+        snapshot.in_progress_seconds += seconds
+
+    snapshot.status = new_status
+    snapshot.entered_at = at
+    snapshot.events += 1
+    if new_status == 'completed':
+        snapshot.completed_at = at
+        snapshot.cycle_seconds = (at - created_at).total_seconds()
+    else:
+        snapshot.completed_at = None
+        snapshot.cycle_seconds = None
+    return seconds
+
+
+def current_state(task):
+    """The task's snapshot, or its implied state if it has never changed status"""
+    try:
+        return task.state
+    except TaskStateSnapshot.DoesNotExist:
+        return TaskStateSnapshot(task=task, status=task.status, entered_at=task.created_at)
+
+
+def rebuild_snapshot(task):
+    """Replay the task's status_change events into a fresh snapshot"""
+    events = []
+    for event in task.updates.filter(update_type=STATUS_CHANGE):
+        data = event.data or {}
+        at = parse_datetime(data['at']) if data.get('at') else event.created_at
+        events.append((at, data))
+
+    snapshot = None
+    for at, data in sorted(events, key=lambda event: event[0]):
+        if snapshot is None:
+            snapshot = TaskStateSnapshot(
+                task=task, status=data.get('from', task.status), entered_at=task.created_at
+            )
+        fold(snapshot, data.get('to', task.status), at, task.created_at)
+
+    TaskStateSnapshot.objects.filter(task=task).delete()
+    if snapshot is not None:
+        snapshot.save()
+    return snapshot
+
+
+task_events = TaskEventLog()